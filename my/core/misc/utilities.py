@@ -3,21 +3,21 @@ from functools import reduce
 from os import scandir
 from os.path import basename, isdir, isfile
 from platform import system
-from re import compile as re_compile, findall, IGNORECASE
+from re import compile as re_compile, IGNORECASE
 from subprocess import Popen, PIPE
 from typing import Any, AnyStr, Dict, Iterable, List, Optional, Tuple
 
 try:
     from libs.my.core.network.proxy import Proxy
+    from libs.my.core.network.proxy_loader import ProxyListLoader
     from libs.my.core.text.utilities import get_match
 except ModuleNotFoundError:
     from core.network.proxy import Proxy
+    from core.network.proxy_loader import ProxyListLoader
     from core.text.utilities import get_match
 
 
 MATCH_WHITESPACE = "\s+"
-# MATCH_PROXY = "((\d{1,3})(\.\d{1,3}){3})(?:\s)*(?::)?(\d{2,5})"
-MATCH_PROXY = "(\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3})\s*:?\s*(\d{2,5})"
 
 if system() == "Windows":
     MATCH_CHROME = r"google\s+chrome\s+(\d+)\."
@@ -83,14 +83,7 @@ def get_chrome_driver_version(binary_path: Optional[AnyStr] = None) -> Optional[
 
 def extract_proxies(text: AnyStr) -> Iterable[Proxy]:
     """Returns collection of network proxy objects from parsed text"""
-    results = set()
-    matches = findall(MATCH_PROXY, text)
-    for ip, port in matches:
-        proxy = Proxy.from_string(f"https://{ip}:{port}/")
-        if proxy is not None:
-            results.add(proxy)
-
-    return results
+    return set(ProxyListLoader(ssl=True).parse_text(text))
 
 
 def increase(obj: Any, field: AnyStr):
@@ -0,0 +1,81 @@
+from typing import AnyStr, Optional
+
+try:
+    from libs.my.core.network.async_proxy_pool import AsyncProxyPool
+    from libs.my.core.network.proxy import Proxy
+except ModuleNotFoundError:
+    from core.network.async_proxy_pool import AsyncProxyPool
+    from core.network.proxy import Proxy
+
+
+class AsyncProxyManager:
+    """Manages async proxy pool like ProxyManager, tracks proxy failures, removes burned ones from pool and
+    ensures that one proxy is always used by just one consumer. Proxy is held by lease, so a lease reclaimed by pool
+    reaper is never returned on behalf of its next holder. Usable as async context manager"""
+
+    def __init__(
+        self,
+        proxy_pool: AsyncProxyPool,
+        max_wait_time: float = 30,
+        domain: Optional[AnyStr] = None,
+        sticky: bool = False,
+    ):
+        self._proxy_pool = proxy_pool
+        self._max_wait_time = max_wait_time
+        self._domain = domain
+        self._sticky = sticky
+        self._proxy = None
+        self._lease = None
+        self._proxy_retries = 0
+        self._proxy_failures = 0
+
+    def add_failure(self):
+        """Increases failure count for proxy"""
+        self._proxy_retries += 1
+        self._proxy_failures += 1
+        self.report(False)
+
+    def report(self, success: bool, latency: Optional[float] = None):
+        """Reports request outcome and latency in seconds of current proxy to proxy pool"""
+        if isinstance(self._proxy, Proxy):
+            self._proxy_pool.report(self._proxy, success, latency)
+
+    def ban(self, ban_time: Optional[float] = None):
+        """Bans current proxy on domain for ban time seconds or for good"""
+        if isinstance(self._proxy, Proxy) and self._domain is not None:
+            self._proxy_pool.ban_proxy(self._proxy, self._domain, ban_time)
+
+    def heartbeat(self, lease_time: Optional[float] = None) -> bool:
+        """Renews lease of current proxy so pool reaper doesn't reclaim it, returns False if lease was lost"""
+        if self._lease is not None:
+            return self._lease.renew(lease_time)
+
+        return False
+
+    async def get(self) -> Proxy:
+        """Returns proxy from proxy pool"""
+        self._return()
+        self._lease = await self._proxy_pool.acquire(self._max_wait_time, self._domain, self._sticky)
+        self._proxy, self._proxy_retries = self._lease.proxy, self._lease.retries
+        self._proxy_failures = 0
+
+        return self._proxy
+
+    def _return(self):
+        """Returns current proxy to proxy pool with its new failures"""
+        if self._lease is not None:
+            # Pool adds returned failures to retries count it already holds
+            self._lease.release(self._proxy_failures)
+        self._proxy = None
+        self._lease = None
+
+    @property
+    def proxy(self) -> Optional[Proxy]:
+        """Returns current proxy"""
+        return self._proxy
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        self._return()
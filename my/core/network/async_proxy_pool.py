@@ -0,0 +1,194 @@
+from asyncio import Future, TimeoutError, get_running_loop, wait_for
+from collections import deque
+from typing import AnyStr, Dict, Iterable, Optional, Tuple
+
+try:
+    from libs.my.core.network.proxy import Proxy
+    from libs.my.core.network.proxy_pool import ProxyLease, ProxyPool, ProxyPoolTimeoutError, ProxyRotationStrategy
+except ModuleNotFoundError:
+    from core.network.proxy import Proxy
+    from core.network.proxy_pool import ProxyLease, ProxyPool, ProxyPoolTimeoutError, ProxyRotationStrategy
+
+
+class _Waiter:
+    """Coroutine waiting for available proxy, future is replaced each time coroutine waits again"""
+
+    def __init__(self, future: Future):
+        self.future = future
+
+    @property
+    def woken(self) -> bool:
+        """Returns True if waiter was woken up, its future is cancelled on wait timeout"""
+        return self.future.done() and not self.future.cancelled()
+
+
+class AsyncProxyPool:
+    """asyncio proxy pool, waits for available proxy without blocking event loop. Wraps ProxyPool so rotation
+    strategies, retries accounting, quarantine, bans and leases are the same and pool can be shared with threads,
+    proxies returned from other threads wake waiting coroutines too. Waiting coroutines are served in arrival
+    order, available proxy wakes only the first of them and new coroutines don't take proxies while others wait.
+    Woken coroutine which can't take proxy, e.g. banned on its domain, keeps its place and passes the wake up
+    to the next one"""
+
+    def __init__(self, proxies: Iterable[Proxy] = (), proxy_pool: Optional[ProxyPool] = None, **kwargs):
+        self._pool = proxy_pool if proxy_pool is not None else ProxyPool(proxies, **kwargs)
+        self._loop = None
+        # Coroutines waiting for available proxy in arrival order
+        self._waiters = deque()
+        self._waits = 0
+        self._timeouts = 0
+        self._pool.add_listener(self._on_available)
+
+    def _on_available(self):
+        """Schedules waiting coroutines wake up, called by pool from any thread"""
+        if self._loop is None or not self._waiters:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._wake)
+        except RuntimeError:
+            # Event loop is closed
+            pass
+
+    def _wake(self, after: Optional[_Waiter] = None):
+        """Wakes the first waiting coroutine not woken yet, only ones behind after waiter if given"""
+        found = after is None
+        for waiter in self._waiters:
+            if not found:
+                found = waiter is after
+            elif not waiter.future.done():
+                waiter.future.set_result(None)
+                return
+
+    async def acquire(
+        self,
+        max_wait_time: float = 30,
+        domain: Optional[AnyStr] = None,
+        sticky: bool = False,
+        lease_time: Optional[float] = None,
+    ) -> ProxyLease:
+        """Returns lease of proxy from available ones, waits up to max_wait_time seconds until one is returned or
+        added, see ProxyPool.lease"""
+        if not self._waiters:
+            lease = self._pool.try_lease(domain, sticky, lease_time)
+            if lease is not None:
+                return lease
+        loop = get_running_loop()
+        self._loop = loop
+        deadline = loop.time() + max_wait_time
+        self._waits += 1
+        waiter = _Waiter(loop.create_future())
+        self._waiters.append(waiter)
+        if waiter is not self._waiters[0] and self.available_count:
+            # Waiters ahead get available proxies first, wake up is passed on to this one if they can't take them
+            self._wake()
+        lease = None
+        try:
+            while True:
+                # Checked after waiter is registered so no wake up is missed, only by the first waiter or woken one
+                if waiter.woken or waiter is self._waiters[0]:
+                    lease = self._pool.try_lease(domain, sticky, lease_time)
+                    if lease is not None:
+                        return lease
+                    if waiter.woken or self.available_count:
+                        # Proxies can't be used by this waiter, offers them to the ones behind
+                        self._wake(waiter)
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise ProxyPoolTimeoutError()
+                # Wake up for next quarantine release as well
+                release_delay = self._pool.release_delay
+                if release_delay is not None:
+                    remaining = min(remaining, release_delay)
+                if waiter.future.done():
+                    waiter.future = loop.create_future()
+                try:
+                    await wait_for(waiter.future, remaining)
+                except TimeoutError:
+                    pass
+        finally:
+            self._waiters.remove(waiter)
+            # Passes wake up on if proxies are left or this waiter was woken but gave up
+            if self._waiters and (waiter.woken and lease is None or lease is not None and self.available_count):
+                self._wake()
+
+    async def get_proxy(
+        self, max_wait_time: float = 30, domain: Optional[AnyStr] = None, sticky: bool = False
+    ) -> Tuple[Optional[Proxy], int]:
+        """Returns proxy from available ones and its retries count, see acquire"""
+        lease = await self.acquire(max_wait_time, domain, sticky)
+
+        return lease.proxy, lease.retries
+
+    def return_proxy(self, proxy: Proxy, retries: int) -> bool:
+        """Returns proxy to pool with new failures count, see ProxyPool.return_proxy"""
+        return self._pool.return_proxy(proxy, retries)
+
+    def release(self, lease: ProxyLease, failures: int = 0) -> bool:
+        """Returns leased proxy with new failures count, returns False if lease is no longer held"""
+        return self._pool.release_lease(lease, failures)
+
+    def add_proxy(self, proxy: Proxy):
+        """Adds proxy to pool"""
+        self._pool.add_proxy(proxy)
+
+    def report(self, proxy: Proxy, success: bool, latency: Optional[float] = None):
+        """Records request outcome and latency in seconds of proxy"""
+        self._pool.report(proxy, success, latency)
+
+    def ban_proxy(self, proxy: Proxy, domain: AnyStr, ban_time: Optional[float] = None):
+        """Bans proxy on domain for ban time seconds or for good"""
+        self._pool.ban_proxy(proxy, domain, ban_time)
+
+    def renew_proxy(self, proxy: Proxy, lease_time: Optional[float] = None) -> bool:
+        """Extends lease of proxy in use, returns False if proxy isn't in use"""
+        return self._pool.renew_proxy(proxy, lease_time)
+
+    def close(self):
+        """Detaches from wrapped pool"""
+        self._pool.remove_listener(self._on_available)
+
+    @property
+    def proxy_pool(self) -> ProxyPool:
+        """Returns wrapped proxy pool"""
+        return self._pool
+
+    @property
+    def rotation_strategy(self) -> ProxyRotationStrategy:
+        """Returns proxy rotation strategy"""
+        return self._pool.rotation_strategy
+
+    @rotation_strategy.setter
+    def rotation_strategy(self, rotation_strategy: ProxyRotationStrategy):
+        """Sets proxy rotation strategy"""
+        self._pool.rotation_strategy = rotation_strategy
+
+    @property
+    def available_count(self) -> int:
+        """Returns number of available proxies"""
+        return self._pool.available_count
+
+    @property
+    def in_use_count(self) -> int:
+        """Returns number of proxies in use"""
+        return self._pool.in_use_count
+
+    @property
+    def live_count(self) -> int:
+        """Returns number of live proxies"""
+        return self._pool.live_count
+
+    @property
+    def dead_count(self) -> int:
+        """Returns number of dead proxies"""
+        return self._pool.dead_count
+
+    @property
+    def waiting_count(self) -> int:
+        """Returns number of coroutines waiting for proxy"""
+        return len(self._waiters)
+
+    @property
+    def wait_stats(self) -> Dict:
+        """Returns coroutine waits and timeouts counts"""
+        return {"waits": self._waits, "timeouts": self._timeouts, "waiting": len(self._waiters)}
@@ -0,0 +1,41 @@
+from socketserver import BaseServer
+from threading import Thread
+from typing import AnyStr, Tuple, Union
+
+
+class BackgroundServer:
+    """Base of local servers serving socket server in background thread, started and stopped directly or as
+    context manager"""
+
+    def __init__(self, server: BaseServer):
+        self._server = server
+        self._thread = None
+
+    @property
+    def address(self) -> Union[AnyStr, Tuple[AnyStr, int]]:
+        """Returns server host and port or socket path"""
+        address = self._server.server_address
+
+        return address[:2] if isinstance(address, tuple) else address
+
+    def start(self):
+        """Starts serving in background thread"""
+        if self._thread is None:
+            self._thread = Thread(target=self._server.serve_forever, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stops serving and closes server socket"""
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.stop()
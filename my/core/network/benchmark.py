@@ -0,0 +1,44 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable
+
+try:
+    from libs.my.core.network.timing import Histogram
+except ModuleNotFoundError:
+    from core.network.timing import Histogram
+
+
+def benchmark(func: Callable[[Any], Any], args: Iterable, concurrency: int = 10) -> Dict:
+    """Calls function with every argument from thread pool and returns throughput, errors count and latency
+    histogram summary, call counts as failed when it raises or returns None. Meant to be run against MockServer
+    or ReplayAdapter for reproducible results"""
+    histogram = Histogram()
+    lock = Lock()
+    counters = {"calls": 0, "errors": 0}
+
+    def call(arg: Any):
+        start_time = perf_counter()
+        try:
+            failed = func(arg) is None
+        except Exception:
+            failed = True
+        elapsed = perf_counter() - start_time
+        with lock:
+            histogram.add(elapsed)
+            counters["calls"] += 1
+            counters["errors"] += failed
+
+    start_time = perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in executor.map(call, args):
+            pass
+    duration = perf_counter() - start_time
+
+    return {
+        "calls": counters["calls"],
+        "errors": counters["errors"],
+        "duration": duration,
+        "throughput": counters["calls"] / duration if duration > 0 else 0,
+        "latency": histogram.to_dict(),
+    }
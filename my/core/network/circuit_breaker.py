@@ -0,0 +1,245 @@
+from collections import deque
+from enum import Enum
+from threading import Lock
+from time import monotonic
+from typing import AnyStr, Dict
+
+from requests.packages.urllib3.exceptions import MaxRetryError, ResponseError
+from requests.packages.urllib3.util.retry import Retry
+
+
+FAILURE_THRESHOLD = 5
+RECOVERY_TIME = 30
+FAILURE_STATUSES = (500, 502, 503, 504)
+RETRY_BUDGET_RATIO = 0.1
+RETRY_BUDGET_MIN_RETRIES = 10
+RETRY_BUDGET_WINDOW = 10
+
+
+class CircuitBreakerError(Exception):
+    """Circuit breaker base error"""
+
+    pass
+
+
+class CircuitOpenError(CircuitBreakerError):
+    """Raised when request is sent to host with open circuit"""
+
+    pass
+
+
+class CircuitState(Enum):
+    """Circuit breaker states"""
+
+    CLOSED = "closed"  # Requests pass, failures are counted
+    OPEN = "open"  # Requests fail fast until recovery time passes
+    HALF_OPEN = "half_open"  # Limited number of probe requests decide whether to close or reopen circuit
+
+
+class CircuitBreaker:
+    """Circuit breaker for a single host, not thread-safe on its own"""
+
+    def __init__(
+        self,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        recovery_time: float = RECOVERY_TIME,
+        half_open_max_calls: int = 1,
+    ):
+        self._failure_threshold = failure_threshold
+        self._recovery_time = recovery_time
+        self._half_open_max_calls = half_open_max_calls
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at = 0
+        self._half_open_calls = 0
+
+    @property
+    def state(self) -> CircuitState:
+        """Returns circuit state, open circuit turns half-open after recovery time"""
+        if self._state == CircuitState.OPEN and monotonic() - self._opened_at >= self._recovery_time:
+            self._state = CircuitState.HALF_OPEN
+            self._half_open_calls = 0
+
+        return self._state
+
+    @property
+    def failures(self) -> int:
+        """Returns number of consecutive failures"""
+        return self._failures
+
+    def allow(self) -> bool:
+        """Returns True if request may be sent otherwise False"""
+        state = self.state
+        if state == CircuitState.CLOSED:
+            return True
+        if state == CircuitState.HALF_OPEN and self._half_open_calls < self._half_open_max_calls:
+            self._half_open_calls += 1
+            return True
+
+        return False
+
+    def record_success(self):
+        """Closes circuit and resets failure count"""
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+
+    def record_failure(self):
+        """Counts failure, opens circuit when threshold is reached or probe request fails"""
+        self._failures += 1
+        if self._state == CircuitState.HALF_OPEN or self._failures >= self._failure_threshold:
+            self._state = CircuitState.OPEN
+            self._opened_at = monotonic()
+
+
+class HostCircuitBreakers:
+    """Thread-safe collection of per host circuit breakers"""
+
+    def __init__(
+        self,
+        failure_threshold: int = FAILURE_THRESHOLD,
+        recovery_time: float = RECOVERY_TIME,
+        half_open_max_calls: int = 1,
+    ):
+        self._lock = Lock()
+        self._failure_threshold = failure_threshold
+        self._recovery_time = recovery_time
+        self._half_open_max_calls = half_open_max_calls
+        self._breakers = {}
+        self._rejected = 0
+
+    def _breaker(self, host: AnyStr) -> CircuitBreaker:
+        """Returns circuit breaker for host, expects lock to be held"""
+        breaker = self._breakers.get(host)
+        if breaker is None:
+            breaker = self._breakers[host] = CircuitBreaker(
+                self._failure_threshold, self._recovery_time, self._half_open_max_calls
+            )
+
+        return breaker
+
+    def allow(self, host: AnyStr) -> bool:
+        """Returns True if request to host may be sent otherwise False"""
+        with self._lock:
+            allowed = self._breaker(host).allow()
+            if not allowed:
+                self._rejected += 1
+
+        return allowed
+
+    def record_success(self, host: AnyStr):
+        """Records successful request to host"""
+        with self._lock:
+            self._breaker(host).record_success()
+
+    def record_failure(self, host: AnyStr):
+        """Records failed request to host"""
+        with self._lock:
+            self._breaker(host).record_failure()
+
+    def record_status(self, host: AnyStr, status_code: int):
+        """Records request to host as failed or successful by response status code"""
+        if status_code in FAILURE_STATUSES:
+            self.record_failure(host)
+        else:
+            self.record_success(host)
+
+    def state(self, host: AnyStr) -> CircuitState:
+        """Returns circuit state for host"""
+        with self._lock:
+            return self._breaker(host).state
+
+    @property
+    def rejected(self) -> int:
+        """Returns number of requests failed fast on open circuits"""
+        return self._rejected
+
+    @property
+    def states(self) -> Dict:
+        """Returns mapping of hosts to their circuit state and consecutive failures count"""
+        with self._lock:
+            return {
+                host: {"state": breaker.state.value, "failures": breaker.failures}
+                for host, breaker in self._breakers.items()
+            }
+
+
+class RetryBudget:
+    """Thread-safe cap on retries as a ratio of requests sent in a sliding time window"""
+
+    def __init__(
+        self,
+        ratio: float = RETRY_BUDGET_RATIO,
+        min_retries: int = RETRY_BUDGET_MIN_RETRIES,
+        window: int = RETRY_BUDGET_WINDOW,
+    ):
+        self._lock = Lock()
+        self._ratio = ratio
+        self._min_retries = min_retries
+        self._window = window
+        # Per second [timestamp, requests, retries] counters
+        self._buckets = deque()
+        self._requests = 0
+        self._retries = 0
+        self._exhausted = 0
+
+    def _bucket(self) -> list:
+        """Returns counters of current second, drops ones outside window, expects lock to be held"""
+        now = int(monotonic())
+        while self._buckets and self._buckets[0][0] <= now - self._window:
+            _, requests, retries = self._buckets.popleft()
+            self._requests -= requests
+            self._retries -= retries
+        if not self._buckets or self._buckets[-1][0] != now:
+            self._buckets.append([now, 0, 0])
+
+        return self._buckets[-1]
+
+    def record_request(self):
+        """Counts sent request"""
+        with self._lock:
+            self._bucket()[1] += 1
+            self._requests += 1
+
+    def try_retry(self) -> bool:
+        """Takes retry from budget, returns True if retry is allowed otherwise False"""
+        with self._lock:
+            bucket = self._bucket()
+            if self._retries >= max(self._min_retries, self._ratio * self._requests):
+                self._exhausted += 1
+                return False
+            bucket[2] += 1
+            self._retries += 1
+
+        return True
+
+    @property
+    def stats(self) -> Dict:
+        """Returns requests and retries counts in current window and number of denied retries"""
+        with self._lock:
+            self._bucket()
+            return {
+                "requests": self._requests,
+                "retries": self._retries,
+                "exhausted": self._exhausted,
+            }
+
+
+class BudgetRetry(Retry):
+    """urllib3 retry strategy that stops retrying when retry budget is exhausted"""
+
+    def __init__(self, *args, budget: RetryBudget = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.budget = budget
+
+    def new(self, **kwargs):
+        retry = super().new(**kwargs)
+        retry.budget = self.budget
+
+        return retry
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        retry = super().increment(method, url, response, error, _pool, _stacktrace)
+        if self.budget is not None and not self.budget.try_retry():
+            raise MaxRetryError(_pool, url, error or ResponseError("retry budget exhausted"))
+
+        return retry
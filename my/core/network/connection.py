@@ -0,0 +1,144 @@
+from functools import partial
+from http.client import HTTPMessage
+from socket import SOCK_STREAM, gaierror, getaddrinfo
+from time import perf_counter
+from typing import Any, AnyStr, Iterable, List, Optional, Tuple
+
+from requests.packages.urllib3.connection import HTTPConnection, HTTPSConnection
+from requests.packages.urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from requests.packages.urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from requests.packages.urllib3.poolmanager import PoolManager
+from requests.packages.urllib3.util.connection import allowed_gai_family
+
+
+def resolve(host: AnyStr, port: int) -> List[AnyStr]:
+    """Returns addresses host resolves to in resolver order, empty list if host can't be resolved"""
+    try:
+        addresses = getaddrinfo(host, port, allowed_gai_family(), SOCK_STREAM)
+    except (gaierror, UnicodeError):
+        return []
+
+    return list(dict.fromkeys(address[4][0] for address in addresses))
+
+
+class OriginalResponse:
+    """Stand-in for http.client response of urllib3 response not read from socket, exposes headers for requests
+    cookie extraction"""
+
+    def __init__(self, headers: Iterable[Tuple[AnyStr, AnyStr]]):
+        self.msg = HTTPMessage()
+        for name, value in headers:
+            self.msg[name] = value
+
+    def isclosed(self) -> bool:
+        return True
+
+    def close(self):
+        pass
+
+
+class TimedConnectionMixin:
+    """Resolves host name, with resolver cache if set, and opens socket as separately timed phases, timings of
+    the last connect are kept in timings attribute until consumed. Resolved addresses are tried in order until
+    one accepts connection like urllib3 does"""
+
+    resolver = None
+    timings = None
+    _connected_at = None
+
+    def _new_conn(self):
+        start_time = perf_counter()
+        dns_host = self._dns_host
+        if self.resolver is not None:
+            addresses = self.resolver.resolve_all(dns_host, self.port)
+        else:
+            addresses = resolve(dns_host, self.port)
+        resolved_time = perf_counter()
+        try:
+            conn = self._connect_any(addresses)
+        finally:
+            self._dns_host = dns_host
+        self._connected_at = perf_counter()
+        self.timings = {
+            "dns": resolved_time - start_time,
+            "connect": self._connected_at - resolved_time,
+            "tls": 0,
+        }
+
+        return conn
+
+    def _connect_any(self, addresses: List[AnyStr]):
+        """Returns socket connected to first address accepting connection, raises error of the last address,
+        connects to host name if no address is resolved so urllib3 reports resolution error"""
+        if not addresses:
+            return super()._new_conn()
+        error = None
+        for address in addresses:
+            self._dns_host = address
+            try:
+                return super()._new_conn()
+            except (ConnectTimeoutError, NewConnectionError) as e:
+                error = e
+
+        raise error
+
+
+class TimedHTTPConnection(TimedConnectionMixin, HTTPConnection):
+    """HTTP connection with timed connect phases"""
+
+    pass
+
+
+class TimedHTTPSConnection(TimedConnectionMixin, HTTPSConnection):
+    """HTTPS connection with timed connect and TLS handshake phases"""
+
+    def connect(self):
+        super().connect()
+        if self.timings is not None:
+            self.timings["tls"] = perf_counter() - self._connected_at
+
+
+class ResolverPoolMixin:
+    """Hands resolver to connections opened by pool"""
+
+    def __init__(self, *args, resolver=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.resolver = resolver
+
+    def _new_conn(self):
+        conn = super()._new_conn()
+        conn.resolver = self.resolver
+
+        return conn
+
+
+class TimedHTTPConnectionPool(ResolverPoolMixin, HTTPConnectionPool):
+    """HTTP connection pool of timed connections"""
+
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(ResolverPoolMixin, HTTPSConnectionPool):
+    """HTTPS connection pool of timed connections"""
+
+    ConnectionCls = TimedHTTPSConnection
+
+
+def instrument_pool_manager(manager: PoolManager, resolver: Optional[Any] = None) -> PoolManager:
+    """Makes pool manager open timed connections, resolving host names with resolver (DnsCache) if given"""
+    manager.pool_classes_by_scheme = {
+        "http": partial(TimedHTTPConnectionPool, resolver=resolver),
+        "https": partial(TimedHTTPSConnectionPool, resolver=resolver),
+    }
+
+    return manager
+
+
+def pop_connection_timings(connection: Optional[HTTPConnection]) -> dict:
+    """Returns connect phases timings of newly opened connection, zeros for reused or unknown connection"""
+    timings = getattr(connection, "timings", None)
+    if timings is None:
+        return {"dns": 0, "connect": 0, "tls": 0}
+    connection.timings = None
+
+    return timings
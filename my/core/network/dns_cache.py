@@ -0,0 +1,114 @@
+from socket import SOCK_STREAM, gaierror, getaddrinfo
+from threading import Lock
+from time import monotonic
+from typing import AnyStr, Dict, Iterable, List, Optional
+
+from requests.packages.urllib3.util.connection import allowed_gai_family
+
+DNS_TTL = 300
+DNS_NEGATIVE_TTL = 30
+DNS_CACHE_SIZE = 10000
+
+
+class DnsCache:
+    """Thread-safe host name resolver cache with TTL and negative caching"""
+
+    def __init__(
+        self,
+        ttl: float = DNS_TTL,
+        negative_ttl: float = DNS_NEGATIVE_TTL,
+        max_size: int = DNS_CACHE_SIZE,
+    ):
+        self._lock = Lock()
+        self._ttl = ttl
+        self._negative_ttl = negative_ttl
+        self._max_size = max_size
+        self._entries = {}
+
+        self._hits = 0
+        self._negative_hits = 0
+        self._misses = 0
+
+    @staticmethod
+    def _lookup(host: AnyStr, port: int, family: int) -> List[AnyStr]:
+        """Returns addresses host resolves to in resolver order"""
+        try:
+            addresses = getaddrinfo(host, port, family, SOCK_STREAM)
+        except (gaierror, UnicodeError):
+            return []
+
+        return list(dict.fromkeys(address[4][0] for address in addresses))
+
+    def resolve(self, host: AnyStr, port: int = 80) -> Optional[AnyStr]:
+        """Returns first cached or freshly resolved address for host, None if host can't be resolved"""
+        addresses = self.resolve_all(host, port)
+
+        return addresses[0] if addresses else None
+
+    def resolve_all(self, host: AnyStr, port: int = 80) -> List[AnyStr]:
+        """Returns cached or freshly resolved addresses for host, empty list if host can't be resolved"""
+        family = allowed_gai_family()
+        key = (host, family)
+        now = monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                if not entry[1]:
+                    self._negative_hits += 1
+                else:
+                    self._hits += 1
+                return list(entry[1])
+            self._misses += 1
+        addresses = self._lookup(host, port, family)
+        ttl = self._ttl if addresses else self._negative_ttl
+        with self._lock:
+            if len(self._entries) >= self._max_size and key not in self._entries:
+                self._purge(now)
+            self._entries[key] = (now + ttl, tuple(addresses))
+
+        return addresses
+
+    def _purge(self, now: float):
+        """Removes expired entries or oldest half of entries if none expired, expects lock to be held"""
+        expired = [key for key, (expires, _) in self._entries.items() if expires <= now]
+        if not expired:
+            expired = list(self._entries)[: len(self._entries) // 2 + 1]
+        for key in expired:
+            del self._entries[key]
+
+    def prewarm(self, hosts: Iterable[AnyStr], port: int = 80) -> int:
+        """Resolves hosts ahead of use, returns number of resolved hosts"""
+        return sum(1 for host in hosts if self.resolve_all(host, port))
+
+    def clear(self):
+        """Removes all cached entries"""
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def hits(self) -> int:
+        """Returns number of lookups served from cache"""
+        return self._hits + self._negative_hits
+
+    @property
+    def misses(self) -> int:
+        """Returns number of lookups sent to system resolver"""
+        return self._misses
+
+    @property
+    def hit_ratio(self) -> float:
+        """Returns ratio of lookups served from cache"""
+        total = self.hits + self._misses
+
+        return self.hits / total if total else 0.0
+
+    @property
+    def stats(self) -> Dict:
+        """Returns cache counters"""
+        return {
+            "hits": self._hits,
+            "negative_hits": self._negative_hits,
+            "misses": self._misses,
+            "hit_ratio": self.hit_ratio,
+            "entries": len(self._entries),
+        }
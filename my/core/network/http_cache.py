@@ -0,0 +1,315 @@
+from collections import OrderedDict
+from hashlib import sha1
+from json import dump, load
+from os import listdir, makedirs, remove, replace, utime
+from os.path import getmtime, isdir, join
+from re import search
+from threading import Lock
+from time import time
+from typing import AnyStr, Dict, Optional
+
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+
+CACHE_MAX_SIZE = 256 * 1024 * 1024
+# Headers describing the transferred representation, cached bodies are stored decoded
+SKIP_HEADERS = ("content-encoding", "content-length", "transfer-encoding")
+
+
+class CacheEntry:
+    """Cached HTTP response metadata"""
+
+    def __init__(self, key: AnyStr, meta: Dict):
+        self.key = key
+        self.meta = meta
+
+    @property
+    def size(self) -> int:
+        """Returns cached body size in bytes"""
+        return self.meta["size"]
+
+    @property
+    def age(self) -> float:
+        """Returns entry age in seconds"""
+        return time() - self.meta["stored_at"]
+
+    @property
+    def headers(self) -> CaseInsensitiveDict:
+        """Returns cached response headers"""
+        return CaseInsensitiveDict(self.meta["headers"])
+
+    @property
+    def etag(self) -> Optional[AnyStr]:
+        """Returns entity tag validator"""
+        return self.headers.get("ETag")
+
+    @property
+    def last_modified(self) -> Optional[AnyStr]:
+        """Returns last modified validator"""
+        return self.headers.get("Last-Modified")
+
+    def has_validators(self) -> bool:
+        """Returns True if entry can be conditionally revalidated otherwise False"""
+        return self.etag is not None or self.last_modified is not None
+
+
+class HttpCache:
+    """On-disk HTTP response cache keyed by method, URL and varying request headers, with LRU eviction"""
+
+    def __init__(self, cache_dir: AnyStr, max_size: int = CACHE_MAX_SIZE, ttl: Optional[float] = None):
+        self._cache_dir = cache_dir
+        self._max_size = max_size
+        self._ttl = ttl
+        self._lock = Lock()
+        self._entries = OrderedDict()
+        self._vary = {}
+        self._size = 0
+
+        self._hits = 0
+        self._misses = 0
+        self._revalidations = 0
+        self._bytes_saved = 0
+
+        if not isdir(cache_dir):
+            makedirs(cache_dir)
+        self._load_index()
+
+    def _load_index(self):
+        """Rebuilds LRU index from cached entries metadata, least recently used first"""
+        entries = []
+        for file_name in listdir(self._cache_dir):
+            if not file_name.endswith(".json"):
+                continue
+            file_path = join(self._cache_dir, file_name)
+            try:
+                with open(file_path, "r") as f:
+                    meta = load(f)
+                entries.append((getmtime(file_path), CacheEntry(file_name[:-5], meta)))
+            except (OSError, ValueError):
+                continue
+        for _, entry in sorted(entries, key=lambda x: x[0]):
+            self._entries[entry.key] = entry
+            self._vary[entry.meta["primary_key"]] = entry.meta["vary"]
+            self._size += entry.size
+
+    @staticmethod
+    def _primary_key(method: AnyStr, url: AnyStr) -> AnyStr:
+        """Returns cache key for method and URL pair"""
+        return sha1(f"{method.upper()} {url}".encode()).hexdigest()
+
+    @staticmethod
+    def _key(primary_key: AnyStr, vary: Dict) -> AnyStr:
+        """Returns cache key for method and URL pair plus varying request headers values"""
+        if not vary:
+            return primary_key
+        text = "\n".join(f"{name.lower()}:{vary[name]}" for name in sorted(vary))
+
+        return sha1(f"{primary_key}\n{text}".encode()).hexdigest()
+
+    @staticmethod
+    def _vary_values(names: list, headers: Dict) -> Dict:
+        """Returns values of varying request headers"""
+        headers = CaseInsensitiveDict(headers or {})
+
+        return {name: headers.get(name, "") for name in names}
+
+    def _path(self, key: AnyStr, extension: AnyStr) -> AnyStr:
+        """Returns cache file path for entry key"""
+        return join(self._cache_dir, f"{key}.{extension}")
+
+    def _write_meta(self, entry: CacheEntry):
+        """Writes entry metadata file atomically"""
+        temp_path = self._path(entry.key, "json.tmp")
+        with open(temp_path, "w") as f:
+            dump(entry.meta, f)
+        replace(temp_path, self._path(entry.key, "json"))
+
+    def _remove(self, key: AnyStr):
+        """Removes entry from index and disk"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._size -= entry.size
+        for extension in ("json", "body"):
+            try:
+                remove(self._path(key, extension))
+            except OSError:
+                pass
+
+    def _evict(self):
+        """Removes least recently used entries until cache fits into size limit"""
+        while self._size > self._max_size and self._entries:
+            key = next(iter(self._entries))
+            self._remove(key)
+
+    def lookup(self, method: AnyStr, url: AnyStr, headers: Optional[Dict] = None) -> Optional[CacheEntry]:
+        """Returns cached entry for given request otherwise None"""
+        primary_key = self._primary_key(method, url)
+        with self._lock:
+            names = self._vary.get(primary_key)
+            if names is None:
+                return None
+            key = self._key(primary_key, self._vary_values(names, headers))
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+        try:
+            utime(self._path(key, "json"))
+        except OSError:
+            pass
+
+        return entry
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """Returns True if entry can be served without revalidation otherwise False"""
+        cache_control = entry.headers.get("Cache-Control", "")
+        if "no-cache" in cache_control:
+            return False
+        match = search(r"max-age=(\d+)", cache_control)
+        if match:
+            return entry.age < int(match.group(1))
+        if self._ttl is not None and not entry.has_validators():
+            return entry.age < self._ttl
+
+        return False
+
+    def conditional_headers(self, entry: CacheEntry) -> Dict:
+        """Returns conditional request headers for revalidating entry"""
+        headers = {}
+        if entry.etag is not None:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified is not None:
+            headers["If-Modified-Since"] = entry.last_modified
+
+        return headers
+
+    def response(self, entry: CacheEntry) -> Optional[Response]:
+        """Returns response instance built from cached entry and counts a hit, None if body is gone"""
+        try:
+            with open(self._path(entry.key, "body"), "rb") as f:
+                content = f.read()
+        except OSError:
+            with self._lock:
+                self._remove(entry.key)
+            return None
+        with self._lock:
+            self._hits += 1
+            self._bytes_saved += entry.size
+        response = Response()
+        response.status_code = entry.meta["status_code"]
+        response.reason = entry.meta["reason"]
+        response.url = entry.meta["url"]
+        response.headers = entry.headers
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = content
+        response.from_cache = True
+
+        return response
+
+    def revalidated(self, entry: CacheEntry, response: Response) -> Optional[Response]:
+        """Refreshes entry after "304 Not Modified" response and returns cached response"""
+        with self._lock:
+            self._revalidations += 1
+            headers = entry.headers
+            for name, value in response.headers.items():
+                if name.lower() not in SKIP_HEADERS:
+                    headers[name] = value
+            entry.meta["headers"] = dict(headers)
+            entry.meta["stored_at"] = time()
+            self._write_meta(entry)
+
+        return self.response(entry)
+
+    def store(self, method: AnyStr, url: AnyStr, headers: Optional[Dict], response: Response) -> bool:
+        """Stores response fetched from network to cache and counts a miss, returns True if response was
+        cacheable otherwise False"""
+        with self._lock:
+            self._misses += 1
+        cache_control = response.headers.get("Cache-Control", "")
+        vary = response.headers.get("Vary", "")
+        if response.status_code != 200 or "no-store" in cache_control or vary.strip() == "*":
+            return False
+        if getattr(response, "truncated", False):
+            return False
+        has_validators = "ETag" in response.headers or "Last-Modified" in response.headers
+        if not has_validators and self._ttl is None and "max-age" not in cache_control:
+            return False
+        content = response.content
+        if len(content) > self._max_size:
+            return False
+        names = [name.strip() for name in vary.split(",") if name.strip()]
+        primary_key = self._primary_key(method, url)
+        key = self._key(primary_key, self._vary_values(names, headers))
+        entry = CacheEntry(
+            key,
+            {
+                "primary_key": primary_key,
+                "vary": names,
+                "url": response.url or url,
+                "status_code": response.status_code,
+                "reason": response.reason,
+                "headers": {k: v for k, v in response.headers.items() if k.lower() not in SKIP_HEADERS},
+                "stored_at": time(),
+                "size": len(content),
+            },
+        )
+        with self._lock:
+            self._remove(key)
+            temp_path = self._path(key, "body.tmp")
+            with open(temp_path, "wb") as f:
+                f.write(content)
+            replace(temp_path, self._path(key, "body"))
+            self._write_meta(entry)
+            self._entries[key] = entry
+            self._vary[primary_key] = names
+            self._size += entry.size
+            self._evict()
+
+        return True
+
+    def clear(self):
+        """Removes all cached entries"""
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+            self._vary.clear()
+
+    @property
+    def size(self) -> int:
+        """Returns total size of cached bodies in bytes"""
+        return self._size
+
+    @property
+    def hits(self) -> int:
+        """Returns number of responses served from cache"""
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        """Returns number of responses fetched from network"""
+        return self._misses
+
+    @property
+    def revalidations(self) -> int:
+        """Returns number of entries revalidated with "304 Not Modified" response"""
+        return self._revalidations
+
+    @property
+    def bytes_saved(self) -> int:
+        """Returns number of body bytes served from cache instead of network"""
+        return self._bytes_saved
+
+    @property
+    def stats(self) -> Dict:
+        """Returns cache counters"""
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "revalidations": self._revalidations,
+            "bytes_saved": self._bytes_saved,
+            "entries": len(self._entries),
+            "size": self._size,
+        }
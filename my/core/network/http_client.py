@@ -1,35 +1,146 @@
-from typing import Any, AnyStr, Callable, Optional
-
-from requests import Response, Session
+from collections import Counter, OrderedDict, deque
+from copy import copy
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from hashlib import new as new_hash
+from os import PathLike
+from os.path import getsize, isfile
+from threading import Event, Lock
+from time import monotonic, perf_counter, sleep
+from typing import Any, AnyStr, BinaryIO, Callable, Iterable, Optional, Tuple, Type, Union
+from urllib.parse import urlparse
+
+from requests import Request, Response, Session
+from requests.exceptions import ChunkedEncodingError, ConnectionError, RequestException, Timeout
 from requests.cookies import RequestsCookieJar
-from requests.adapters import HTTPAdapter
-from requests.packages.urllib3.util.retry import Retry
+from requests.adapters import BaseAdapter, HTTPAdapter
 
 try:
     from libs.my.core.defaults import USER_AGENT, TIMEOUT, RETRIES, HEADERS
+    from libs.my.core.network.circuit_breaker import BudgetRetry, CircuitOpenError, HostCircuitBreakers, RetryBudget
+    from libs.my.core.network.connection import instrument_pool_manager, pop_connection_timings
+    from libs.my.core.network.dns_cache import DnsCache
+    from libs.my.core.network.http_cache import HttpCache
     from libs.my.core.network.proxy import Proxy
+    from libs.my.core.network.rate_limiter import RateLimiter, THROTTLE_STATUSES
+    from libs.my.core.network.response_body import accept_encoding, read_body
+    from libs.my.core.network.single_flight import SingleFlight, coalesce_key
+    from libs.my.core.network.timing import TimingRecorder
 except ModuleNotFoundError:
     from core.defaults import USER_AGENT, TIMEOUT, RETRIES, HEADERS
+    from core.network.circuit_breaker import BudgetRetry, CircuitOpenError, HostCircuitBreakers, RetryBudget
+    from core.network.connection import instrument_pool_manager, pop_connection_timings
+    from core.network.dns_cache import DnsCache
+    from core.network.http_cache import HttpCache
     from core.network.proxy import Proxy
+    from core.network.rate_limiter import RateLimiter, THROTTLE_STATUSES
+    from core.network.response_body import accept_encoding, read_body
+    from core.network.single_flight import SingleFlight, coalesce_key
+    from core.network.timing import TimingRecorder
+
+
+RETRY_STATUSES = [413, 429, 500, 502, 503, 504]
+RETRY_METHODS = ["HEAD", "GET", "OPTIONS"]
+BACKOFF_FACTOR = 2
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+PROXY_POOLS_COUNT = 32
+# Response statuses reported to proxy feedback as failures, proxy was refused, blocked, throttled or upstream failed
+PROXY_FAILURE_STATUSES = (403, 407, 429, 502, 503, 504)
+# Request arguments shaping request beyond its URL and headers, requests with them bypass cache
+CACHE_BYPASS_KWARGS = ("data", "json", "files", "auth", "cookies")
+# Shortest timeout of requests dispatched by get_many right before its deadline
+DEADLINE_MIN_TIMEOUT = 0.01
+
+
+def prepared_url(url: AnyStr, params: Any = None) -> AnyStr:
+    """Returns URL with query parameters as requests sends it"""
+    if not params:
+        return url
+
+    return Request("GET", url, params=params).prepare().url
+
+
+class HttpClientError(Exception):
+    """HTTP client base error"""
+
+    pass
+
+
+class DownloadError(HttpClientError):
+    """Raised when download can't be completed or verified"""
+
+    pass
 
 
 class TimeoutHTTPAdapter(HTTPAdapter):
-    """Request library timeout HTTP adapter"""
+    """Request library timeout HTTP adapter, keeps connection pools of recently used proxies"""
 
     def __init__(self, *args, **kwargs):
         self.timeout = TIMEOUT
         if "timeout" in kwargs:
             self.timeout = kwargs["timeout"]
             del kwargs["timeout"]
+        self.max_proxies = kwargs.pop("max_proxies", PROXY_POOLS_COUNT)
+        self.instrumented = kwargs.pop("instrumented", False)
+        self.resolver = kwargs.pop("resolver", None)
+        self._proxy_lock = Lock()
         super().__init__(*args, **kwargs)
+        self.proxy_manager = OrderedDict()
+
+    def init_poolmanager(self, *args, **kwargs):
+        """Creates pool manager, with timed connections if adapter is instrumented or has resolver"""
+        super().init_poolmanager(*args, **kwargs)
+        if self.instrumented or self.resolver is not None:
+            instrument_pool_manager(self.poolmanager, self.resolver)
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        """Returns connection pool manager for proxy URL, closes least recently used ones over the limit"""
+        with self._proxy_lock:
+            manager = self.proxy_manager.get(proxy)
+            if manager is not None:
+                self.proxy_manager.move_to_end(proxy)
+                return manager
+            manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+            if self.instrumented or self.resolver is not None:
+                instrument_pool_manager(manager, self.resolver)
+            while len(self.proxy_manager) > self.max_proxies:
+                _, evicted_manager = self.proxy_manager.popitem(last=False)
+                evicted_manager.clear()
+
+        return manager
 
     def send(self, request, **kwargs):
         """Sets request timeout value"""
         timeout = kwargs.get("timeout")
         if timeout is None:
             kwargs["timeout"] = self.timeout
-
-        return super().send(request, **kwargs)
+        if not self.instrumented:
+            return super().send(request, **kwargs)
+        start_time = perf_counter()
+        response = super().send(request, **kwargs)
+        received_time = perf_counter()
+        timings = pop_connection_timings(getattr(response.raw, "_connection", None))
+        timings["ttfb"] = max(
+            0, received_time - start_time - timings["dns"] - timings["connect"] - timings["tls"]
+        )
+        timings["received_at"] = received_time
+        response.timings = timings
+
+        return response
+
+    def resize_pool(self, pool_size: int):
+        """Grows connection pool so it can keep at least pool_size connections per host"""
+        if pool_size <= self._pool_maxsize:
+            return
+        self._pool_connections = max(self._pool_connections, pool_size)
+        self._pool_maxsize = pool_size
+        self.poolmanager.clear()
+        self.init_poolmanager(
+            self._pool_connections, self._pool_maxsize, block=self._pool_block
+        )
+        with self._proxy_lock:
+            for manager in self.proxy_manager.values():
+                manager.clear()
+            self.proxy_manager.clear()
 
 
 class HttpClient:
@@ -44,10 +155,21 @@ class HttpClient:
         self._proxy = None
         self._referrer_url = None
         self._timeout_adapter = None
+        self._adapter_class = TimeoutHTTPAdapter
+        self._archive = None
+        self._cache = None
+        self._rate_limiter = None
+        self._timing_recorder = None
+        self._dns_cache = None
+        self._max_body_bytes = None
+        self._circuit_breakers = None
+        self._retry_budget = None
+        self._single_flight = None
+        self._proxy_feedback = None
+        self._logging_callback = logging_callback
 
         if logging_callback is not None:
             self._session.hooks["response"] = [self._logging_hook]
-            self._logging_callback = logging_callback
 
     def __enter__(self):
         self._session.__enter__()
@@ -58,16 +180,29 @@ class HttpClient:
         self._session.__exit__(self, type, value, traceback)
 
     def _init(self):
-        self._retry_strategy = Retry(
+        status_forcelist = RETRY_STATUSES
+        if self._rate_limiter is not None:
+            # Throttling responses are handled by rate limiter without blocking other hosts
+            status_forcelist = [x for x in RETRY_STATUSES if x not in THROTTLE_STATUSES]
+        self._retry_strategy = BudgetRetry(
             total=self.retries,
-            status_forcelist=[413, 429, 500, 502, 503, 504],
-            method_whitelist=["HEAD", "GET", "OPTIONS"],
-            backoff_factor=2,
+            status_forcelist=status_forcelist,
+            method_whitelist=RETRY_METHODS,
+            backoff_factor=BACKOFF_FACTOR,
+            respect_retry_after_header=self._rate_limiter is None,
+            budget=self._retry_budget,
         )
 
-        self._timeout_adapter = TimeoutHTTPAdapter(
-            timeout=5, max_retries=self._retry_strategy
+        kwargs = {"archive": self._archive} if self._archive is not None else {}
+        self._timeout_adapter = self._adapter_class(
+            timeout=5,
+            max_retries=self._retry_strategy,
+            instrumented=self._timing_recorder is not None,
+            resolver=self._dns_cache,
+            **kwargs,
         )
+        # Archive of recording adapter is kept so recording continues when adapter is recreated
+        self._archive = getattr(self._timeout_adapter, "archive", self._archive)
         self._session.mount("https://", self._timeout_adapter)
         self._session.mount("http://", self._timeout_adapter)
 
@@ -121,6 +256,128 @@ class HttpClient:
         """Sets current referrer URL"""
         self._referrer_url = referrer_url
 
+    @property
+    def adapter_class(self) -> Type[BaseAdapter]:
+        """Returns transport adapter class"""
+        return self._adapter_class
+
+    @adapter_class.setter
+    def adapter_class(self, adapter_class: Type[BaseAdapter]):
+        """Sets transport adapter class taking TimeoutHTTPAdapter keyword arguments and having resize_pool method,
+        e.g. HTTP2Adapter to multiplex requests over HTTP/2 connections"""
+        self._adapter_class = adapter_class
+        self._timeout_adapter = None
+
+    @property
+    def archive(self) -> Optional[Any]:
+        """Returns HTTP archive (HttpArchive) of recording or replay adapter"""
+        return self._archive
+
+    @archive.setter
+    def archive(self, archive: Optional[Any]):
+        """Sets HTTP archive handed to adapter class, e.g. RecordingAdapter records to it and ReplayAdapter serves
+        its exchanges, None lets recording adapter start new archive"""
+        self._archive = archive
+        self._timeout_adapter = None
+
+    @property
+    def cache(self) -> Optional[HttpCache]:
+        """Returns HTTP response cache"""
+        return self._cache
+
+    @cache.setter
+    def cache(self, cache: Optional[HttpCache]):
+        """Sets HTTP response cache, None disables caching"""
+        self._cache = cache
+
+    @property
+    def rate_limiter(self) -> Optional[RateLimiter]:
+        """Returns rate limiter"""
+        return self._rate_limiter
+
+    @rate_limiter.setter
+    def rate_limiter(self, rate_limiter: Optional[RateLimiter]):
+        """Sets rate limiter consulted before each request, None disables rate limiting"""
+        self._rate_limiter = rate_limiter
+        self._timeout_adapter = None
+
+    @property
+    def timing_recorder(self) -> Optional[TimingRecorder]:
+        """Returns request timing recorder"""
+        return self._timing_recorder
+
+    @timing_recorder.setter
+    def timing_recorder(self, timing_recorder: Optional[TimingRecorder]):
+        """Sets recorder of request phase timings, None disables timing"""
+        self._timing_recorder = timing_recorder
+        self._timeout_adapter = None
+
+    @property
+    def dns_cache(self) -> Optional[DnsCache]:
+        """Returns DNS resolver cache"""
+        return self._dns_cache
+
+    @dns_cache.setter
+    def dns_cache(self, dns_cache: Optional[DnsCache]):
+        """Sets DNS resolver cache used for new connections, None uses system resolver for every connection"""
+        self._dns_cache = dns_cache
+        self._timeout_adapter = None
+
+    @property
+    def max_body_bytes(self) -> Optional[int]:
+        """Returns response body size limit"""
+        return self._max_body_bytes
+
+    @max_body_bytes.setter
+    def max_body_bytes(self, max_body_bytes: Optional[int]):
+        """Sets response body size limit, bodies are then read and decompressed in chunks and request fails early
+        once limit is exceeded, None disables limit"""
+        self._max_body_bytes = max_body_bytes
+
+    @property
+    def circuit_breakers(self) -> Optional[HostCircuitBreakers]:
+        """Returns per host circuit breakers"""
+        return self._circuit_breakers
+
+    @circuit_breakers.setter
+    def circuit_breakers(self, circuit_breakers: Optional[HostCircuitBreakers]):
+        """Sets per host circuit breakers, requests to hosts with open circuit fail fast, None disables them"""
+        self._circuit_breakers = circuit_breakers
+
+    @property
+    def retry_budget(self) -> Optional[RetryBudget]:
+        """Returns retry budget"""
+        return self._retry_budget
+
+    @retry_budget.setter
+    def retry_budget(self, retry_budget: Optional[RetryBudget]):
+        """Sets retry budget shared by all requests, None allows every request to retry up to retries count"""
+        self._retry_budget = retry_budget
+        self._timeout_adapter = None
+
+    @property
+    def single_flight(self) -> Optional[SingleFlight]:
+        """Returns in-flight requests coalescer"""
+        return self._single_flight
+
+    @single_flight.setter
+    def single_flight(self, single_flight: Optional[SingleFlight]):
+        """Sets in-flight requests coalescer, concurrent identical GET requests sent with the same session are sent
+        once, requests of other clients sharing it aren't coalesced as their cookies differ, None disables
+        coalescing"""
+        self._single_flight = single_flight
+
+    @property
+    def proxy_feedback(self) -> Optional[Callable[[Proxy, bool, Optional[float]], Any]]:
+        """Returns proxy outcome callback"""
+        return self._proxy_feedback
+
+    @proxy_feedback.setter
+    def proxy_feedback(self, proxy_feedback: Optional[Callable[[Proxy, bool, Optional[float]], Any]]):
+        """Sets callback called with current proxy, success flag and latency in seconds after every request sent
+        through proxy, e.g. ProxyPool.report"""
+        self._proxy_feedback = proxy_feedback
+
     @property
     def cookies(self) -> RequestsCookieJar:
         """Returns cookie jar"""
@@ -135,13 +392,7 @@ class HttpClient:
         if "headers" not in kwargs:
             kwargs["headers"] = self._headers
         if "proxies" not in kwargs and self._proxy is not None:
-            auth = ""
-            if all((self.proxy.username, self.proxy.password)):
-                auth = f"{self.proxy.username}:{self.proxy.password}@"
-            kwargs["proxies"] = {
-                "http": f"http://{auth}{self._proxy.ip}:{self._proxy.port}/",
-                "https": f"https://{auth}{self._proxy.ip}:{self._proxy.port}/",
-            }
+            kwargs["proxies"] = self._proxy.proxies
         if "timeout" not in kwargs:
             kwargs["timeout"] = self.timeout
         if "referrer_url" in kwargs:
@@ -151,10 +402,137 @@ class HttpClient:
         return kwargs
 
     def get(self, url: AnyStr, **kwargs: Any) -> Response:
-        """Performs GET request and returns response instance"""
+        """Performs GET request and returns response instance. Body is read in bounded chunks if body size limit
+        is set or stop_when predicate is given, predicate is called with body read so far and stops reading
+        when it returns True"""
+        stop_when = kwargs.pop("stop_when", None)
         kwargs = self._process_kwargs(kwargs)
-
-        return self._session.get(url, **kwargs)
+        stream = kwargs.get("stream", False)
+        if not stream and (self._max_body_bytes is not None or stop_when is not None):
+            kwargs["stream"] = True
+            kwargs["body_limits"] = (self._max_body_bytes, stop_when)
+            kwargs["headers"] = dict(kwargs["headers"], **{"Accept-Encoding": accept_encoding()})
+        if (
+            self._single_flight is None
+            or stream
+            or stop_when is not None
+            or any(kwargs.get(name) for name in CACHE_BYPASS_KWARGS)
+        ):
+            return self._get(url, kwargs, stream)
+        key = coalesce_key(
+            prepared_url(url, kwargs.get("params")), kwargs["headers"], kwargs.get("proxies"), id(self._session)
+        )
+        response, shared = self._single_flight.do(key, lambda: self._get(url, kwargs, stream))
+        if not shared:
+            return response
+        # Every caller gets its own response instance, body bytes are shared
+        response = copy(response)
+        response.headers = response.headers.copy()
+
+        return response
+
+    def _get(self, url: AnyStr, kwargs: Any, stream: bool) -> Response:
+        """Performs GET request through cache if set, requests with body, auth or cookies aren't cached"""
+        if self._cache is not None and not stream and not any(kwargs.get(name) for name in CACHE_BYPASS_KWARGS):
+            return self._cached_get(url, kwargs)
+
+        return self._send(url, kwargs)
+
+    def _send(self, url: AnyStr, kwargs: Any) -> Response:
+        """Sends GET request, waits for rate limiter and retries throttled requests if rate limiter is set"""
+        acquired = kwargs.pop("rate_limit_acquired", False)
+        kwargs = dict(kwargs)
+        body_limits = kwargs.pop("body_limits", None)
+        if self._rate_limiter is None:
+            return self._session_get(url, kwargs, body_limits)
+        host = urlparse(url).netloc
+        proxy = self._proxy_string()
+        retries = self.retries
+        while True:
+            if not acquired:
+                self._rate_limiter.acquire(host, proxy)
+            acquired = False
+            response = self._session_get(url, kwargs, body_limits)
+            if not self._rate_limiter.update(host, response) or retries <= 0:
+                return response
+            retries -= 1
+            response.close()
+
+    def _session_get(self, url: AnyStr, kwargs: Any, body_limits: Optional[Tuple] = None) -> Response:
+        """Sends GET request through session, reads body with size limit and stop predicate if given. Fails fast
+        if host circuit is open, records request outcome to circuit breakers, retry budget and timing recorder
+        if they are set"""
+        host = urlparse(url).netloc
+        if self._circuit_breakers is not None and not self._circuit_breakers.allow(host):
+            raise CircuitOpenError(f"Circuit for {host} is open")
+        if self._retry_budget is not None:
+            self._retry_budget.record_request()
+        start_time = perf_counter()
+        try:
+            response = self._read_body(self._session.get(url, **kwargs), body_limits)
+        except BaseException as e:
+            # Every allowed call records outcome so half-open probe slots are released, errors raised after
+            # host answered (body limits, decoding) count as success
+            if self._circuit_breakers is not None:
+                if isinstance(e, RequestException):
+                    self._circuit_breakers.record_failure(host)
+                else:
+                    self._circuit_breakers.record_success(host)
+            if self._proxy_feedback is not None and self._proxy is not None and isinstance(e, RequestException):
+                self._proxy_feedback(self._proxy, False, None)
+            if self._timing_recorder is not None:
+                self._timing_recorder.record({"total": perf_counter() - start_time}, host, self._proxy_string())
+            raise
+        if self._circuit_breakers is not None:
+            self._circuit_breakers.record_status(host, response.status_code)
+        if self._proxy_feedback is not None and self._proxy is not None:
+            self._proxy_feedback(
+                self._proxy, response.status_code not in PROXY_FAILURE_STATUSES, perf_counter() - start_time
+            )
+        if self._timing_recorder is not None:
+            end_time = perf_counter()
+            timings = dict(getattr(response, "timings", {}))
+            timings["transfer"] = end_time - timings.pop("received_at", end_time)
+            timings["total"] = end_time - start_time
+            self._timing_recorder.record(timings, host, self._proxy_string(), response.status_code)
+
+        return response
+
+    def _proxy_string(self) -> Optional[AnyStr]:
+        """Returns current proxy host and port or None, proxy credentials are left out of timing and rate limiter
+        tags"""
+        return f"{self._proxy.host}:{self._proxy.port}" if self._proxy is not None else None
+
+    @staticmethod
+    def _read_body(response: Response, body_limits: Optional[Tuple]) -> Response:
+        """Reads streamed response body with size limit and stop predicate"""
+        if body_limits is not None:
+            read_body(response, *body_limits)
+
+        return response
+
+    def _cached_get(self, url: AnyStr, kwargs: Any) -> Response:
+        """Serves GET request from cache, revalidates stale cache entries, entries are keyed by URL with query
+        parameters"""
+        headers = kwargs["headers"]
+        cache_url = prepared_url(url, kwargs.get("params"))
+        entry = self._cache.lookup("GET", cache_url, headers)
+        if entry is not None:
+            if self._cache.is_fresh(entry):
+                response = self._cache.response(entry)
+                if response is not None:
+                    return response
+            kwargs["headers"] = dict(headers, **self._cache.conditional_headers(entry))
+        response = self._send(url, kwargs)
+        if entry is not None and response.status_code == 304:
+            cached_response = self._cache.revalidated(entry, response)
+            if cached_response is not None:
+                return cached_response
+            kwargs["headers"] = headers
+            response = self._send(url, kwargs)
+        self._cache.store("GET", cache_url, headers, response)
+
+        return response
 
     def try_get(self, url: AnyStr, **kwargs: Any) -> Optional[Response]:
         """Tries to perform GET request, returns response instance on success otherwise None"""
@@ -163,6 +541,229 @@ class HttpClient:
         except Exception as e:
             return None
 
+    def download(
+        self,
+        url: AnyStr,
+        path_or_fileobj: Union[AnyStr, PathLike, BinaryIO],
+        chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+        checksum: Optional[AnyStr] = None,
+        hash_name: AnyStr = "sha256",
+        **kwargs: Any,
+    ) -> int:
+        """Streams response body to file path or binary file object and returns downloaded size. Partial file at
+        given path is resumed with Range request, interrupted transfers are resumed up to retries count. Raises
+        DownloadError if transfer fails or size or checksum doesn't match"""
+        kwargs = self._process_kwargs(kwargs)
+        kwargs["stream"] = True
+        # Byte ranges and lengths refer to unencoded body
+        kwargs["headers"] = dict(kwargs["headers"], **{"Accept-Encoding": "identity"})
+        is_path = isinstance(path_or_fileobj, (str, bytes, PathLike))
+        hasher = new_hash(hash_name) if checksum is not None else None
+        offset = 0
+        if is_path:
+            if isfile(path_or_fileobj):
+                offset = getsize(path_or_fileobj)
+            f = open(path_or_fileobj, "ab")
+        else:
+            f = path_or_fileobj
+        start_position = f.tell() - offset if f.seekable() else None
+        try:
+            if hasher is not None and offset > 0:
+                with open(path_or_fileobj, "rb") as existing:
+                    for chunk in iter(lambda: existing.read(chunk_size), b""):
+                        hasher.update(chunk)
+            total, hasher = self._download(url, f, offset, start_position, chunk_size, hasher, kwargs)
+        finally:
+            if is_path:
+                f.close()
+        if hasher is not None and hasher.hexdigest().lower() != checksum.lower():
+            raise DownloadError(f"Checksum mismatch for {url}")
+
+        return total
+
+    def _download(
+        self,
+        url: AnyStr,
+        f: BinaryIO,
+        offset: int,
+        start_position: Optional[int],
+        chunk_size: int,
+        hasher: Any,
+        kwargs: Any,
+    ) -> Tuple[int, Any]:
+        """Writes response body to file object starting at offset, resumes on connection errors, returns pair of
+        downloaded size and body hash"""
+        headers = kwargs["headers"]
+        size = offset
+        total = None
+        attempt = 0
+        while True:
+            if size > 0:
+                kwargs["headers"] = dict(headers, Range=f"bytes={size}-")
+            try:
+                with self._send(url, dict(kwargs)) as response:
+                    if response.status_code == 416 and size > 0:
+                        # Requested range starts at the end, file is already complete
+                        content_range = response.headers.get("Content-Range", "")
+                        total = int(content_range.split("/")[-1]) if content_range[-1:].isdigit() else size
+                        break
+                    response.raise_for_status()
+                    if size > 0 and response.status_code != 206:
+                        # Server ignored range, start over
+                        if start_position is None:
+                            raise DownloadError(f"Can't restart download of {url} on unseekable file object")
+                        f.seek(start_position)
+                        f.truncate()
+                        size = 0
+                        if hasher is not None:
+                            hasher = new_hash(hasher.name)
+                    content_range = response.headers.get("Content-Range", "")
+                    if content_range[-1:].isdigit():
+                        total = int(content_range.split("/")[-1])
+                    elif response.headers.get("Content-Length", "").isdigit():
+                        total = size + int(response.headers["Content-Length"])
+                    for chunk in response.iter_content(chunk_size):
+                        f.write(chunk)
+                        size += len(chunk)
+                        if hasher is not None:
+                            hasher.update(chunk)
+                        if self._logging_callback is not None:
+                            self._logging_callback(response, downloaded=size, total=total)
+                break
+            except (ChunkedEncodingError, ConnectionError, Timeout) as e:
+                attempt += 1
+                if attempt > self.retries:
+                    raise DownloadError(f"Failed to download {url}: {e}") from e
+                f.flush()
+        if total is not None and size != total:
+            raise DownloadError(f"Size mismatch for {url}, expected {total} bytes, got {size}")
+
+        return size, hasher
+
+    def _try_get_result(self, url: AnyStr, **kwargs: Any) -> Tuple[Optional[Response], Optional[Exception]]:
+        """Performs GET request and returns pair of response and None on success otherwise None and error"""
+        try:
+            return self.get(url, **kwargs), None
+        except Exception as e:
+            return None, e
+
+    @staticmethod
+    def _deadline_timeout(timeout: Any, end_time: float) -> Any:
+        """Returns request timeout, or connect and read timeouts pair, capped by time left until end time"""
+        remaining = max(end_time - monotonic(), DEADLINE_MIN_TIMEOUT)
+        if isinstance(timeout, tuple):
+            return tuple(min(x, remaining) if x is not None else remaining for x in timeout)
+
+        return min(timeout, remaining) if timeout is not None else remaining
+
+    def get_many(
+        self,
+        urls: Iterable[AnyStr],
+        concurrency: int = 10,
+        per_host_limit: int = 2,
+        ordered: bool = False,
+        deadline: Optional[float] = None,
+        cancel_event: Optional[Event] = None,
+        **kwargs: Any,
+    ) -> Iterable[Tuple[AnyStr, Optional[Response], Optional[Exception]]]:
+        """Performs concurrent GET requests and yields URL, response and error triples as requests finish,
+        in completion order or in input order if ordered is set. Stops early with partial results when deadline
+        seconds pass or cancel event is set, requests still running then are left to time out in background and
+        their results are dropped"""
+        if self._timeout_adapter is None:
+            self._init()
+        self._timeout_adapter.resize_pool(concurrency)
+        proxy = self._proxy_string()
+        end_time = monotonic() + deadline if deadline is not None else None
+        urls = iter(enumerate(urls))
+        urls_exhausted = False
+        lookahead = concurrency * 4
+        queued_count = 0
+        host_queues = OrderedDict()
+        host_counts = Counter()
+        in_flight = {}
+        finished = {}
+        next_index = 0
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        try:
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                if end_time is not None and monotonic() >= end_time:
+                    break
+                # Keep a bounded lookahead of queued URLs grouped by host
+                while not urls_exhausted and queued_count < lookahead:
+                    try:
+                        index, url = next(urls)
+                    except StopIteration:
+                        urls_exhausted = True
+                        break
+                    host = urlparse(url).netloc
+                    host_queues.setdefault(host, deque()).append((index, url))
+                    queued_count += 1
+                # Dispatch round-robin over hosts that are below their in-flight limit, hosts held back by rate
+                # limiter are skipped so other hosts can go ahead
+                throttle_delay = None
+                for host in list(host_queues):
+                    if len(in_flight) >= concurrency:
+                        break
+                    queue = host_queues[host]
+                    while queue and host_counts[host] < per_host_limit and len(in_flight) < concurrency:
+                        # Every request gets its own keyword arguments
+                        request_kwargs = dict(kwargs)
+                        if end_time is not None:
+                            # Requests running at deadline time out soon after it
+                            request_kwargs["timeout"] = self._deadline_timeout(
+                                request_kwargs.get("timeout", self.timeout), end_time
+                            )
+                        if self._rate_limiter is not None:
+                            delay = self._rate_limiter.try_acquire(host, proxy)
+                            if delay > 0:
+                                throttle_delay = min(delay, throttle_delay or delay)
+                                break
+                            request_kwargs["rate_limit_acquired"] = True
+                        index, url = queue.popleft()
+                        queued_count -= 1
+                        future = executor.submit(self._try_get_result, url, **request_kwargs)
+                        in_flight[future] = (index, url, host)
+                        host_counts[host] += 1
+                    if queue:
+                        host_queues.move_to_end(host)
+                    else:
+                        del host_queues[host]
+                if not in_flight and throttle_delay is None:
+                    break
+                timeout = None
+                if end_time is not None:
+                    timeout = max(0, end_time - monotonic())
+                elif cancel_event is not None:
+                    timeout = 0.5
+                if throttle_delay is not None:
+                    timeout = min(throttle_delay, timeout if timeout is not None else throttle_delay)
+                if not in_flight:
+                    sleep(timeout)
+                    continue
+                done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, url, host = in_flight.pop(future)
+                    host_counts[host] -= 1
+                    response, error = future.result()
+                    if not ordered:
+                        yield url, response, error
+                        continue
+                    finished[index] = (url, response, error)
+                    while next_index in finished:
+                        yield finished.pop(next_index)
+                        next_index += 1
+            # Deadline or cancellation, return whatever is already finished
+            for index in sorted(finished):
+                yield finished[index]
+        finally:
+            for future in in_flight:
+                future.cancel()
+            # Running requests aren't waited for so deadline bounds the time spent
+            executor.shutdown(wait=False)
+
     def _logging_hook(self, response: Response, *args, **kwargs):
         """Adds logging callback function to a response instance"""
         self._logging_callback(response, *args, **kwargs)
@@ -1,4 +1,5 @@
 from ipaddress import IPv4Address, AddressValueError
+from socket import AF_INET, inet_pton
 
 
 class IPAddress:
@@ -15,6 +16,14 @@ class IPAddress:
     @staticmethod
     def validate(ip):
         """Returns True if IP address is valid otherwise False"""
+        if type(ip) is str:
+            # Same strict dotted quad rules as IPv4Address without building address object
+            try:
+                inet_pton(AF_INET, ip)
+            except (OSError, ValueError):
+                return False
+            else:
+                return True
         try:
             IPv4Address(ip)
         except AddressValueError:
@@ -0,0 +1,120 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from random import Random
+from threading import Lock
+from time import sleep
+from typing import AnyStr, Optional
+
+try:
+    from libs.my.core.network.background_server import BackgroundServer
+    from libs.my.core.network.recording import HttpArchive
+except ModuleNotFoundError:
+    from core.network.background_server import BackgroundServer
+    from core.network.recording import HttpArchive
+
+
+# Headers describing recorded connection and transfer, replayed body is sent whole with its length
+SKIP_HEADERS = ("connection", "keep-alive", "transfer-encoding", "content-length")
+# Body is sent in slices of bandwidth / BANDWIDTH_SLICES bytes
+BANDWIDTH_SLICES = 10
+
+
+class _MockRequestHandler(BaseHTTPRequestHandler):
+    """Serves recorded exchanges of mock server archive"""
+
+    protocol_version = "HTTP/1.1"
+    server: "_MockHTTPServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _serve(self):
+        length = self.headers.get("Content-Length", "")
+        if length.isdigit():
+            self.rfile.read(int(length))
+        mock = self.server.mock
+        if mock.failed():
+            # Drop connection without response like a failing upstream
+            self.close_connection = True
+            return
+        # Proxy requests carry absolute URL, direct requests path only
+        exchange = mock.archive.find(self.command, self.path)
+        if exchange is None:
+            self.send_error(404, "No recorded exchange")
+            return
+        mock.count_request()
+        if mock.latency is None:
+            sleep(exchange.elapsed)
+        elif mock.latency:
+            sleep(mock.latency)
+        self.send_response(exchange.status, exchange.reason)
+        for name, value in exchange.headers:
+            if name.lower() not in SKIP_HEADERS:
+                self.send_header(name, value)
+        self.send_header("Content-Length", str(len(exchange.body)))
+        self.end_headers()
+        if self.command == "HEAD":
+            return
+        if not mock.bandwidth:
+            self.wfile.write(exchange.body)
+            return
+        slice_size = max(1, int(mock.bandwidth / BANDWIDTH_SLICES))
+        for i in range(0, len(exchange.body), slice_size):
+            data = exchange.body[i:i + slice_size]
+            self.wfile.write(data)
+            self.wfile.flush()
+            sleep(len(data) / mock.bandwidth)
+
+    do_GET = do_HEAD = do_POST = do_PUT = do_PATCH = do_DELETE = do_OPTIONS = _serve
+
+    def do_CONNECT(self):
+        self.send_error(501, "Tunneling is not supported")
+
+
+class _MockHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    mock: "MockServer"
+
+
+class MockServer(BackgroundServer):
+    """Local HTTP server replaying archive exchanges with fixed or recorded latency, bandwidth limit in bytes per
+    second and connection errors rate. Serves requests sent to it directly, matched by path, or through it as
+    HTTP proxy, matched by absolute URL"""
+
+    def __init__(
+        self,
+        archive: HttpArchive,
+        host: AnyStr = "127.0.0.1",
+        port: int = 0,
+        latency: Optional[float] = 0,
+        bandwidth: Optional[float] = None,
+        error_rate: float = 0,
+        seed: Optional[int] = None,
+    ):
+        self.archive = archive
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.requests = 0
+        self._random = Random(seed)
+        self._lock = Lock()
+        super().__init__(_MockHTTPServer((host, port), _MockRequestHandler))
+        self._server.mock = self
+
+    def failed(self) -> bool:
+        """Returns True if request should fail by error rate otherwise False"""
+        if self.error_rate <= 0:
+            return False
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def count_request(self):
+        """Counts served request"""
+        with self._lock:
+            self.requests += 1
+
+    @property
+    def url(self) -> AnyStr:
+        """Returns server base URL"""
+        host, port = self.address
+
+        return f"http://{host}:{port}"
@@ -2,7 +2,6 @@
 import ipaddress
 import json
 from enum import Enum
-from random import choice
 from re import compile, search
 
 import requests
@@ -10,9 +9,11 @@ import requests
 try:
     from libs.my.core.defaults import HEADERS, TIMEOUT
     from libs.my.core.meta.dummy_object import DummyObject
+    from libs.my.core.network.proxy_checker import check_anonymity as check_proxy_anonymity
 except ModuleNotFoundError:
     from core.defaults import HEADERS, TIMEOUT
     from core.meta.dummy_object import DummyObject
+    from core.network.proxy_checker import check_anonymity as check_proxy_anonymity
 
 
 MATCH_WHITESPACE = "\s+"
@@ -177,41 +178,8 @@ def get_real_ip():
 
 
 def check_anonymity(ip, port, real_ip, timeout):
-    """Returns Proxy object if proxy is working otherwise None"""
-    http_proxy_judges = (
-        "http://httpbin.org/ip",
-        "http://api.ipify.org",
-        "http://icanhazip.com/",
-    )
-    https_proxy_judges = (
-        "https://httpbin.org/ip",
-        "https://api.ipify.org",
-        "https://icanhazip.com/",
-    )
-    http_proxy = None
-    https_proxy = None
-    for proxy_judges in [
-        (ProxyType.HTTP, http_proxy_judges),
-        (ProxyType.HTTPS, https_proxy_judges),
-    ]:
-        try:
-            proxy_type, proxy_judges = proxy_judges
-            port = int(port)
-            url = choice(proxy_judges)
-            proxies = {
-                "http": "http://{}:{}/".format(ip, port),
-                "https": "https://{}:{}/".format(ip, port),
-            }
-            # r = requests.get(url, proxies=proxies, headers=HEADERS, timeout=TIMEOUT)
-            r = requests.get(url, proxies=proxies, headers=HEADERS, timeout=timeout)
-            if r.status_code == 200:
-                if str(real_ip) not in r.text:
-                    if proxy_type == ProxyType.HTTP:
-                        http_proxy = Proxy(ip, port)
-                    elif proxy_type == ProxyType.HTTPS:
-                        https_proxy = Proxy(ip, port, ssl=True)
-        except Exception as e:
-            pass
-    proxy = https_proxy if http_proxy is not None and https_proxy is not None else None
-
-    return proxy
+    """Returns Proxy object if proxy is working otherwise None, see proxy_checker.check_anonymity"""
+    proxy = check_proxy_anonymity(ip, port, real_ip, timeout)
+
+    # Proxy passed HTTPS check as well
+    return Proxy(proxy.ip, proxy.port, ssl=True) if proxy is not None else None
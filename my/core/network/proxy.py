@@ -1,5 +1,7 @@
 from enum import Enum
 from re import search, DOTALL, IGNORECASE
+from socket import AF_INET, inet_ntop, inet_pton
+from weakref import WeakValueDictionary
 
 try:
     from libs.my.core.network.ip_address import IPAddress
@@ -21,16 +23,24 @@ class ProxyType(Enum):
 
 
 class Proxy:
-    """Proxy class"""
+    """Proxy class, compact slotted object storing IPv4 address as packed integer, string form and requests proxies
+    mapping are built once per proxy. Use intern to share one object between equal proxies"""
+
+    __slots__ = ("_ip", "_port", "_username", "_password", "_timeout", "_type", "_string", "_proxies", "__weakref__")
+
+    # Interned proxies by (ip, port, username, password, type), entries go away with last reference
+    _interned = WeakValueDictionary()
 
     def __init__(self, ip, port, username=None, password=None, timeout=10, ssl=False):
         Proxy.validate(ip, port)
-        self._ip = ip
+        self._ip = Proxy.pack_ip(ip)
         self._port = port
         self._username = username
         self._password = password
         self._timeout = timeout
         self._type = ProxyType.HTTPS if ssl else ProxyType.HTTP
+        self._string = None
+        self._proxies = None
 
     def __repr__(self):
         """Returns Proxy class representation"""
@@ -38,20 +48,88 @@ class Proxy:
 
     def __str__(self):
         """Returns Proxy class as string"""
-        if self.username and self.password:
-            return "{}://{}:{}@{}:{}".format(
-                self.type.value, self.username, self.password, self.ip, self.port
-            )
-        else:
-            return "{}://{}:{}".format(self.type.value, self.ip, self.port)
+        if self._string is None:
+            if self.username and self.password:
+                self._string = "{}://{}:{}@{}:{}".format(
+                    self.type.value, self.username, self.password, self.host, self.port
+                )
+            else:
+                self._string = "{}://{}:{}".format(self.type.value, self.host, self.port)
+
+        return self._string
 
     def __eq__(self, other):
         """Returns true if current proxy object is equal to given other proxy"""
-        return self.ip == other.ip and self.port == other.port
+        if not isinstance(other, Proxy):
+            return NotImplemented
+
+        return self._ip == other._ip and self._port == other._port
 
     def __hash__(self):
         """Returns uniques hash value for current proxy object"""
-        return hash((self.ip, self.port))
+        return hash((self._ip, self._port))
+
+    def __getstate__(self):
+        return self._ip, self._port, self._username, self._password, self._timeout, self._type
+
+    def __setstate__(self, state):
+        self._ip, self._port, self._username, self._password, self._timeout, self._type = state
+        self._string = None
+        self._proxies = None
+
+    @staticmethod
+    def pack_ip(ip):
+        """Returns IPv4 address as integer, other addresses and host names are returned unchanged"""
+        if type(ip) is str:
+            try:
+                return int.from_bytes(inet_pton(AF_INET, ip), "big")
+            except OSError:
+                pass
+
+        return ip
+
+    @staticmethod
+    def unpack_ip(ip):
+        """Returns IPv4 address string of address packed by pack_ip"""
+        if type(ip) is int:
+            return inet_ntop(AF_INET, ip.to_bytes(4, "big"))
+
+        return ip
+
+    @classmethod
+    def from_packed(cls, ip, port: int, username=None, password=None, ssl: bool = False) -> "Proxy":
+        """Returns new proxy from IP address packed by pack_ip and port without validation, for bulk loading of
+        already parsed proxies"""
+        proxy = cls.__new__(cls)
+        proxy._ip = ip
+        proxy._port = port
+        proxy._username = username
+        proxy._password = password
+        proxy._timeout = 10
+        proxy._type = ProxyType.HTTPS if ssl else ProxyType.HTTP
+        proxy._string = None
+        proxy._proxies = None
+
+        return proxy
+
+    @classmethod
+    def intern(cls, proxy: "Proxy") -> "Proxy":
+        """Returns already interned proxy equal to given one including credentials and type, or interns given
+        proxy and returns it"""
+        key = proxy._ip, proxy._port, proxy._username, proxy._password, proxy._type
+        interned = cls._interned.get(key)
+        if interned is None:
+            cls._interned[key] = interned = proxy
+
+        return interned
+
+    @property
+    def key(self):
+        """Returns compact proxy address key, integer for IPv4 proxies"""
+        if type(self._ip) is int:
+            return self._ip << 16 | self._port
+
+        return self._ip, self._port
 
     @staticmethod
     def from_string(proxy_string: str):
@@ -97,7 +175,14 @@ class Proxy:
     @property
     def ip(self):
         """Returns proxy IP address"""
-        return self._ip
+        return Proxy.unpack_ip(self._ip)
+
+    @property
+    def host(self):
+        """Returns proxy IP address as URL host, IPv6 address in brackets"""
+        ip = self.ip
+
+        return f"[{ip}]" if ":" in str(ip) else ip
 
     @property
     def port(self):
@@ -114,6 +199,21 @@ class Proxy:
         """Returns proxy auth password"""
         return self._password
 
+    @property
+    def proxies(self) -> dict:
+        """Returns requests library proxies mapping, built once per proxy"""
+        if self._proxies is None:
+            auth = ""
+            if all((self._username, self._password)):
+                auth = f"{self._username}:{self._password}@"
+            host = self.host
+            self._proxies = {
+                "http": f"http://{auth}{host}:{self._port}/",
+                "https": f"https://{auth}{host}:{self._port}/",
+            }
+
+        return self._proxies
+
     @property
     def type(self) -> ProxyType:
         """Returns proxy type"""
@@ -123,3 +223,4 @@ class Proxy:
     def type(self, proxy_type: ProxyType):
         """Sets proxy type"""
         self._type = proxy_type
+        self._string = None
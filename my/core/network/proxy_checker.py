@@ -0,0 +1,268 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import count
+from json import dumps
+from threading import Event, Lock, local
+from time import perf_counter
+from typing import AnyStr, Dict, Iterable, Iterator, Optional, Sequence, Tuple, Union
+from urllib.parse import urlsplit
+
+from requests import Session
+
+try:
+    from libs.my.core.defaults import HEADERS, TIMEOUT
+    from libs.my.core.network.background_server import BackgroundServer
+    from libs.my.core.network.http_client import TimeoutHTTPAdapter
+    from libs.my.core.network.proxy import Proxy, ProxyType
+    from libs.my.core.network.proxy_pool import ProxyPool
+except ModuleNotFoundError:
+    from core.defaults import HEADERS, TIMEOUT
+    from core.network.background_server import BackgroundServer
+    from core.network.http_client import TimeoutHTTPAdapter
+    from core.network.proxy import Proxy, ProxyType
+    from core.network.proxy_pool import ProxyPool
+
+
+JUDGES = (
+    ("http://httpbin.org/ip", ProxyType.HTTP),
+    ("http://api.ipify.org", ProxyType.HTTP),
+    ("http://icanhazip.com/", ProxyType.HTTP),
+    ("https://httpbin.org/ip", ProxyType.HTTPS),
+    ("https://api.ipify.org", ProxyType.HTTPS),
+    ("https://icanhazip.com/", ProxyType.HTTPS),
+)
+CHECK_CONCURRENCY = 200
+# Connection pools of recently checked proxies kept per checking thread
+CHECK_PROXY_POOLS_COUNT = 4
+
+# Checkers shared by check_anonymity calls by real IP
+_checkers = {}
+_checkers_lock = Lock()
+
+
+class ProxyCheckResult:
+    """Proxy check outcome"""
+
+    def __init__(
+        self,
+        ip: AnyStr,
+        port: int,
+        proxy: Optional[Proxy] = None,
+        latency: Optional[float] = None,
+        error: Optional[AnyStr] = None,
+    ):
+        self.ip = ip
+        self.port = port
+        self.proxy = proxy
+        self.latency = latency
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        """Returns True if proxy passed all checks otherwise False"""
+        return self.proxy is not None
+
+    def __repr__(self):
+        return "<ProxyCheckResult ({}:{}) {}>".format(self.ip, self.port, "ok" if self.ok else self.error)
+
+
+class ProxyChecker:
+    """Concurrent proxy validator, requests judge endpoint of every checked proxy type through proxy and stops at
+    first failure. Proxy is anonymous when judge response doesn't contain real IP, anonymity isn't checked when
+    real IP is None. Judges of each type are used round robin, timeout limits whole check of one proxy"""
+
+    def __init__(
+        self,
+        real_ip: Optional[AnyStr] = None,
+        timeout: float = TIMEOUT,
+        judges: Iterable[Tuple[AnyStr, ProxyType]] = JUDGES,
+        proxy_types: Sequence[ProxyType] = (ProxyType.HTTP, ProxyType.HTTPS),
+        concurrency: int = CHECK_CONCURRENCY,
+    ):
+        self._real_ip = str(real_ip) if real_ip is not None else None
+        self._timeout = timeout
+        self._proxy_types = tuple(proxy_types)
+        self._concurrency = concurrency
+        self._judges = {}
+        for url, proxy_type in judges:
+            self._judges.setdefault(proxy_type, []).append(url)
+        for proxy_type in self._proxy_types:
+            if proxy_type not in self._judges:
+                raise ValueError(f"No judge for {proxy_type.value} proxy type")
+        self._counters = {proxy_type: count() for proxy_type in self._proxy_types}
+        self._local = local()
+        self._lock = Lock()
+        self._checked = 0
+        self._working = 0
+
+    def _session(self) -> Session:
+        """Returns session of current thread"""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = Session()
+            adapter = TimeoutHTTPAdapter(timeout=self._timeout, max_proxies=CHECK_PROXY_POOLS_COUNT)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+
+        return session
+
+    def _judge(self, proxy_type: ProxyType) -> AnyStr:
+        """Returns next judge URL for proxy type"""
+        judges = self._judges[proxy_type]
+
+        return judges[next(self._counters[proxy_type]) % len(judges)]
+
+    def check(self, ip: AnyStr, port: int, timeout: Optional[float] = None) -> ProxyCheckResult:
+        """Checks proxy within timeout seconds, checker timeout if not set, and returns check result"""
+        port = int(port)
+        proxies = {"http": f"http://{ip}:{port}/", "https": f"http://{ip}:{port}/"}
+        session = self._session()
+        start_time = perf_counter()
+        deadline = start_time + (timeout if timeout is not None else self._timeout)
+        error = None
+        for proxy_type in self._proxy_types:
+            remaining = deadline - perf_counter()
+            if remaining <= 0:
+                error = f"{proxy_type.value}: timeout"
+                break
+            url = self._judge(proxy_type)
+            try:
+                r = session.get(url, proxies=proxies, headers=HEADERS, timeout=remaining)
+            except Exception as e:
+                error = f"{proxy_type.value}: {type(e).__name__}"
+                break
+            if r.status_code != 200:
+                error = f"{proxy_type.value}: status {r.status_code}"
+                break
+            if self._real_ip is not None and self._real_ip in r.text:
+                error = f"{proxy_type.value}: not anonymous"
+                break
+        latency = perf_counter() - start_time
+        proxy = None
+        if error is None:
+            proxy = Proxy(ip, port, ssl=ProxyType.HTTPS in self._proxy_types)
+        with self._lock:
+            self._checked += 1
+            self._working += error is None
+
+        return ProxyCheckResult(ip, port, proxy, latency, error)
+
+    def _check_in(self, sessions: set, ip: AnyStr, port: int) -> ProxyCheckResult:
+        """Checks proxy and adds session of current thread to sessions"""
+        sessions.add(self._session())
+
+        return self.check(ip, port)
+
+    def check_many(
+        self,
+        proxies: Iterable[Union[Proxy, Tuple[AnyStr, int]]],
+        proxy_pool: Optional[ProxyPool] = None,
+        cancel_event: Optional[Event] = None,
+    ) -> Iterator[ProxyCheckResult]:
+        """Checks proxies concurrently and yields check results as they finish, working proxies are added to
+        proxy pool as soon as they pass. Stops early when cancel event is set or when closed, checks still running
+        then are aborted and their results dropped"""
+        proxies = iter(proxies)
+        proxies_exhausted = False
+        lookahead = self._concurrency * 2
+        in_flight = set()
+        # Sessions of checking threads, closed when checking stops
+        sessions = set()
+        executor = ThreadPoolExecutor(max_workers=self._concurrency)
+        try:
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                while not proxies_exhausted and len(in_flight) < lookahead:
+                    try:
+                        proxy = next(proxies)
+                    except StopIteration:
+                        proxies_exhausted = True
+                        break
+                    ip, port = (proxy.ip, proxy.port) if isinstance(proxy, Proxy) else proxy
+                    in_flight.add(executor.submit(self._check_in, sessions, ip, port))
+                if not in_flight:
+                    break
+                timeout = 0.5 if cancel_event is not None else None
+                done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                for future in done:
+                    in_flight.discard(future)
+                    result = future.result()
+                    if result.ok and proxy_pool is not None:
+                        proxy_pool.add_proxy(result.proxy)
+                    yield result
+        finally:
+            for future in in_flight:
+                future.cancel()
+            # Running checks fail on closed connections, proxy pool is only written to above so their results never
+            # reach it
+            for session in list(sessions):
+                session.close()
+            executor.shutdown(wait=False)
+
+    @property
+    def stats(self) -> Dict:
+        """Returns numbers of checked and working proxies"""
+        with self._lock:
+            return {"checked": self._checked, "working": self._working}
+
+
+def check_anonymity(
+    ip: AnyStr, port: int, real_ip: Optional[AnyStr] = None, timeout: float = TIMEOUT
+) -> Optional[Proxy]:
+    """Returns Proxy object if proxy is working and anonymous otherwise None, calls share checker and its
+    connections, use ProxyChecker to check many proxies"""
+    key = str(real_ip) if real_ip is not None else None
+    with _checkers_lock:
+        checker = _checkers.get(key)
+        if checker is None:
+            checker = _checkers[key] = ProxyChecker(real_ip)
+
+    return checker.check(ip, port, timeout).proxy
+
+
+class _JudgeRequestHandler(BaseHTTPRequestHandler):
+    """Answers with requesting client address as JSON"""
+
+    protocol_version = "HTTP/1.1"
+    server: "_JudgeHTTPServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        origin = self.client_address[0]
+        if urlsplit(self.path).scheme:
+            # Requested as proxy, answers as if request was forwarded by anonymous proxy at proxy origin
+            origin = self.server.proxy_origin
+        forwarded_for = self.headers.get("X-Forwarded-For")
+        if forwarded_for:
+            origin = f"{forwarded_for}, {origin}"
+        body = dumps({"origin": origin}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _JudgeHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+    proxy_origin = None
+
+
+class JudgeServer(BackgroundServer):
+    """Local proxy judge answering like httpbin /ip endpoint, for offline proxy checker use. Also accepts plain
+    HTTP proxy requests and answers them as anonymous proxy with proxy origin address"""
+
+    def __init__(self, host: AnyStr = "127.0.0.1", port: int = 0, proxy_origin: AnyStr = "203.0.113.1"):
+        super().__init__(_JudgeHTTPServer((host, port), _JudgeRequestHandler))
+        self._server.proxy_origin = proxy_origin
+
+    @property
+    def url(self) -> AnyStr:
+        """Returns judge URL"""
+        host, port = self.address
+
+        return f"http://{host}:{port}/ip"
@@ -0,0 +1,247 @@
+from array import array
+from codecs import getincrementaldecoder
+from gzip import open as gzip_open
+from ipaddress import IPv6Address
+from os import PathLike
+from re import IGNORECASE, compile as re_compile
+from socket import AF_INET, inet_pton
+from typing import IO, AnyStr, Iterable, Iterator, Union
+
+try:
+    from libs.my.core.network.proxy import Proxy
+    from libs.my.core.network.proxy_pool import ProxyPool
+except ModuleNotFoundError:
+    from core.network.proxy import Proxy
+    from core.network.proxy_pool import ProxyPool
+
+
+CHUNK_SIZE = 1 << 20
+FEED_BATCH_SIZE = 10000
+PACKED_KEY_SET_CAPACITY = 1 << 16
+# Fibonacci hashing of packed keys, spreads sequential addresses over table
+HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+HASH_SHIFT = 20
+_OCTET = r"(?:25[0-5]|2[0-4]\d|1\d\d|[1-9]?\d)"
+_IPV4 = rf"(?<![\w.])((?:{_OCTET}\.){{3}}{_OCTET})(?![\w.])"
+# Address and port are separated by colon and/or whitespace
+_PORT = r"\s*:?\s*(\d{2,5})(?!\d)"
+# Optional scheme and credentials, IPv4 or bracketed IPv6 address and port
+MATCH_PROXY_ENTRY = (
+    r"(?<![\w.])"
+    r"(?:(https?)://)?"
+    r"(?:([^\s:@/]+):([^\s:@/]+)@)?"
+    rf"(?:{_IPV4}|\[([0-9a-f:.]{{2,45}})\])"
+    rf"{_PORT}"
+)
+# Plain ip:port entries, matches the same as MATCH_PROXY_ENTRY in text without schemes, credentials and IPv6
+# addresses, used for such chunks as it's faster
+MATCH_PROXY_ADDRESS = rf"{_IPV4}{_PORT}"
+# IPv4 address at end of text whose port may follow in next chunk
+MATCH_TRAILING_ADDRESS = rf"{_IPV4}\s*:?\s*$"
+
+regex_proxy_entry = re_compile(MATCH_PROXY_ENTRY, IGNORECASE)
+regex_proxy_address = re_compile(MATCH_PROXY_ADDRESS)
+regex_trailing_address = re_compile(MATCH_TRAILING_ADDRESS)
+# Longest text IPv4 address with separator can take before next chunk
+TRAILING_ADDRESS_WINDOW = 256
+
+
+class PackedKeySet:
+    """Compact set of non-negative integers below 2 ** 64 - 1, linear probing table stored in array of unsigned
+    64-bit integers, kept at most half full so it takes 16 to 32 bytes per key"""
+
+    def __init__(self, capacity: int = PACKED_KEY_SET_CAPACITY):
+        size = 1
+        while size < capacity * 2:
+            size <<= 1
+        self._table = array("Q", bytes(8 * size))
+        self._mask = size - 1
+        self._count = 0
+
+    def add(self, key: int) -> bool:
+        """Adds key, returns True if key wasn't in set otherwise False"""
+        # Keys are stored incremented by one so zero marks empty slot
+        key += 1
+        table = self._table
+        mask = self._mask
+        i = (key * HASH_MULTIPLIER >> HASH_SHIFT) & mask
+        slot = table[i]
+        while slot:
+            if slot == key:
+                return False
+            i = (i + 1) & mask
+            slot = table[i]
+        table[i] = key
+        self._count += 1
+        if self._count * 2 > mask:
+            self._grow()
+
+        return True
+
+    def __contains__(self, key: int) -> bool:
+        key += 1
+        table = self._table
+        mask = self._mask
+        i = (key * HASH_MULTIPLIER >> HASH_SHIFT) & mask
+        slot = table[i]
+        while slot:
+            if slot == key:
+                return True
+            i = (i + 1) & mask
+            slot = table[i]
+
+        return False
+
+    def _grow(self):
+        """Doubles table size and re-inserts stored keys"""
+        old_table = self._table
+        size = (self._mask + 1) * 2
+        table = array("Q", bytes(8 * size))
+        mask = size - 1
+        for key in old_table:
+            if key:
+                i = (key * HASH_MULTIPLIER >> HASH_SHIFT) & mask
+                while table[i]:
+                    i = (i + 1) & mask
+                table[i] = key
+        self._table = table
+        self._mask = mask
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class ProxyListLoader:
+    """Streams proxy lists from files, file objects or text in chunks and parses ip:port, user:pass@ip:port and
+    [IPv6]:port entries, optionally with http:// or https:// scheme, in one regex pass. Proxies are deduplicated
+    by address with packed keys across everything loaded by loader, capacity is expected number of unique proxies"""
+
+    def __init__(
+        self,
+        ssl: bool = False,
+        chunk_size: int = CHUNK_SIZE,
+        intern: bool = False,
+        capacity: int = PACKED_KEY_SET_CAPACITY,
+    ):
+        self._ssl = ssl
+        self._chunk_size = chunk_size
+        self._intern = intern
+        self._seen = PackedKeySet(capacity)
+        # IPv6 keys don't fit packed key set
+        self._seen_ipv6 = set()
+        self._parsed = 0
+        self._duplicates = 0
+
+    def _parse_chunk(self, text: AnyStr) -> Iterator[Proxy]:
+        """Yields new proxies found in text"""
+        add = self._seen.add
+        if "@" in text or "[" in text or "://" in text:
+            matches = (match.groups() for match in regex_proxy_entry.finditer(text))
+        else:
+            matches = ((None, None, None, ipv4, None, port) for ipv4, port in regex_proxy_address.findall(text))
+        for scheme, username, password, ipv4, ipv6, port in matches:
+            port = int(port)
+            if port > 65535:
+                continue
+            self._parsed += 1
+            if ipv4 is not None:
+                ip = int.from_bytes(inet_pton(AF_INET, ipv4), "big")
+                new = add(ip << 16 | port)
+            else:
+                try:
+                    ip = str(IPv6Address(ipv6))
+                except ValueError:
+                    self._parsed -= 1
+                    continue
+                key = ip, port
+                new = key not in self._seen_ipv6
+                self._seen_ipv6.add(key)
+            if not new:
+                self._duplicates += 1
+                continue
+            ssl = scheme.lower() == "https" if scheme is not None else self._ssl
+            proxy = Proxy.from_packed(ip, port, username, password, ssl)
+            yield Proxy.intern(proxy) if self._intern else proxy
+
+    def parse_text(self, text: AnyStr) -> Iterator[Proxy]:
+        """Yields new proxies found in text"""
+        return self._parse_chunk(text)
+
+    def parse(self, source: Union[AnyStr, PathLike, IO]) -> Iterator[Proxy]:
+        """Yields new proxies read from file path, gzipped if it ends with .gz, or from text or binary file object,
+        reads chunk size characters at a time"""
+        if isinstance(source, (str, PathLike)):
+            opener = gzip_open if str(source).endswith(".gz") else open
+            with opener(source, "rt", encoding="utf-8", errors="replace") as f:
+                yield from self._parse_file(f)
+        else:
+            yield from self._parse_file(source)
+
+    def _parse_file(self, f: IO) -> Iterator[Proxy]:
+        """Yields new proxies read from file object, entries are never split between chunks"""
+        decoder = None
+        tail = ""
+        while True:
+            chunk = f.read(self._chunk_size)
+            if isinstance(chunk, bytes):
+                if decoder is None:
+                    decoder = getincrementaldecoder("utf-8")(errors="replace")
+                chunk = decoder.decode(chunk, final=not chunk)
+            if not chunk:
+                if tail:
+                    yield from self._parse_chunk(tail)
+                return
+            text = tail + chunk
+            cut = text.rfind("\n")
+            if cut == -1 and len(text) > self._chunk_size:
+                # Long line, splits it at last blank
+                cut = max(text.rfind(" "), text.rfind("\t"))
+            if cut != -1:
+                # Address whose port may be in next chunk stays with it
+                start = max(0, cut + 1 - TRAILING_ADDRESS_WINDOW)
+                match = regex_trailing_address.search(text, start, cut + 1)
+                if match is not None:
+                    cut = match.start() - 1
+            if cut == -1:
+                tail = text
+                continue
+            tail = text[cut + 1:]
+            yield from self._parse_chunk(text[:cut + 1])
+
+    def feed(
+        self,
+        source: Union[AnyStr, PathLike, IO, Iterable[Proxy]],
+        proxy_pool: ProxyPool,
+        batch_size: int = FEED_BATCH_SIZE,
+    ) -> int:
+        """Adds new proxies read from source or parsed proxies to proxy pool in batches, returns number of added
+        proxies"""
+        proxies = self.parse(source) if isinstance(source, (str, PathLike)) or hasattr(source, "read") else source
+        added = 0
+        batch = []
+        for proxy in proxies:
+            batch.append(proxy)
+            if len(batch) >= batch_size:
+                proxy_pool.add_proxies(batch)
+                added += len(batch)
+                batch = []
+        if batch:
+            proxy_pool.add_proxies(batch)
+            added += len(batch)
+
+        return added
+
+    @property
+    def parsed_count(self) -> int:
+        """Returns number of parsed proxy entries"""
+        return self._parsed
+
+    @property
+    def duplicates_count(self) -> int:
+        """Returns number of skipped duplicate proxy entries"""
+        return self._duplicates
+
+    @property
+    def unique_count(self) -> int:
+        """Returns number of unique proxies"""
+        return len(self._seen) + len(self._seen_ipv6)
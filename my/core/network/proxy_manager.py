@@ -1,38 +1,90 @@
-from typing import Union
+from typing import AnyStr, Optional, Union
 
 try:
     from libs.my.core.meta.dummy_object import DummyObject
     from libs.my.core.network.proxy import Proxy
     from libs.my.core.network.proxy_pool import ProxyPool, ProxyPoolDepletedError
+    from libs.my.core.network.proxy_pool_server import ProxyPoolClient
 except ModuleNotFoundError:
     from core.meta.dummy_object import DummyObject
     from core.network.proxy import Proxy
     from core.network.proxy_pool import ProxyPool, ProxyPoolDepletedError
+    from core.network.proxy_pool_server import ProxyPoolClient
 
 
 class ProxyManager:
     """Manages proxy pool, tracks proxy failures, removes burned ones from pool
-    and ensures that one proxy is  always used by just one consumer"""
+    and ensures that one proxy is  always used by just one consumer. Proxies are taken for domain if given,
+    skipping ones banned on it, sticky keeps returned proxy for next consumer of the same domain. Proxies of
+    ProxyPool are held by lease, so a lease reclaimed by pool reaper is never returned on behalf of its next
+    holder"""
 
     def __init__(
-        self, proxy_pool: Union[ProxyPool, DummyObject], max_wait_time: float = 30
+        self,
+        proxy_pool: Union[ProxyPool, ProxyPoolClient, DummyObject],
+        max_wait_time: float = 30,
+        domain: Optional[AnyStr] = None,
+        sticky: bool = False,
     ):
         self._proxy_pool = proxy_pool
         self._max_wait_time = max_wait_time
+        self._domain = domain
+        self._sticky = sticky
         self._proxy = None
+        self._lease = None
         self._proxy_retries = 0
+        self._proxy_failures = 0
 
     def add_failure(self):
         """Increases failure count for proxy"""
         self._proxy_retries += 1
+        self._proxy_failures += 1
+        self.report(False)
+
+    def report(self, success: bool, latency: Optional[float] = None):
+        """Reports request outcome and latency in seconds of current proxy to proxy pool"""
+        if isinstance(self._proxy, Proxy):
+            self._proxy_pool.report(self._proxy, success, latency)
+
+    def ban(self, ban_time: Optional[float] = None):
+        """Bans current proxy on domain for ban time seconds or for good"""
+        if isinstance(self._proxy, Proxy) and self._domain is not None:
+            self._proxy_pool.ban_proxy(self._proxy, self._domain, ban_time)
+
+    def heartbeat(self, lease_time: Optional[float] = None) -> bool:
+        """Renews lease of current proxy so pool reaper doesn't reclaim it, returns False if lease was lost"""
+        if self._lease is not None:
+            return self._lease.renew(lease_time)
+        if isinstance(self._proxy, Proxy):
+            return self._proxy_pool.renew_proxy(self._proxy, lease_time)
+
+        return False
+
+    def _return(self):
+        """Returns current proxy to proxy pool with its new failures"""
+        # Pool adds returned failures to retries count it already holds
+        if self._lease is not None:
+            self._lease.release(self._proxy_failures)
+        elif isinstance(self._proxy, Proxy):
+            self._proxy_pool.return_proxy(self._proxy, self._proxy_failures)
+        self._proxy = None
+        self._lease = None
 
     def get(self) -> Proxy:
         """Returns proxy from proxy pool"""
-        if isinstance(self._proxy, Proxy):
-            self._proxy_pool.return_proxy(self._proxy, self._proxy_retries)
-        self._proxy, self._proxy_retries = self._proxy_pool.get_proxy(
-            self._max_wait_time
-        )
+        self._return()
+        if isinstance(self._proxy_pool, ProxyPool):
+            self._lease = self._proxy_pool.lease(self._max_wait_time, self._domain, self._sticky)
+            self._proxy, self._proxy_retries = self._lease.proxy, self._lease.retries
+        elif self._domain is None:
+            self._proxy, self._proxy_retries = self._proxy_pool.get_proxy(
+                self._max_wait_time
+            )
+        else:
+            self._proxy, self._proxy_retries = self._proxy_pool.get_proxy(
+                self._max_wait_time, domain=self._domain, sticky=self._sticky
+            )
+        self._proxy_failures = 0
 
         return self._proxy
 
@@ -43,5 +95,4 @@ class ProxyManager:
 
     def __exit__(self, *args):
         """Override"""
-        if isinstance(self._proxy, Proxy):
-            self._proxy_pool.return_proxy(self._proxy, self._proxy_retries)
+        self._return()
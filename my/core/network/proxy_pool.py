@@ -1,17 +1,46 @@
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
-from random import choice, randrange
-from threading import Lock
-from time import sleep, time
-from typing import Iterable, Optional, Tuple
+from gzip import open as gzip_open
+from heapq import heappop, heappush
+from json import dump, load
+from os import replace
+from random import random, randrange
+from threading import Condition, Event, Lock, Thread
+from time import monotonic
+from typing import Any, AnyStr, Callable, Dict, Iterable, Iterator, Optional, Tuple
 
 try:
     from libs.my.core.defaults import RETRIES
     from libs.my.core.meta.dummy_object import DummyObject
-    from libs.my.core.network.proxy import Proxy
+    from libs.my.core.network.proxy import Proxy, ProxyType
+    from libs.my.core.network.timing import Histogram
 except ModuleNotFoundError:
     from core.defaults import RETRIES
     from core.meta.dummy_object import DummyObject
-    from core.network.proxy import Proxy
+    from core.network.proxy import Proxy, ProxyType
+    from core.network.timing import Histogram
+
+
+# Weight of newest sample in proxy latency and success rate moving averages
+SCORE_ALPHA = 0.2
+# Assumed latency in seconds of proxies without successful requests yet
+SCORE_DEFAULT_LATENCY = 1.0
+SCORE_MIN_LATENCY = 0.01
+# Share of scored picks made uniformly at random so low scored proxies get retried and can recover
+SCORE_EXPLORATION_RATE = 0.05
+QUARANTINE_MAX_COUNT = 5
+QUARANTINE_RECHECK_WORKERS = 4
+SNAPSHOT_VERSION = 1
+CHECKPOINT_INTERVAL = 60
+# Proxy states in snapshot, proxies in use when snapshot was taken are restored as available
+SNAPSHOT_AVAILABLE = 0
+SNAPSHOT_IN_USE = 1
+SNAPSHOT_DEAD = 2
+SNAPSHOT_QUARANTINED = 3
+LEASE_REAP_INTERVAL = 5
+# Banned proxies skipped by popping on checkout for domain before remaining available ones are searched
+BAN_SKIP_LIMIT = 8
 
 
 class ProxyPoolError(Exception):
@@ -41,129 +70,971 @@ class ProxyRotationStrategy(Enum):
     CYCLE = 2  # Goes from first to last proxy on and on
     CHOICE = 3  # Picks random proxy, doesn't care if proxy is already in use, doesn't track failures
     DUMMY = 4  # Do not return proxy (used)
+    SCORED = 5  # Picks better scored of two random proxies, score favours fast proxies with high success rate
+
+
+class RandomProxies:
+    """Available proxies picked at random, O(1) pop and removal by swapping taken entry with the last one"""
+
+    def __init__(self):
+        self._entries = []
+        # Positions of entries by proxy string
+        self._positions = {}
+
+    def push(self, entry: Tuple[Proxy, int]):
+        """Adds proxy entry"""
+        self._positions[str(entry[0])] = len(self._entries)
+        self._entries.append(entry)
+
+    def pop(self) -> Tuple[Proxy, int]:
+        """Removes and returns random proxy entry"""
+        return self._take(randrange(len(self._entries)))
+
+    def remove(self, proxy_string: AnyStr) -> Optional[Tuple[Proxy, int]]:
+        """Removes and returns entry of proxy if present otherwise None"""
+        i = self._positions.get(proxy_string)
+
+        return self._take(i) if i is not None else None
+
+    def _take(self, i: int) -> Tuple[Proxy, int]:
+        """Removes and returns entry at position i, last entry takes its place"""
+        entries = self._entries
+        positions = self._positions
+        entry = entries[i]
+        proxy_string = str(entry[0])
+        if positions.get(proxy_string) == i:
+            del positions[proxy_string]
+        last_index = len(entries) - 1
+        last = entries.pop()
+        if i < last_index:
+            entries[i] = last
+            last_string = str(last[0])
+            if positions.get(last_string) == last_index:
+                positions[last_string] = i
+
+        return entry
+
+    def choice(self) -> Tuple[Proxy, int]:
+        """Returns random proxy entry without removing it"""
+        return self._entries[randrange(len(self._entries))]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Tuple[Proxy, int]]:
+        return iter(self._entries)
+
+
+class CycleProxies:
+    """Available proxies picked in order they were added or returned"""
+
+    def __init__(self):
+        # Entries by proxy string in pick order
+        self._entries = OrderedDict()
+
+    def push(self, entry: Tuple[Proxy, int]):
+        """Adds proxy entry"""
+        self._entries[str(entry[0])] = entry
+
+    def pop(self) -> Tuple[Proxy, int]:
+        """Removes and returns first proxy entry"""
+        return self._entries.popitem(last=False)[1]
+
+    def remove(self, proxy_string: AnyStr) -> Optional[Tuple[Proxy, int]]:
+        """Removes and returns entry of proxy if present otherwise None"""
+        return self._entries.pop(proxy_string, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Tuple[Proxy, int]]:
+        return iter(self._entries.values())
+
+
+class ScoredProxies(RandomProxies):
+    """Available proxies picked by power of two choices, better scored of two random proxies wins, with share of
+    uniformly random picks for exploration"""
+
+    def __init__(self, score: Callable[[Proxy], float], exploration_rate: float = SCORE_EXPLORATION_RATE):
+        super().__init__()
+        self._score = score
+        self._exploration_rate = exploration_rate
+
+    def pop(self) -> Tuple[Proxy, int]:
+        """Removes and returns better scored of two random proxy entries"""
+        entries = self._entries
+        i = randrange(len(entries))
+        if len(entries) > 1 and random() >= self._exploration_rate:
+            j = randrange(len(entries))
+            if self._score(entries[j][0]) > self._score(entries[i][0]):
+                i = j
+
+        return self._take(i)
+
+
+class ProxyScore:
+    """Exponentially weighted moving averages of proxy latency and success rate"""
+
+    def __init__(self, alpha: float = SCORE_ALPHA):
+        self._alpha = alpha
+        self.latency = None
+        self.success_rate = 1.0
+        self.samples = 0
+
+    def update(self, success: bool, latency: Optional[float] = None):
+        """Adds request outcome, latency is averaged for successful requests only"""
+        self.samples += 1
+        self.success_rate += self._alpha * ((1.0 if success else 0.0) - self.success_rate)
+        if success and latency is not None:
+            if self.latency is None:
+                self.latency = latency
+            else:
+                self.latency += self._alpha * (latency - self.latency)
+
+    @property
+    def value(self) -> float:
+        """Returns score, expected successful requests per second"""
+        latency = self.latency if self.latency is not None else SCORE_DEFAULT_LATENCY
+
+        return self.success_rate / max(latency, SCORE_MIN_LATENCY)
+
+    def to_dict(self) -> Dict:
+        """Returns score summary"""
+        return {
+            "latency": self.latency,
+            "success_rate": self.success_rate,
+            "samples": self.samples,
+            "score": self.value,
+        }
+
+    def state(self) -> list:
+        """Returns compact score state"""
+        return [self.latency, self.success_rate, self.samples]
+
+    @classmethod
+    def from_state(cls, state: list) -> "ProxyScore":
+        """Returns score restored from compact state"""
+        score = cls()
+        score.latency, score.success_rate, score.samples = state
+
+        return score
+
+
+class RandomUniqueProxies:
+    """Available proxies picked at random once per epoch, epoch ends when every live proxy was picked. Proxies
+    picked in current epoch wait in next epoch list, proxies picked in a past epoch rejoin current one"""
+
+    def __init__(self):
+        self._current = RandomProxies()
+        self._next = RandomProxies()
+        self._epoch = 0
+
+    @property
+    def epoch(self) -> int:
+        """Returns current epoch number"""
+        return self._epoch
+
+    def push(self, entry: Tuple[Proxy, int], epoch: Optional[int] = None):
+        """Adds proxy entry picked in given epoch, new proxies join current epoch"""
+        if epoch == self._epoch:
+            self._next.push(entry)
+        else:
+            self._current.push(entry)
+
+    def pop(self) -> Tuple[Proxy, int]:
+        """Removes and returns random proxy entry not yet picked in current epoch, starts new epoch if there
+        is none"""
+        if len(self._current) == 0:
+            self._current, self._next = self._next, self._current
+            self._epoch += 1
+
+        return self._current.pop()
+
+    def remove(self, proxy_string: AnyStr) -> Optional[Tuple[Proxy, int]]:
+        """Removes and returns entry of proxy if present otherwise None"""
+        entry = self._current.remove(proxy_string)
+
+        return entry if entry is not None else self._next.remove(proxy_string)
+
+    def __len__(self) -> int:
+        return len(self._current) + len(self._next)
+
+    def __iter__(self) -> Iterator[Tuple[Proxy, int]]:
+        yield from self._current
+        yield from self._next
+
+
+class ProxyLease:
+    """Checked out proxy, lease with lease time expires unless renewed and its proxy is then reclaimed by pool
+    reaper. Releasing returns proxy to pool, releasing or renewing lease already reclaimed is ignored"""
+
+    def __init__(
+        self,
+        pool: "ProxyPool",
+        proxy: Optional[Proxy],
+        retries: int,
+        epoch: Optional[int] = None,
+        domain: Optional[AnyStr] = None,
+        lease_time: Optional[float] = None,
+    ):
+        self._pool = pool
+        self.proxy = proxy
+        self.retries = retries
+        self.epoch = epoch
+        self.domain = domain
+        self.lease_time = lease_time
+        self.start_time = monotonic()
+        self.deadline = self.start_time + lease_time if lease_time is not None else None
+
+    @property
+    def expired(self) -> bool:
+        """Returns True if lease deadline passed otherwise False"""
+        return self.deadline is not None and self.deadline <= monotonic()
+
+    def renew(self, lease_time: Optional[float] = None) -> bool:
+        """Extends lease by lease time or by its own lease time, returns False if lease is no longer held"""
+        return self._pool.renew_lease(self, lease_time)
+
+    def release(self, failures: int = 0) -> bool:
+        """Returns proxy to pool with new failures count, returns False if lease is no longer held"""
+        return self._pool.release_lease(self, failures)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.release()
+
+    def __repr__(self):
+        return f"<ProxyLease {self.proxy} retries={self.retries} deadline={self.deadline}>"
 
 
 class ProxyPool:
-    """Proxy pool, thread-safe class for managing multiple proxies"""
+    """Proxy pool, thread-safe class for managing multiple proxies. When quarantine time is set, proxies reaching
+    maximum retries are quarantined for quarantine time doubled on every further quarantine and re-admitted with
+    zero retries, optionally only if recheck callable returns True for them. Proxies quarantined max quarantines
+    times are dead. Checked out proxies are held by leases, leases expire after lease time unless renewed and
+    expired ones are reclaimed by reap"""
 
-    def __init__(self, proxies: Iterable[Proxy], max_retries: int = RETRIES):
+    def __init__(
+        self,
+        proxies: Iterable[Proxy],
+        max_retries: int = RETRIES,
+        quarantine_time: Optional[float] = None,
+        max_quarantines: int = QUARANTINE_MAX_COUNT,
+        recheck: Optional[Callable[[Proxy], bool]] = None,
+        lease_time: Optional[float] = None,
+    ):
         self._lock = Lock()
         self._max_retries = max_retries
         self._rotation_strategy = ProxyRotationStrategy.RANDOM
-        self._available_proxies = []
+        self._available_proxies = RandomProxies()
+        # Leases of proxies in use by proxy string
         self._in_use_proxies = {}
+        self._lease_time = lease_time
+        self._lease_times = Histogram()
+        self._reclaimed = 0
+        self._stale_returns = 0
+        self._reaper_stop = None
+        self._reaper_thread = None
+        # Callables notified whenever proxy may have become available
+        self._listeners = []
         self._dead_proxies = []
-
-        self._available_count = 0
-        self._in_use_count = 0
-        self._live_count = 0
-        self._dead_count = 0
-        self._total_count = 0
+        self._scores = {}
+        # Conditions of threads waiting for available proxy, served first come first served
+        self._waiters = deque()
+        self._wait_times = Histogram()
+        self._waits = 0
+        self._timeouts = 0
+        self._checkpoint_stop = None
+        self._checkpoint_thread = None
+        self._quarantine_time = quarantine_time
+        self._max_quarantines = max_quarantines
+        self._recheck = recheck
+        # Heap of (release time, sequence number, proxy) entries
+        self._quarantine = []
+        self._quarantine_sequence = 0
+        self._quarantine_counts = {}
+        self._rechecking = {}
+        self._recheck_executor = None
+        self._released = 0
+        self._recheck_failures = 0
+        # Proxy bans per domain, mapping of proxy strings to ban end time or None for permanent ban
+        self._bans = {}
+        # Sticky proxy entries kept for their domains while not in use
+        self._sticky_proxies = {}
 
         for proxy in proxies:
             self.add_proxy(proxy)
 
-    def _update_counts(self):
-        """Updates all tracking proxy count numbers"""
-        self._available_count = len(self._available_proxies)
-        self._in_use_count = len(self._in_use_proxies)
-        self._live_count = self._available_count + self._in_use_count
-        self._dead_count = len(self._dead_proxies)
-        self._total_count = self._live_count + self._dead_count
+    def _new_available_proxies(self, rotation_strategy: ProxyRotationStrategy) -> Any:
+        """Returns available proxies container for rotation strategy"""
+        if rotation_strategy == ProxyRotationStrategy.SCORED:
+            return ScoredProxies(self._score)
+        if rotation_strategy == ProxyRotationStrategy.CYCLE:
+            return CycleProxies()
+        if rotation_strategy == ProxyRotationStrategy.RANDOM_UNIQUE:
+            return RandomUniqueProxies()
+
+        return RandomProxies()
+
+    def _score(self, proxy: Proxy) -> float:
+        """Returns proxy score, expects lock to be held"""
+        score = self._scores.get(str(proxy))
+
+        return score.value if score is not None else 1.0 / SCORE_DEFAULT_LATENCY
+
+    def report(self, proxy: Proxy, success: bool, latency: Optional[float] = None):
+        """Records request outcome and latency in seconds of proxy, feeds SCORED rotation strategy"""
+        if not isinstance(proxy, Proxy):
+            return
+        with self._lock:
+            proxy_string = str(proxy)
+            score = self._scores.get(proxy_string)
+            if score is None:
+                score = self._scores[proxy_string] = ProxyScore()
+            score.update(success, latency)
+
+    @property
+    def scores(self) -> Dict:
+        """Returns mapping of proxy strings to their score summaries"""
+        with self._lock:
+            return {proxy: score.to_dict() for proxy, score in self._scores.items()}
+
+    def _pop_available(self, domain: Optional[AnyStr]) -> Tuple[Proxy, int]:
+        """Removes and returns next available entry not banned on domain, skips at most BAN_SKIP_LIMIT banned
+        entries before searching the remaining ones, expects lock to be held and such entry to exist"""
+        available_proxies = self._available_proxies
+        if domain is None or not self._bans.get(domain):
+            return available_proxies.pop()
+        skipped = []
+        try:
+            for _ in range(min(BAN_SKIP_LIMIT, len(available_proxies))):
+                entry = available_proxies.pop()
+                if self._allowed(entry[0], domain):
+                    return entry
+                skipped.append(entry)
+            entry = next(self._allowed_entries(domain))
+
+            return available_proxies.remove(str(entry[0]))
+        finally:
+            for entry in skipped:
+                available_proxies.push(entry)
+
+    def _epoch(self) -> Optional[int]:
+        """Returns current epoch of random unique rotation otherwise None, expects lock to be held"""
+        return getattr(self._available_proxies, "epoch", None)
 
     def add_proxy(self, proxy: Proxy):
         """Adds valid proxy to available list, associates an user agent to a proxy"""
         if isinstance(proxy, Proxy):
-            self._available_proxies.append((proxy, 0))
-            self._update_counts()
+            with self._lock:
+                self._available_proxies.push((proxy, 0))
+                self._notify_waiter()
+
+    def add_proxies(self, proxies: Iterable[Proxy]):
+        """Adds valid proxies to available list at once"""
+        with self._lock:
+            for proxy in proxies:
+                if isinstance(proxy, Proxy):
+                    self._available_proxies.push((proxy, 0))
+            self._notify_waiter()
+
+    def _depleted(self) -> bool:
+        """Returns True if pool has no live proxies and none will be re-admitted otherwise False, expects lock to
+        be held"""
+        return self.live_count == 0 and not self._quarantine and not self._rechecking
+
+    def _retire(self, proxy: Proxy, retries: int):
+        """Quarantines proxy that reached maximum retries or marks it dead, expects lock to be held"""
+        proxy_string = str(proxy)
+        quarantines = self._quarantine_counts.get(proxy_string, 0)
+        if self._quarantine_time is None or quarantines >= self._max_quarantines:
+            self._dead_proxies.append((proxy, retries))
+            return
+        self._quarantine_counts[proxy_string] = quarantines + 1
+        self._quarantine_sequence += 1
+        release_time = monotonic() + self._quarantine_time * 2 ** quarantines
+        heappush(self._quarantine, (release_time, self._quarantine_sequence, proxy))
+        if self._waiters and self._quarantine[0][2] is proxy:
+            # First waiting thread sleeps until earlier deadline, wakes it up to wait for this release instead
+            self._waiters[0].notify()
+
+    def _release_quarantined(self):
+        """Re-admits or hands over to recheck proxies whose quarantine has ended, expects lock to be held"""
+        now = monotonic()
+        while self._quarantine and self._quarantine[0][0] <= now:
+            _, _, proxy = heappop(self._quarantine)
+            if self._recheck is None:
+                self._readmit(proxy)
+                continue
+            if self._recheck_executor is None:
+                self._recheck_executor = ThreadPoolExecutor(max_workers=QUARANTINE_RECHECK_WORKERS)
+            self._rechecking[str(proxy)] = proxy
+            self._recheck_executor.submit(self._recheck_quarantined, proxy)
+
+    def _readmit(self, proxy: Proxy):
+        """Puts released proxy back to available ones with zero retries, expects lock to be held"""
+        self._available_proxies.push((proxy, 0))
+        self._released += 1
+        self._notify_waiter()
+
+    def _recheck_quarantined(self, proxy: Proxy):
+        """Re-admits proxy if it passes recheck otherwise quarantines it again"""
+        try:
+            passed = self._recheck(proxy)
+        except Exception:
+            passed = False
+        with self._lock:
+            self._rechecking.pop(str(proxy), None)
+            if passed:
+                self._readmit(proxy)
+            else:
+                self._recheck_failures += 1
+                self._retire(proxy, self._max_retries)
+                self._notify_waiter()
+
+    def _next_release_time(self) -> Optional[float]:
+        """Returns time of next quarantine release or None, expects lock to be held"""
+        return self._quarantine[0][0] if self._quarantine else None
+
+    def _allowed(self, proxy: Proxy, domain: Optional[AnyStr]) -> bool:
+        """Returns True if proxy isn't banned on domain otherwise False, drops expired ban, expects lock to be
+        held"""
+        bans = self._bans.get(domain) if domain is not None else None
+        if not bans:
+            return True
+        proxy_string = str(proxy)
+        if proxy_string not in bans:
+            return True
+        until = bans[proxy_string]
+        if until is not None and until <= monotonic():
+            del bans[proxy_string]
+            return True
+
+        return False
+
+    def _allowed_entries(self, domain: AnyStr) -> Iterator[Tuple[Proxy, int]]:
+        """Yields available entries not banned on domain, expects lock to be held"""
+        bans = self._bans.get(domain, {})
+        now = monotonic()
+        # Proxies without ban get end time 0 which is always over
+        for entry in self._available_proxies:
+            until = bans.get(str(entry[0]), 0)
+            if until is not None and until <= now:
+                yield entry
 
-    def get_proxy(self, max_wait_time: float = 30) -> Tuple[Optional[Proxy], int]:
-        """Returns random proxy from list of available ones"""
+    def _servable(self, domain: Optional[AnyStr], sticky: bool) -> bool:
+        """Returns True if there is available proxy for domain otherwise False, expects lock to be held"""
+        if sticky and domain in self._sticky_proxies:
+            return True
+        if not self.has_available_proxies():
+            return False
+        bans = self._bans.get(domain) if domain is not None else None
+        # More available proxies than banned ones means some is allowed
+        if not bans or len(self._available_proxies) > len(bans):
+            return True
+
+        return next(self._allowed_entries(domain), None) is not None
+
+    def _next_waiter(self) -> Optional[Condition]:
+        """Returns first waiting thread that can be served, expects lock to be held"""
+        for waiter in self._waiters:
+            if self._servable(waiter.domain, waiter.sticky):
+                return waiter
+
+        return None
+
+    def _notify_waiter(self):
+        """Wakes up first waiting thread that can be served, or every waiting thread if pool is depleted, expects
+        lock to be held"""
+        for listener in self._listeners:
+            listener()
+        if not self._waiters:
+            return
+        if self._depleted():
+            for waiter in self._waiters:
+                waiter.notify()
+            return
+        waiter = self._next_waiter()
+        if waiter is not None:
+            waiter.notify()
+
+    def _checkout(
+        self, domain: Optional[AnyStr] = None, sticky: bool = False, lease_time: Optional[float] = None
+    ) -> ProxyLease:
+        """Moves next available proxy not banned on domain to in use ones and returns its lease, sticky proxy of
+        domain is preferred, expects lock to be held"""
+        if sticky and domain in self._sticky_proxies:
+            proxy, retries = self._sticky_proxies.pop(domain)
+        else:
+            proxy, retries = self._pop_available(domain)
+        if lease_time is None:
+            lease_time = self._lease_time
+        lease = ProxyLease(self, proxy, retries, self._epoch(), domain if sticky else None, lease_time)
+        self._in_use_proxies[str(proxy)] = lease
+
+        return lease
+
+    def get_proxy(
+        self, max_wait_time: float = 30, domain: Optional[AnyStr] = None, sticky: bool = False
+    ) -> Tuple[Optional[Proxy], int]:
+        """Returns proxy from available ones by rotation strategy and its retries count, see lease"""
         if self.rotation_strategy == ProxyRotationStrategy.CHOICE:
-            return choice(self._available_proxies)
+            with self._lock:
+                return self._available_proxies.choice()
         elif self.rotation_strategy == ProxyRotationStrategy.DUMMY:
             return None, 0
-        if self.live_count == 0:
-            raise ProxyPoolDepletedError()
-        start_time = int(time())
-        proxy, retries = None, 0
-        i = 0
-        while True:
-            if int(time()) - start_time > max_wait_time:
-                raise ProxyPoolTimeoutError
-            if i > 0:
-                sleep(3)
-            i += 1
-            with self._lock:
-                if not self.has_available_proxies():
-                    continue
-                # FIXME: resizing lists is slow, find other approach
-                if self._rotation_strategy == ProxyRotationStrategy.CYCLE:
-                    proxy, retries = self._available_proxies.pop(0)
-                # TODO: implement random unique strategy
-                elif self._rotation_strategy == ProxyRotationStrategy.RANDOM_UNIQUE:
-                    proxy, retries = self._available_proxies.pop(
-                        randrange(self._available_count)
-                    )
-                else:
-                    proxy, retries = self._available_proxies.pop(
-                        randrange(self._available_count)
-                    )
-                self._in_use_proxies[str(proxy)] = (proxy, retries)
-                self._update_counts()
-                if proxy is not None:
-                    break
-
-        return proxy, retries
+        lease = self.lease(max_wait_time, domain, sticky)
+
+        return lease.proxy, lease.retries
+
+    def try_lease(
+        self, domain: Optional[AnyStr] = None, sticky: bool = False, lease_time: Optional[float] = None
+    ) -> Optional[ProxyLease]:
+        """Returns lease of proxy like lease without blocking or None if no proxy can be taken right away, waiting
+        threads are served first"""
+        if self.rotation_strategy in (ProxyRotationStrategy.CHOICE, ProxyRotationStrategy.DUMMY):
+            return ProxyLease(self, *self.get_proxy(0))
+        sticky = sticky and domain is not None
+        with self._lock:
+            self._release_quarantined()
+            if self._depleted():
+                raise ProxyPoolDepletedError()
+            if self._next_waiter() is None and self._servable(domain, sticky):
+                return self._checkout(domain, sticky, lease_time)
+
+        return None
+
+    def add_listener(self, listener: Callable[[], Any]):
+        """Registers callable called whenever proxy may have become available or pool got depleted, it's called
+        with pool lock held so it must not block or use pool"""
+        with self._lock:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[], Any]):
+        """Unregisters listener"""
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    @property
+    def release_delay(self) -> Optional[float]:
+        """Returns seconds until next quarantined proxy release or None if none is quarantined"""
+        with self._lock:
+            release_time = self._next_release_time()
+
+        return max(0, release_time - monotonic()) if release_time is not None else None
+
+    def lease(
+        self,
+        max_wait_time: float = 30,
+        domain: Optional[AnyStr] = None,
+        sticky: bool = False,
+        lease_time: Optional[float] = None,
+    ) -> ProxyLease:
+        """Returns lease of proxy from available ones by rotation strategy, skipping proxies banned on domain if
+        given, blocks up to max_wait_time seconds until one is returned or added, waiting threads are served in
+        arrival order. Sticky proxy is kept for domain when returned and handed out again to next sticky request
+        for domain. Lease expires after lease time, pool lease time by default"""
+        if self.rotation_strategy in (ProxyRotationStrategy.CHOICE, ProxyRotationStrategy.DUMMY):
+            # Proxies aren't checked out, lease isn't held
+            return ProxyLease(self, *self.get_proxy(max_wait_time))
+        sticky = sticky and domain is not None
+        with self._lock:
+            self._release_quarantined()
+            if self._depleted():
+                raise ProxyPoolDepletedError()
+            if self._next_waiter() is None and self._servable(domain, sticky):
+                self._wait_times.add(0)
+                return self._checkout(domain, sticky, lease_time)
+            start_time = monotonic()
+            deadline = start_time + max_wait_time
+            waiter = Condition(self._lock)
+            waiter.domain = domain
+            waiter.sticky = sticky
+            self._waiters.append(waiter)
+            self._waits += 1
+            try:
+                while True:
+                    self._release_quarantined()
+                    if self._depleted():
+                        raise ProxyPoolDepletedError()
+                    if self._next_waiter() is waiter:
+                        break
+                    now = monotonic()
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise ProxyPoolTimeoutError()
+                    # Wake up for next quarantine release as well
+                    release_time = self._next_release_time()
+                    if release_time is not None:
+                        remaining = min(remaining, max(0, release_time - now))
+                    waiter.wait(remaining)
+            except BaseException:
+                self._waiters.remove(waiter)
+                self._wait_times.add(monotonic() - start_time)
+                self._notify_waiter()
+                raise
+            self._waiters.remove(waiter)
+            self._wait_times.add(monotonic() - start_time)
+            lease = self._checkout(domain, sticky, lease_time)
+            self._notify_waiter()
+
+            return lease
+
+    def _release(self, lease: ProxyLease, failures: int):
+        """Ends lease, puts its proxy back to available ones, keeps it for its sticky domain or retires it if it
+        reached maximum retries, expects lock to be held"""
+        proxy = lease.proxy
+        del self._in_use_proxies[str(proxy)]
+        self._lease_times.add(monotonic() - lease.start_time)
+        retries = lease.retries + failures
+        domain = lease.domain
+        if retries >= self._max_retries:
+            self._retire(proxy, retries)
+        elif domain is not None and domain not in self._sticky_proxies and self._allowed(proxy, domain):
+            self._sticky_proxies[domain] = (proxy, retries)
+        elif lease.epoch is not None and lease.epoch == self._epoch():
+            self._available_proxies.push((proxy, retries), lease.epoch)
+        else:
+            self._available_proxies.push((proxy, retries))
+        self._notify_waiter()
 
     def return_proxy(self, proxy: Proxy, retries: int) -> bool:
         """Removes proxy from "in use" list, puts it back to "available" list or skips if proxy exceeds maximum retries
-         count"""
+         count, returns False if proxy isn't in use"""
         if self.rotation_strategy in (ProxyRotationStrategy.CHOICE, ProxyRotationStrategy.DUMMY):
             return True
+        if not isinstance(proxy, Proxy):
+            return False
         with self._lock:
-            proxy_string = str(proxy)
-            proxy_data = self._in_use_proxies.get(proxy_string)
-            del self._in_use_proxies[proxy_string]
-            _proxy, _retries = proxy_data
-            _retries += retries
-            if _retries < self._max_retries:
-                self._available_proxies.append((_proxy, _retries))
-            else:
-                self._dead_proxies.append((_proxy, _retries))
-            self._update_counts()
+            lease = self._in_use_proxies.get(str(proxy))
+            if lease is None:
+                self._stale_returns += 1
+                return False
+            self._release(lease, retries)
+
+        return True
+
+    def release_lease(self, lease: ProxyLease, failures: int = 0) -> bool:
+        """Returns leased proxy with new failures count, returns False if lease is no longer held"""
+        if self.rotation_strategy in (ProxyRotationStrategy.CHOICE, ProxyRotationStrategy.DUMMY):
+            return True
+        with self._lock:
+            if self._in_use_proxies.get(str(lease.proxy)) is not lease:
+                self._stale_returns += 1
+                return False
+            self._release(lease, failures)
 
         return True
 
+    def renew_lease(self, lease: ProxyLease, lease_time: Optional[float] = None) -> bool:
+        """Extends lease by lease time or by its own lease time, returns False if lease is no longer held"""
+        with self._lock:
+            if self._in_use_proxies.get(str(lease.proxy)) is not lease:
+                return False
+            if lease_time is not None:
+                lease.lease_time = lease_time
+            if lease.lease_time is not None:
+                lease.deadline = monotonic() + lease.lease_time
+
+        return True
+
+    def renew_proxy(self, proxy: Proxy, lease_time: Optional[float] = None) -> bool:
+        """Extends lease of proxy in use, returns False if proxy isn't in use"""
+        with self._lock:
+            lease = self._in_use_proxies.get(str(proxy)) if isinstance(proxy, Proxy) else None
+        if lease is None:
+            return False
+
+        return self.renew_lease(lease, lease_time)
+
+    def reap(self) -> int:
+        """Returns proxies of expired leases to pool without new failures and returns their count"""
+        with self._lock:
+            now = monotonic()
+            expired = [
+                lease for lease in self._in_use_proxies.values() if lease.deadline is not None and lease.deadline <= now
+            ]
+            for lease in expired:
+                self._release(lease, 0)
+            self._reclaimed += len(expired)
+
+        return len(expired)
+
+    def start_reaping(self, interval: float = LEASE_REAP_INTERVAL):
+        """Starts background thread reclaiming expired leases every interval seconds"""
+        if self._reaper_thread is not None:
+            return
+        self._reaper_stop = Event()
+        self._reaper_thread = Thread(target=self._reap_loop, args=(interval, self._reaper_stop), daemon=True)
+        self._reaper_thread.start()
+
+    def stop_reaping(self):
+        """Stops reaper thread"""
+        if self._reaper_thread is not None:
+            self._reaper_stop.set()
+            self._reaper_thread.join()
+            self._reaper_thread = None
+
+    def _reap_loop(self, interval: float, stop: Event):
+        while not stop.wait(interval):
+            self.reap()
+
+    @property
+    def lease_stats(self) -> Dict:
+        """Returns active, expired and reclaimed leases counts, returns of proxies not in use count and held
+        lease durations histogram summary"""
+        with self._lock:
+            now = monotonic()
+            return {
+                "active": len(self._in_use_proxies),
+                "expired": sum(
+                    1 for lease in self._in_use_proxies.values() if lease.deadline is not None and lease.deadline <= now
+                ),
+                "reclaimed": self._reclaimed,
+                "stale_returns": self._stale_returns,
+                "lease_time": self._lease_times.to_dict(),
+            }
+
+    def ban_proxy(self, proxy: Proxy, domain: AnyStr, ban_time: Optional[float] = None):
+        """Bans proxy on domain for ban time seconds or for good, proxy stays available for other domains"""
+        with self._lock:
+            proxy_string = str(proxy)
+            self._bans.setdefault(domain, {})[proxy_string] = monotonic() + ban_time if ban_time else None
+            sticky_entry = self._sticky_proxies.get(domain)
+            if sticky_entry is not None and str(sticky_entry[0]) == proxy_string:
+                del self._sticky_proxies[domain]
+                self._available_proxies.push(sticky_entry)
+                self._notify_waiter()
+
+    def unban_proxy(self, proxy: Proxy, domain: AnyStr):
+        """Lifts proxy ban on domain"""
+        with self._lock:
+            bans = self._bans.get(domain)
+            if bans is not None and bans.pop(str(proxy), False) is not False:
+                if not bans:
+                    del self._bans[domain]
+                self._notify_waiter()
+
+    def is_banned(self, proxy: Proxy, domain: AnyStr) -> bool:
+        """Returns True if proxy is banned on domain otherwise False"""
+        with self._lock:
+            return not self._allowed(proxy, domain)
+
+    def release_sticky(self, domain: Optional[AnyStr] = None):
+        """Returns sticky proxy kept for domain, or of all domains if domain is None, to available ones"""
+        with self._lock:
+            domains = [domain] if domain is not None else list(self._sticky_proxies)
+            for domain in domains:
+                entry = self._sticky_proxies.pop(domain, None)
+                if entry is not None:
+                    self._available_proxies.push(entry)
+            self._notify_waiter()
+
+    @property
+    def banned_count(self) -> int:
+        """Returns number of (proxy, domain) bans"""
+        with self._lock:
+            return sum(len(bans) for bans in self._bans.values())
+
+    @property
+    def sticky_count(self) -> int:
+        """Returns number of proxies kept for their domains"""
+        return len(self._sticky_proxies)
+
     @property
     def available_count(self) -> int:
         """Returns number of available proxies in proxy pool"""
-        return self._available_count
+        return len(self._available_proxies)
 
     @property
     def in_use_count(self) -> int:
         """Returns number of in use proxies in proxy pool"""
-        return self._in_use_count
+        return len(self._in_use_proxies)
 
     @property
     def live_count(self) -> int:
         """Returns number of live proxies in proxy pool"""
-        return self._live_count
+        return self.available_count + self.in_use_count + self.sticky_count
 
     @property
     def dead_count(self) -> int:
         """Returns number of dead proxies in proxy pool"""
-        return self._dead_count
+        return len(self._dead_proxies)
 
     @property
     def total_count(self) -> int:
         """Returns total number of proxies in proxy pool"""
-        return self._total_count
+        return self.live_count + self.quarantined_count + self.dead_count
+
+    @property
+    def quarantined_count(self) -> int:
+        """Returns number of quarantined proxies, including ones being rechecked"""
+        return len(self._quarantine) + len(self._rechecking)
+
+    @property
+    def quarantine_stats(self) -> Dict:
+        """Returns numbers of quarantined, rechecked, re-admitted and recheck failed proxies"""
+        with self._lock:
+            self._release_quarantined()
+            return {
+                "quarantined": len(self._quarantine),
+                "rechecking": len(self._rechecking),
+                "released": self._released,
+                "recheck_failures": self._recheck_failures,
+            }
+
+    @property
+    def waiting_count(self) -> int:
+        """Returns number of threads waiting for available proxy"""
+        return len(self._waiters)
+
+    @property
+    def wait_stats(self) -> Dict:
+        """Returns number of checkouts that had to wait, number of timed out ones and histogram of checkout wait
+        times in seconds"""
+        with self._lock:
+            return {
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+                "waiting": len(self._waiters),
+                "wait_time": self._wait_times.to_dict(),
+            }
 
     def has_available_proxies(self) -> bool:
         """Returns True if proxy pool has available proxies otherwise False"""
         return self.available_count > 0
 
+    def _snapshot(self) -> Dict:
+        """Returns JSON serializable pool state, expects lock to be held"""
+        proxies = []
+        for state, entries in (
+            (SNAPSHOT_AVAILABLE, self._available_proxies),
+            (SNAPSHOT_AVAILABLE, self._sticky_proxies.values()),
+            (SNAPSHOT_IN_USE, ((lease.proxy, lease.retries) for lease in self._in_use_proxies.values())),
+            (SNAPSHOT_DEAD, self._dead_proxies),
+        ):
+            for entry in entries:
+                proxy, retries = entry[0], entry[1]
+                proxies.append([
+                    proxy.ip,
+                    proxy.port,
+                    proxy.username,
+                    proxy.password,
+                    proxy.type == ProxyType.HTTPS,
+                    retries,
+                    state,
+                ])
+        # Proxies being rechecked are saved as quarantined with no cool-down left
+        now = monotonic()
+        release_times = {str(proxy): release_time for release_time, _, proxy in self._quarantine}
+        quarantined = [proxy for _, _, proxy in self._quarantine] + list(self._rechecking.values())
+        for proxy in quarantined:
+            proxies.append([
+                proxy.ip,
+                proxy.port,
+                proxy.username,
+                proxy.password,
+                proxy.type == ProxyType.HTTPS,
+                self._max_retries,
+                SNAPSHOT_QUARANTINED,
+                max(0, release_times.get(str(proxy), now) - now),
+            ])
+
+        return {
+            "version": SNAPSHOT_VERSION,
+            "max_retries": self._max_retries,
+            "rotation_strategy": self._rotation_strategy.name,
+            "proxies": proxies,
+            "scores": {proxy: score.state() for proxy, score in self._scores.items()},
+            "quarantines": self._quarantine_counts,
+            "bans": {
+                domain: {
+                    proxy: max(0, until - now) if until is not None else None for proxy, until in bans.items()
+                }
+                for domain, bans in self._bans.items()
+            },
+        }
+
+    def save(self, path: str):
+        """Writes available, in use, quarantined and dead proxies with their retries and quarantines counts and
+        scores to gzipped JSON file atomically"""
+        with self._lock:
+            snapshot = self._snapshot()
+        temp_path = f"{path}.tmp"
+        with gzip_open(temp_path, "wt", encoding="utf-8", compresslevel=1) as f:
+            dump(snapshot, f, separators=(",", ":"))
+        replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str, max_retries: Optional[int] = None, **kwargs: Any) -> "ProxyPool":
+        """Returns proxy pool restored from file written by save, proxies in use at save time are available
+        again, max_retries overrides saved one. Quarantine arguments are passed to pool, quarantined proxies
+        are dead if quarantine isn't enabled"""
+        with gzip_open(path, "rt", encoding="utf-8") as f:
+            snapshot = load(f)
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            raise ProxyPoolError(f"Unsupported proxy pool snapshot version: {snapshot.get('version')}")
+        pool = cls([], snapshot["max_retries"] if max_retries is None else max_retries, **kwargs)
+        pool.rotation_strategy = ProxyRotationStrategy[snapshot["rotation_strategy"]]
+        now = monotonic()
+        for ip, port, username, password, ssl, retries, state, *quarantine in snapshot["proxies"]:
+            entry = (Proxy(ip, port, username, password, ssl=ssl), retries)
+            if state == SNAPSHOT_QUARANTINED and pool._quarantine_time is not None:
+                pool._quarantine_sequence += 1
+                heappush(pool._quarantine, (now + quarantine[0], pool._quarantine_sequence, entry[0]))
+            elif state in (SNAPSHOT_DEAD, SNAPSHOT_QUARANTINED) or retries >= pool._max_retries:
+                pool._dead_proxies.append(entry)
+            else:
+                pool._available_proxies.push(entry)
+        pool._quarantine_counts = snapshot.get("quarantines", {})
+        pool._bans = {
+            domain: {proxy: now + remaining if remaining is not None else None for proxy, remaining in bans.items()}
+            for domain, bans in snapshot.get("bans", {}).items()
+        }
+        pool._scores = {proxy: ProxyScore.from_state(state) for proxy, state in snapshot["scores"].items()}
+
+        return pool
+
+    def start_checkpointing(self, path: str, interval: float = CHECKPOINT_INTERVAL):
+        """Starts background thread saving pool to path every interval seconds"""
+        if self._checkpoint_thread is not None:
+            return
+        self._checkpoint_stop = Event()
+        self._checkpoint_thread = Thread(
+            target=self._checkpoint, args=(path, interval, self._checkpoint_stop), daemon=True
+        )
+        self._checkpoint_thread.start()
+
+    def stop_checkpointing(self, path: Optional[str] = None):
+        """Stops checkpointing thread, saves final snapshot to path if given"""
+        if self._checkpoint_thread is not None:
+            self._checkpoint_stop.set()
+            self._checkpoint_thread.join()
+            self._checkpoint_thread = None
+        if path is not None:
+            self.save(path)
+
+    def close(self):
+        """Stops reaper and checkpointing threads and shuts down quarantine recheck workers once running rechecks
+        finish"""
+        self.stop_reaping()
+        self.stop_checkpointing()
+        with self._lock:
+            recheck_executor, self._recheck_executor = self._recheck_executor, None
+        if recheck_executor is not None:
+            recheck_executor.shutdown(wait=True)
+
+    def _checkpoint(self, path: str, interval: float, stop: Event):
+        while not stop.wait(interval):
+            try:
+                self.save(path)
+            except OSError:
+                pass
+
     @property
     def rotation_strategy(self) -> ProxyRotationStrategy:
         """Returns proxy rotation strategy"""
@@ -171,5 +1042,11 @@ class ProxyPool:
 
     @rotation_strategy.setter
     def rotation_strategy(self, rotation_strategy: ProxyRotationStrategy):
-        """Sets proxy rotation strategy"""
-        self._rotation_strategy = rotation_strategy
+        """Sets proxy rotation strategy, rebuilds available proxies for it"""
+        with self._lock:
+            available_proxies = self._new_available_proxies(rotation_strategy)
+            if type(available_proxies) is not type(self._available_proxies):
+                for entry in self._available_proxies:
+                    available_proxies.push(entry)
+                self._available_proxies = available_proxies
+            self._rotation_strategy = rotation_strategy
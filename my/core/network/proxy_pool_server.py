@@ -0,0 +1,329 @@
+from collections import deque
+from json import dumps, loads
+from os import remove
+from os.path import exists
+from socket import AF_INET, AF_UNIX, SOCK_STREAM, socket
+from socketserver import StreamRequestHandler, ThreadingTCPServer, ThreadingUnixStreamServer
+from threading import Condition, Lock
+from time import monotonic
+from typing import Any, AnyStr, Dict, Optional, Tuple, Union
+
+try:
+    from libs.my.core.network.background_server import BackgroundServer
+    from libs.my.core.network.proxy import Proxy, ProxyType
+    from libs.my.core.network.proxy_pool import (
+        ProxyPool, ProxyPoolDepletedError, ProxyPoolError, ProxyPoolTimeoutError
+    )
+except ModuleNotFoundError:
+    from core.network.background_server import BackgroundServer
+    from core.network.proxy import Proxy, ProxyType
+    from core.network.proxy_pool import ProxyPool, ProxyPoolDepletedError, ProxyPoolError, ProxyPoolTimeoutError
+
+
+# Client polls server for proxies freed by other processes with backoff between these intervals
+POLL_MIN_INTERVAL = 0.01
+POLL_MAX_INTERVAL = 0.25
+ERRORS = {
+    "ProxyPoolError": ProxyPoolError,
+    "ProxyPoolTimeoutError": ProxyPoolTimeoutError,
+    "ProxyPoolDepletedError": ProxyPoolDepletedError,
+}
+
+
+class ProxyPoolServerError(ProxyPoolError):
+    """Raised when proxy pool server can't be reached or answers with invalid response"""
+
+    pass
+
+
+def _proxy_row(proxy: Proxy) -> list:
+    """Returns proxy as JSON serializable row"""
+    return [proxy.ip, proxy.port, proxy.username, proxy.password, proxy.type == ProxyType.HTTPS]
+
+
+def _row_proxy(row: list) -> Proxy:
+    """Returns interned proxy from row so proxies passed back and forth share one object"""
+    ip, port, username, password, ssl = row
+
+    return Proxy.intern(Proxy(ip, port, username, password, ssl=ssl))
+
+
+class _ProxyPoolRequestHandler(StreamRequestHandler):
+    """Serves newline delimited JSON requests of one client connection, proxies leased by connection and not
+    returned are returned to pool when connection closes. Connection returns and renews only its own leases, others
+    are stale"""
+
+    server: Union["_UnixPoolServer", "_TCPPoolServer"]
+
+    def handle(self):
+        pool = self.server.proxy_pool
+        leases = {}
+        try:
+            for line in self.rfile:
+                try:
+                    request = loads(line)
+                    result = self._dispatch(pool, request, leases)
+                    response = {"ok": True, "result": result}
+                except ProxyPoolError as e:
+                    response = {"ok": False, "error": type(e).__name__, "message": str(e)}
+                except (ValueError, KeyError, TypeError) as e:
+                    response = {"ok": False, "error": "ProxyPoolError", "message": f"Invalid request: {e}"}
+                self.wfile.write(dumps(response, separators=(",", ":")).encode() + b"\n")
+                self.wfile.flush()
+        except OSError:
+            pass
+        finally:
+            for lease in leases.values():
+                pool.release_lease(lease, 0)
+
+    @staticmethod
+    def _dispatch(pool: ProxyPool, request: Dict, leases: Dict) -> Any:
+        """Performs requested pool operation and returns its result"""
+        op = request["op"]
+        if op == "get":
+            # First proxy waits, the rest of batch is taken only if available right away
+            rows = []
+            max_wait_time = request.get("max_wait_time", 30)
+            domain = request.get("domain")
+            sticky = request.get("sticky", False)
+            for _ in range(request.get("count", 1)):
+                try:
+                    if max_wait_time > 0:
+                        lease = pool.lease(max_wait_time, domain, sticky)
+                    else:
+                        lease = pool.try_lease(domain, sticky)
+                        if lease is None:
+                            raise ProxyPoolTimeoutError()
+                except ProxyPoolError:
+                    if not rows:
+                        raise
+                    break
+                max_wait_time = 0
+                leases[str(lease.proxy)] = lease
+                rows.append(_proxy_row(lease.proxy) + [lease.retries])
+            return rows
+        if op == "return":
+            # Returns are True for released leases of connection, False for stale ones
+            results = []
+            for *row, retries in request["proxies"]:
+                lease = leases.pop(str(_row_proxy(row)), None)
+                results.append(lease is not None and pool.release_lease(lease, retries))
+            return results
+        if op == "report":
+            for *row, success, latency in request["reports"]:
+                pool.report(_row_proxy(row), success, latency)
+            return None
+        if op == "renew":
+            lease = leases.get(str(_row_proxy(request["proxy"])))
+            return lease is not None and pool.renew_lease(lease, request.get("lease_time"))
+        if op == "ban":
+            pool.ban_proxy(_row_proxy(request["proxy"]), request["domain"], request.get("ban_time"))
+            return None
+        if op == "stats":
+            return {
+                "available": pool.available_count,
+                "in_use": pool.in_use_count,
+                "dead": pool.dead_count,
+                "total": pool.total_count,
+            }
+        raise ValueError(f"unknown operation {op}")
+
+
+class _UnixPoolServer(ThreadingUnixStreamServer):
+    daemon_threads = True
+    proxy_pool = None
+
+
+class _TCPPoolServer(ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    proxy_pool = None
+
+
+class ProxyPoolServer(BackgroundServer):
+    """Shares proxy pool with other processes over Unix domain socket path or local TCP (host, port) address"""
+
+    def __init__(self, proxy_pool: ProxyPool, address: Union[AnyStr, Tuple[AnyStr, int]]):
+        if isinstance(address, str):
+            if exists(address):
+                remove(address)
+            super().__init__(_UnixPoolServer(address, _ProxyPoolRequestHandler))
+        else:
+            super().__init__(_TCPPoolServer(address, _ProxyPoolRequestHandler))
+        self._server.proxy_pool = proxy_pool
+        self._address = address
+
+    def serve_forever(self):
+        """Serves in current thread until shutdown"""
+        self._server.serve_forever()
+
+    def stop(self):
+        """Stops serving, closes server socket and removes socket file"""
+        super().stop()
+        if isinstance(self._address, str) and exists(self._address):
+            remove(self._address)
+
+
+class ProxyPoolClient:
+    """Thread-safe client of proxy pool server with ProxyPool get_proxy and return_proxy interface. Leases up to
+    batch size proxies per round trip and sends returns and reports in batches, close returns unused leases.
+    Server never blocks on client requests, client waits for proxies itself so other threads of the process can
+    return proxies meanwhile"""
+
+    def __init__(self, address: Union[AnyStr, Tuple[AnyStr, int]], batch_size: int = 1):
+        self._address = address
+        self._batch_size = batch_size
+        self._lock = Lock()
+        # Notified when proxy is returned by this process
+        self._returned = Condition(self._lock)
+        self._socket = None
+        self._file = None
+        self._leased = deque()
+        self._returns = []
+        self._reports = []
+
+    def _connect(self):
+        """Connects to server, expects lock to be held"""
+        if self._socket is not None:
+            return
+        family = AF_UNIX if isinstance(self._address, str) else AF_INET
+        self._socket = socket(family, SOCK_STREAM)
+        try:
+            self._socket.connect(self._address)
+        except OSError as e:
+            self._socket.close()
+            self._socket = None
+            raise ProxyPoolServerError(f"Can't connect to proxy pool server: {e}") from e
+        self._file = self._socket.makefile("rwb")
+
+    def _call(self, request: Dict) -> Any:
+        """Sends request and returns its result, raises pool error answered by server, expects lock to be held"""
+        self._connect()
+        try:
+            self._file.write(dumps(request, separators=(",", ":")).encode() + b"\n")
+            self._file.flush()
+            line = self._file.readline()
+        except OSError as e:
+            self._disconnect()
+            raise ProxyPoolServerError(f"Proxy pool server connection failed: {e}") from e
+        if not line:
+            self._disconnect()
+            raise ProxyPoolServerError("Proxy pool server closed connection")
+        response = loads(line)
+        if not response["ok"]:
+            raise ERRORS.get(response["error"], ProxyPoolError)(response["message"])
+
+        return response["result"]
+
+    def _disconnect(self):
+        """Closes connection, server returns proxies leased by it so leases and buffered returns are dropped,
+        expects lock to be held"""
+        if self._socket is not None:
+            self._file.close()
+            self._socket.close()
+            self._socket = None
+            self._file = None
+        self._leased.clear()
+        self._returns.clear()
+
+    def _flush(self):
+        """Sends buffered returns and reports, expects lock to be held"""
+        if self._returns:
+            returns, self._returns = self._returns, []
+            self._call({"op": "return", "proxies": returns})
+        if self._reports:
+            reports, self._reports = self._reports, []
+            self._call({"op": "report", "reports": reports})
+
+    def get_proxy(
+        self, max_wait_time: float = 30, domain: Optional[AnyStr] = None, sticky: bool = False
+    ) -> Tuple[Optional[Proxy], int]:
+        """Returns leased proxy and its retries count, leases new batch from server when none is left. Proxies for
+        domain are leased one at a time"""
+        with self._lock:
+            if domain is not None:
+                request = {"op": "get", "domain": domain, "sticky": sticky}
+                *row, retries = self._lease(request, max_wait_time)[0]
+
+                return _row_proxy(row), retries
+            if not self._leased:
+                self._leased.extend(self._lease({"op": "get", "count": self._batch_size}, max_wait_time))
+            *row, retries = self._leased.popleft()
+
+        return _row_proxy(row), retries
+
+    def _lease(self, request: Dict, max_wait_time: float) -> list:
+        """Leases proxies from server without blocking it, retries until max_wait_time passes, lock is released
+        between retries, expects lock to be held"""
+        deadline = monotonic() + max_wait_time
+        delay = POLL_MIN_INTERVAL
+        request = dict(request, max_wait_time=0)
+        while True:
+            self._flush()
+            try:
+                return self._call(request)
+            except ProxyPoolTimeoutError:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    raise
+            # Wakes up early when proxy is returned by other thread
+            self._returned.wait(min(delay, remaining))
+            delay = min(delay * 2, POLL_MAX_INTERVAL)
+
+    def return_proxy(self, proxy: Proxy, retries: int) -> bool:
+        """Returns proxy to server pool, returns are sent once batch size of them is buffered"""
+        with self._lock:
+            self._returns.append(_proxy_row(proxy) + [retries])
+            if len(self._returns) >= self._batch_size:
+                self._flush()
+            self._returned.notify()
+
+        return True
+
+    def report(self, proxy: Proxy, success: bool, latency: Optional[float] = None):
+        """Reports request outcome and latency of proxy to server pool, sent in batches"""
+        with self._lock:
+            self._reports.append(_proxy_row(proxy) + [success, latency])
+            if len(self._reports) >= self._batch_size:
+                self._flush()
+
+    def renew_proxy(self, proxy: Proxy, lease_time: Optional[float] = None) -> bool:
+        """Renews lease of proxy in server pool, returns False if proxy isn't in use"""
+        with self._lock:
+            return self._call({"op": "renew", "proxy": _proxy_row(proxy), "lease_time": lease_time})
+
+    def ban_proxy(self, proxy: Proxy, domain: AnyStr, ban_time: Optional[float] = None):
+        """Bans proxy on domain in server pool"""
+        with self._lock:
+            self._flush()
+            self._call({"op": "ban", "proxy": _proxy_row(proxy), "domain": domain, "ban_time": ban_time})
+
+    def flush(self):
+        """Sends buffered returns and reports"""
+        with self._lock:
+            self._flush()
+
+    @property
+    def stats(self) -> Dict:
+        """Returns server pool counts"""
+        with self._lock:
+            return self._call({"op": "stats"})
+
+    def close(self):
+        """Returns unused leased proxies, sends buffered returns and reports and closes connection"""
+        with self._lock:
+            if self._socket is None:
+                return
+            # Unused leases come back without new failures
+            self._returns.extend(row[:-1] + [0] for row in self._leased)
+            self._leased.clear()
+            try:
+                self._flush()
+            finally:
+                self._disconnect()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        self.close()
@@ -0,0 +1,212 @@
+from email.utils import parsedate_to_datetime
+from re import IGNORECASE, compile as re_compile
+from threading import Lock
+from time import monotonic, sleep, time
+from typing import AnyStr, Dict, Optional
+
+from requests import Response
+
+try:
+    from libs.my.core.defaults import DELAY
+except ModuleNotFoundError:
+    from core.defaults import DELAY
+
+
+THROTTLE_STATUSES = (413, 429, 503)
+MAX_RETRY_AFTER = 600
+
+regex_user_agent = re_compile(r"^\s*user-agent\s*:\s*(.*?)\s*$", IGNORECASE)
+regex_crawl_delay = re_compile(r"^\s*crawl-delay\s*:\s*(\d+(?:\.\d+)?)", IGNORECASE)
+
+
+class TokenBucket:
+    """Token bucket, refills rate tokens per second up to capacity"""
+
+    def __init__(self, rate: float, capacity: float = 1):
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._updated = monotonic()
+
+    def _refill(self, now: float):
+        """Adds tokens accumulated since last update"""
+        if now <= self._updated:
+            return
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def delay(self, now: float) -> float:
+        """Returns seconds until one token is available"""
+        self._refill(now)
+        if self._tokens >= 1:
+            return 0
+
+        return (1 - self._tokens) / self._rate
+
+    def consume(self):
+        """Takes one token from bucket"""
+        self._tokens -= 1
+
+    @property
+    def rate(self) -> float:
+        """Returns refill rate in tokens per second"""
+        return self._rate
+
+    @rate.setter
+    def rate(self, rate: float):
+        """Sets refill rate in tokens per second"""
+        self._refill(monotonic())
+        self._rate = rate
+
+
+class RateLimiter:
+    """Thread-safe politeness scheduler, keeps token bucket per host and optionally per proxy. Waiting for one
+    host doesn't block requests to other hosts"""
+
+    def __init__(
+        self,
+        rate: float = 1 / DELAY,
+        burst: float = 1,
+        proxy_rate: Optional[float] = None,
+        proxy_burst: float = 1,
+    ):
+        self._lock = Lock()
+        self._rate = rate
+        self._burst = burst
+        self._proxy_rate = proxy_rate
+        self._proxy_burst = proxy_burst
+        self._host_buckets = {}
+        self._proxy_buckets = {}
+        self._blocked_until = {}
+        self._crawl_delays = {}
+
+    def _host_bucket(self, host: AnyStr) -> TokenBucket:
+        """Returns token bucket for host"""
+        bucket = self._host_buckets.get(host)
+        if bucket is None:
+            crawl_delay = self._crawl_delays.get(host)
+            rate = min(self._rate, 1 / crawl_delay) if crawl_delay else self._rate
+            bucket = self._host_buckets[host] = TokenBucket(rate, self._burst)
+
+        return bucket
+
+    def _proxy_bucket(self, proxy: Optional[AnyStr]) -> Optional[TokenBucket]:
+        """Returns token bucket for proxy or None if proxies aren't limited"""
+        if proxy is None or self._proxy_rate is None:
+            return None
+        bucket = self._proxy_buckets.get(proxy)
+        if bucket is None:
+            bucket = self._proxy_buckets[proxy] = TokenBucket(self._proxy_rate, self._proxy_burst)
+
+        return bucket
+
+    def _delay(self, host: AnyStr, proxy: Optional[AnyStr], now: float) -> float:
+        """Returns seconds until request to host through proxy is allowed, expects lock to be held"""
+        delay = max(0, self._blocked_until.get(host, 0) - now)
+        delay = max(delay, self._host_bucket(host).delay(now))
+        proxy_bucket = self._proxy_bucket(proxy)
+        if proxy_bucket is not None:
+            delay = max(delay, proxy_bucket.delay(now))
+
+        return delay
+
+    def delay(self, host: AnyStr, proxy: Optional[AnyStr] = None) -> float:
+        """Returns seconds until request to host through proxy is allowed"""
+        with self._lock:
+            return self._delay(host, proxy, monotonic())
+
+    def try_acquire(self, host: AnyStr, proxy: Optional[AnyStr] = None) -> float:
+        """Takes request slot for host and proxy and returns 0 if allowed, otherwise returns seconds to wait"""
+        with self._lock:
+            delay = self._delay(host, proxy, monotonic())
+            if delay > 0:
+                return delay
+            self._host_bucket(host).consume()
+            proxy_bucket = self._proxy_bucket(proxy)
+            if proxy_bucket is not None:
+                proxy_bucket.consume()
+
+        return 0
+
+    def acquire(self, host: AnyStr, proxy: Optional[AnyStr] = None) -> float:
+        """Blocks until request to host through proxy is allowed, returns seconds waited"""
+        waited = 0
+        while True:
+            delay = self.try_acquire(host, proxy)
+            if delay == 0:
+                return waited
+            sleep(delay)
+            waited += delay
+
+    def block(self, host: AnyStr, seconds: float):
+        """Holds back all requests to host for given seconds"""
+        with self._lock:
+            until = monotonic() + min(seconds, MAX_RETRY_AFTER)
+            self._blocked_until[host] = max(self._blocked_until.get(host, 0), until)
+
+    def set_crawl_delay(self, host: AnyStr, seconds: float):
+        """Limits request rate for host to one request per crawl delay seconds"""
+        with self._lock:
+            self._crawl_delays[host] = seconds
+            if host in self._host_buckets and seconds > 0:
+                self._host_buckets[host].rate = min(self._rate, 1 / seconds)
+
+    def update(self, host: AnyStr, response: Response) -> bool:
+        """Reads throttling hints from response, returns True if host throttled the request otherwise False"""
+        if response.status_code not in THROTTLE_STATUSES:
+            return False
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        if retry_after is None:
+            with self._lock:
+                retry_after = 1 / self._host_bucket(host).rate
+        self.block(host, retry_after)
+
+        return True
+
+    @property
+    def blocked_hosts(self) -> Dict:
+        """Returns mapping of currently blocked hosts to remaining block seconds"""
+        now = monotonic()
+        with self._lock:
+            return {host: until - now for host, until in self._blocked_until.items() if until > now}
+
+
+def parse_retry_after(value: Optional[AnyStr]) -> Optional[float]:
+    """Returns seconds from Retry-After header value (delay seconds or HTTP date) otherwise None"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0, parsedate_to_datetime(value).timestamp() - time())
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_crawl_delay(robots_text: AnyStr, user_agent: AnyStr = "*") -> Optional[float]:
+    """Returns robots.txt crawl delay seconds for user agent, falls back to wildcard group, otherwise None"""
+    delays = {}
+    agents = []
+    in_rules = False
+    for line in robots_text.splitlines():
+        line = line.split("#", 1)[0]
+        match = regex_user_agent.match(line)
+        if match:
+            if in_rules:
+                agents = []
+                in_rules = False
+            agents.append(match.group(1).lower())
+            continue
+        if line.strip():
+            in_rules = True
+        match = regex_crawl_delay.match(line)
+        if match:
+            for agent in agents:
+                delays.setdefault(agent, float(match.group(1)))
+    user_agent = user_agent.lower()
+    for agent, delay in delays.items():
+        if agent != "*" and agent in user_agent:
+            return delay
+
+    return delays.get("*")
@@ -0,0 +1,299 @@
+from base64 import b64decode, b64encode
+from gzip import open as gzip_open
+from io import BytesIO
+from json import dumps, loads
+from os import replace
+from random import Random
+from threading import Lock
+from time import perf_counter, sleep
+from typing import IO, AnyStr, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from requests import PreparedRequest, Response
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, ReadTimeout
+from requests.packages.urllib3.response import HTTPResponse
+
+try:
+    from libs.my.core.network.connection import OriginalResponse
+    from libs.my.core.network.http_client import TimeoutHTTPAdapter
+except ModuleNotFoundError:
+    from core.network.connection import OriginalResponse
+    from core.network.http_client import TimeoutHTTPAdapter
+
+
+class RecordingError(Exception):
+    """Recording base error"""
+
+    pass
+
+
+class ExchangeNotFoundError(RecordingError, ConnectionError):
+    """Raised when replayed request has no recorded exchange"""
+
+    pass
+
+
+class Exchange:
+    """Recorded HTTP request and response, body is stored as transferred (still content encoded)"""
+
+    def __init__(
+        self,
+        method: AnyStr,
+        url: AnyStr,
+        status: int,
+        reason: AnyStr,
+        headers: List[Tuple[AnyStr, AnyStr]],
+        body: bytes,
+        elapsed: float,
+    ):
+        self.method = method
+        self.url = url
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+        self.elapsed = elapsed
+
+    @property
+    def key(self) -> Tuple[AnyStr, AnyStr]:
+        """Returns exchange lookup key"""
+        return self.method.upper(), self.url
+
+    def to_dict(self) -> Dict:
+        """Returns JSON serializable exchange"""
+        return {
+            "method": self.method,
+            "url": self.url,
+            "status": self.status,
+            "reason": self.reason,
+            "headers": self.headers,
+            "body": b64encode(self.body).decode("ascii"),
+            "elapsed": round(self.elapsed, 6),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "Exchange":
+        """Returns exchange from its JSON serializable form"""
+        return cls(
+            data["method"],
+            data["url"],
+            data["status"],
+            data["reason"],
+            [tuple(x) for x in data["headers"]],
+            b64decode(data["body"]),
+            data["elapsed"],
+        )
+
+
+def _path(url: AnyStr) -> AnyStr:
+    """Returns URL path with query"""
+    parts = urlsplit(url)
+
+    return f"{parts.path or '/'}?{parts.query}" if parts.query else parts.path or "/"
+
+
+class HttpArchive:
+    """Thread-safe collection of recorded exchanges stored as gzipped JSON lines, requests recorded more than
+    once are replayed in recorded order round robin. Exchanges are looked up by absolute URL or, for requests
+    served by mock server, by path with query of the first recorded URL having it"""
+
+    def __init__(self, exchanges: Optional[Iterable[Exchange]] = None):
+        self._lock = Lock()
+        self._exchanges = {}
+        self._positions = {}
+        self._paths = {}
+        self._count = 0
+        for exchange in exchanges or ():
+            self.add(exchange)
+
+    def add(self, exchange: Exchange):
+        """Adds recorded exchange"""
+        with self._lock:
+            self._exchanges.setdefault(exchange.key, []).append(exchange)
+            self._paths.setdefault((exchange.key[0], _path(exchange.url)), exchange.key)
+            self._count += 1
+
+    def find(self, method: AnyStr, url: AnyStr) -> Optional[Exchange]:
+        """Returns next recorded exchange for request by absolute URL or by path starting with slash or None"""
+        key = method.upper(), url
+        with self._lock:
+            if url.startswith("/"):
+                key = self._paths.get(key, key)
+            exchanges = self._exchanges.get(key)
+            if not exchanges:
+                return None
+            position = self._positions.get(key, 0)
+            self._positions[key] = (position + 1) % len(exchanges)
+
+        return exchanges[position]
+
+    @property
+    def exchanges(self) -> List[Exchange]:
+        """Returns all recorded exchanges"""
+        with self._lock:
+            return [x for exchanges in self._exchanges.values() for x in exchanges]
+
+    def __len__(self) -> int:
+        return self._count
+
+    def save(self, path: AnyStr):
+        """Writes archive to gzipped JSON lines file atomically"""
+        temp_path = f"{path}.tmp"
+        with gzip_open(temp_path, "wt", encoding="utf-8") as f:
+            for exchange in self.exchanges:
+                f.write(dumps(exchange.to_dict(), separators=(",", ":")))
+                f.write("\n")
+        replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: AnyStr) -> "HttpArchive":
+        """Returns archive read from gzipped JSON lines file"""
+        with gzip_open(path, "rt", encoding="utf-8") as f:
+            return cls(Exchange.from_dict(loads(line)) for line in f if line.strip())
+
+
+def exchange_raw_response(exchange: Exchange, body: Optional[IO] = None) -> HTTPResponse:
+    """Returns unread urllib3 response serving exchange body from memory or from body file object if given"""
+    return HTTPResponse(
+        body=body if body is not None else BytesIO(exchange.body),
+        headers=exchange.headers,
+        status=exchange.status,
+        reason=exchange.reason,
+        preload_content=False,
+        decode_content=True,
+        original_response=OriginalResponse(exchange.headers),
+        request_method=exchange.method,
+    )
+
+
+class _RecordingReader:
+    """File object reading raw body of streamed response as it's consumed, adds exchange to archive once the
+    whole body is read, body of response closed early isn't recorded"""
+
+    def __init__(self, archive: HttpArchive, exchange: Exchange, raw: HTTPResponse, start_time: float):
+        self._archive = archive
+        self._exchange = exchange
+        self._raw = raw
+        self._start_time = start_time
+        self._chunks = []
+        self.closed = False
+
+    def read(self, amt: Optional[int] = None) -> bytes:
+        if self.closed:
+            return b""
+        data = self._raw.read(amt, decode_content=False)
+        self._chunks.append(data)
+        if not data or amt is None:
+            self._finish()
+
+        return data
+
+    def _finish(self):
+        """Records exchange with body read and releases connection"""
+        self.closed = True
+        self._raw.release_conn()
+        self._exchange.body = b"".join(self._chunks)
+        self._exchange.elapsed = perf_counter() - self._start_time
+        self._archive.add(self._exchange)
+
+    def close(self):
+        if not self.closed:
+            self.closed = True
+            self._raw.close()
+
+
+class RecordingAdapter(TimeoutHTTPAdapter):
+    """Timeout HTTP adapter recording every received response to archive. Streamed responses are recorded once
+    their body is read, other responses are read into memory at once"""
+
+    def __init__(self, *args, archive: HttpArchive = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.archive = archive if archive is not None else HttpArchive()
+
+    def send(self, request: PreparedRequest, stream: bool = False, **kwargs) -> Response:
+        start_time = perf_counter()
+        response = super().send(request, stream=stream, **kwargs)
+        raw = response.raw
+        exchange = Exchange(
+            request.method,
+            request.url,
+            response.status_code,
+            response.reason,
+            list(raw.headers.items()),
+            b"",
+            0,
+        )
+        if stream:
+            reader = _RecordingReader(self.archive, exchange, raw, start_time)
+            response.raw = exchange_raw_response(exchange, reader)
+            return response
+        try:
+            exchange.body = raw.read(decode_content=False)
+        finally:
+            raw.release_conn()
+        exchange.elapsed = perf_counter() - start_time
+        self.archive.add(exchange)
+        response.raw = exchange_raw_response(exchange)
+
+        return response
+
+
+class ReplayAdapter(HTTPAdapter):
+    """Transport adapter serving recorded exchanges without network access. Simulates fixed or recorded
+    latency, bandwidth limit and connection errors rate, deterministic for given seed. Keyword arguments of
+    TimeoutHTTPAdapter are accepted so adapter can be set as HttpClient adapter class with archive set as
+    HttpClient archive, replayed responses are not retried"""
+
+    def __init__(
+        self,
+        archive: Optional[HttpArchive] = None,
+        latency: Optional[float] = None,
+        bandwidth: Optional[float] = None,
+        error_rate: float = 0,
+        seed: Optional[int] = None,
+        timeout: Optional[float] = None,
+        **kwargs,
+    ):
+        kwargs.pop("instrumented", None)
+        kwargs.pop("resolver", None)
+        kwargs.pop("max_proxies", None)
+        super().__init__(**kwargs)
+        self.archive = archive if archive is not None else HttpArchive()
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.timeout = timeout
+        self._random = Random(seed)
+        self._random_lock = Lock()
+
+    def _delay(self, exchange: Exchange) -> float:
+        """Returns simulated response time in seconds"""
+        delay = exchange.elapsed if self.latency is None else self.latency
+        if self.bandwidth:
+            delay += len(exchange.body) / self.bandwidth
+
+        return delay
+
+    def send(self, request: PreparedRequest, stream: bool = False, timeout=None, **kwargs) -> Response:
+        """Returns recorded response for request after simulated delay"""
+        with self._random_lock:
+            failed = self.error_rate > 0 and self._random.random() < self.error_rate
+        if failed:
+            raise ConnectionError("Simulated connection error", request=request)
+        exchange = self.archive.find(request.method, request.url)
+        if exchange is None:
+            raise ExchangeNotFoundError(f"No recorded exchange for {request.method} {request.url}", request=request)
+        delay = self._delay(exchange)
+        timeout = timeout if timeout is not None else self.timeout
+        read_timeout = timeout[1] if isinstance(timeout, tuple) else timeout
+        if read_timeout is not None and delay > read_timeout:
+            sleep(read_timeout)
+            raise ReadTimeout(f"Simulated read timeout after {read_timeout} seconds", request=request)
+        sleep(delay)
+
+        return self.build_response(request, exchange_raw_response(exchange))
+
+    def resize_pool(self, pool_size: int):
+        """Replayed responses use no connections"""
+        pass
@@ -0,0 +1,293 @@
+from typing import Any, AnyStr, Callable, Optional
+from zlib import MAX_WBITS, decompressobj, error as ZlibError
+
+from requests import Response
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+try:
+    from compression.zstd import ZstdDecompressor
+except ImportError:
+    try:
+        from backports.zstd import ZstdDecompressor
+    except ImportError:
+        ZstdDecompressor = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+BODY_CHUNK_SIZE = 64 * 1024
+
+
+class ResponseBodyError(Exception):
+    """Response body base error"""
+
+    pass
+
+
+class ResponseTooLargeError(ResponseBodyError):
+    """Raised when response body exceeds size limit"""
+
+    pass
+
+
+class UnsupportedEncodingError(ResponseBodyError):
+    """Raised when response body content encoding can't be decoded"""
+
+    pass
+
+
+def _brotli_bounded() -> bool:
+    """Returns True if available brotli library can limit decompressed output size"""
+    return brotli is not None and hasattr(brotli.Decompressor, "can_accept_more_data")
+
+
+def accept_encoding() -> AnyStr:
+    """Returns Accept-Encoding header value listing content encodings whose decompressed output size available
+    libraries can limit"""
+    encodings = ["gzip", "deflate"]
+    if _brotli_bounded():
+        encodings.append("br")
+    if ZstdDecompressor is not None:
+        encodings.append("zstd")
+
+    return ", ".join(encodings)
+
+
+class _ZlibDecoder:
+    """Gzip and deflate stream decoder with bounded output"""
+
+    def __init__(self, wbits: int):
+        self._obj = decompressobj(wbits)
+        self._deflate = wbits == MAX_WBITS
+        self._started = False
+
+    def decompress(self, data: bytes, limit: Optional[int]) -> bytes:
+        if self._deflate and not self._started:
+            # Some servers send raw deflate stream without zlib header
+            self._started = True
+            try:
+                return self._decompress(data, limit)
+            except ZlibError:
+                self._obj = decompressobj(-MAX_WBITS)
+        self._started = True
+
+        return self._decompress(data, limit)
+
+    def _decompress(self, data: bytes, limit: Optional[int]) -> bytes:
+        """Decompresses data without producing more than limit + 1 bytes"""
+        result = []
+        size = 0
+        while data:
+            chunk = self._obj.decompress(data, limit - size + 1 if limit is not None else 0)
+            size += len(chunk)
+            result.append(chunk)
+            if limit is not None and size > limit:
+                break
+            data = self._obj.unconsumed_tail
+
+        return b"".join(result)
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+
+class _BrotliDecoder:
+    """Brotli stream decoder, output is bounded if brotli library supports output buffer limit, used for bodies
+    without size limit otherwise"""
+
+    def __init__(self):
+        self._obj = brotli.Decompressor()
+        self._process = getattr(self._obj, "process", None) or self._obj.decompress
+        self._bounded = _brotli_bounded()
+
+    def decompress(self, data: bytes, limit: Optional[int]) -> bytes:
+        if not self._bounded:
+            return self._process(data)
+        if limit is None:
+            result = [self._obj.process(data)]
+            while not self._obj.can_accept_more_data():
+                result.append(self._obj.process(b""))
+
+            return b"".join(result)
+
+        return self._decompress(data, limit)
+
+    def _decompress(self, data: bytes, limit: int) -> bytes:
+        """Decompresses data without producing more than limit + 1 bytes"""
+        result = []
+        size = 0
+        while True:
+            chunk = self._obj.process(data, output_buffer_limit=limit - size + 1)
+            # Input not yet decompressed is buffered by decompressor
+            data = b""
+            size += len(chunk)
+            result.append(chunk)
+            if size > limit or self._obj.can_accept_more_data():
+                break
+
+        return b"".join(result)
+
+    def flush(self) -> bytes:
+        return b""
+
+
+class _ZstdDecoder:
+    """Zstandard stream decoder with bounded output"""
+
+    def __init__(self):
+        self._obj = ZstdDecompressor()
+
+    def decompress(self, data: bytes, limit: Optional[int]) -> bytes:
+        if limit is None:
+            result = [self._obj.decompress(data)]
+            while not self._obj.eof and not self._obj.needs_input:
+                result.append(self._obj.decompress(b""))
+
+            return b"".join(result)
+
+        return self._decompress(data, limit)
+
+    def _decompress(self, data: bytes, limit: int) -> bytes:
+        """Decompresses data without producing more than limit + 1 bytes"""
+        result = []
+        size = 0
+        while True:
+            chunk = self._obj.decompress(data, limit - size + 1)
+            # Input not yet decompressed is buffered by decompressor
+            data = b""
+            size += len(chunk)
+            result.append(chunk)
+            if size > limit or self._obj.eof or self._obj.needs_input:
+                break
+
+        return b"".join(result)
+
+    def flush(self) -> bytes:
+        return b""
+
+
+class _ZstandardDecoder:
+    """Zstandard stream decoder of zstandard library, which can't bound output of incrementally fed data, used for
+    bodies without size limit only"""
+
+    def __init__(self):
+        self._obj = zstandard.ZstdDecompressor().decompressobj()
+
+    def decompress(self, data: bytes, limit: Optional[int]) -> bytes:
+        return self._obj.decompress(data)
+
+    def flush(self) -> bytes:
+        return b""
+
+
+class StreamDecoder:
+    """Incremental decoder of (possibly chained) content encodings, bounded decoder refuses encodings whose
+    decompressed output size available libraries can't limit"""
+
+    def __init__(self, content_encoding: Optional[AnyStr], bounded: bool = False):
+        self._decoders = []
+        encodings = [x.strip().lower() for x in (content_encoding or "").split(",") if x.strip()]
+        # Encodings are listed in order they were applied
+        for encoding in reversed(encodings):
+            self._decoders.append(self._decoder(encoding, bounded))
+
+    @staticmethod
+    def _decoder(encoding: AnyStr, bounded: bool) -> Any:
+        """Returns decoder for content encoding"""
+        if encoding in ("gzip", "x-gzip"):
+            return _ZlibDecoder(16 + MAX_WBITS)
+        if encoding == "deflate":
+            return _ZlibDecoder(MAX_WBITS)
+        if encoding == "br" and brotli is not None and (not bounded or _brotli_bounded()):
+            return _BrotliDecoder()
+        if encoding == "zstd" and ZstdDecompressor is not None:
+            return _ZstdDecoder()
+        if encoding == "zstd" and zstandard is not None and not bounded:
+            return _ZstandardDecoder()
+        if encoding == "identity":
+            return None
+        if bounded and encoding in ("br", "zstd"):
+            raise UnsupportedEncodingError(f"Content encoding {encoding} can't be decoded with bounded output")
+        raise UnsupportedEncodingError(f"Unsupported content encoding: {encoding}")
+
+    def decompress(self, data: bytes, limit: Optional[int] = None) -> bytes:
+        """Returns decoded data, output of each stage is bounded to limit + 1 bytes where decoder allows it"""
+        for decoder in self._decoders:
+            if decoder is not None and data:
+                data = decoder.decompress(data, limit)
+
+        return data
+
+    def flush(self) -> bytes:
+        """Returns remaining decoded data"""
+        data = b""
+        for decoder in self._decoders:
+            if decoder is None:
+                continue
+            if data:
+                data = decoder.decompress(data, None)
+            data += decoder.flush()
+
+        return data
+
+
+def read_body(
+    response: Response,
+    max_bytes: Optional[int] = None,
+    stop_when: Optional[Callable[[bytearray], bool]] = None,
+    chunk_size: int = BODY_CHUNK_SIZE,
+) -> bytes:
+    """Reads and decodes streamed response body chunk by chunk and sets it as response content. Raises
+    ResponseTooLargeError as soon as raw or decoded body exceeds max_bytes. Stops reading once stop_when
+    predicate called with body read so far returns True, in which case response.truncated is set. Raises
+    UnsupportedEncodingError if body size is limited and content encoding can't be decoded with bounded output"""
+    content_length = response.headers.get("Content-Length", "")
+    if max_bytes is not None and content_length.isdigit() and int(content_length) > max_bytes:
+        response.close()
+        raise ResponseTooLargeError(f"Response body of {content_length} bytes exceeds {max_bytes} bytes limit")
+    try:
+        decoder = StreamDecoder(response.headers.get("Content-Encoding"), max_bytes is not None)
+    except UnsupportedEncodingError:
+        response.close()
+        raise
+    body = bytearray()
+    raw_size = 0
+    truncated = False
+    try:
+        for chunk in response.raw.stream(chunk_size, decode_content=False):
+            raw_size += len(chunk)
+            limit = max_bytes - len(body) if max_bytes is not None else None
+            body += decoder.decompress(chunk, limit)
+            if max_bytes is not None and (len(body) > max_bytes or raw_size > max_bytes):
+                raise ResponseTooLargeError(f"Response body exceeds {max_bytes} bytes limit")
+            if stop_when is not None and stop_when(body):
+                truncated = True
+                break
+        if not truncated:
+            body += decoder.flush()
+            if max_bytes is not None and len(body) > max_bytes:
+                raise ResponseTooLargeError(f"Response body exceeds {max_bytes} bytes limit")
+    except ResponseTooLargeError:
+        response.close()
+        raise
+    except ZlibError as e:
+        response.close()
+        raise ResponseBodyError(f"Failed to decode response body: {e}") from e
+    if truncated:
+        # Connection has unread data and can't be reused
+        response.close()
+    response._content = bytes(body)
+    response._content_consumed = True
+    response.truncated = truncated
+
+    return response._content
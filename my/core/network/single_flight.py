@@ -0,0 +1,121 @@
+from asyncio import CancelledError, get_running_loop, shield
+from threading import Event, Lock
+from typing import Any, AnyStr, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+# Request headers that change response content, requests differing in other headers are coalesced
+COALESCE_HEADERS = ("Accept", "Accept-Encoding", "Accept-Language", "Authorization", "Cookie", "Range")
+
+
+def coalesce_key(url: AnyStr, headers: Optional[Dict] = None, proxy: Any = None, session: Hashable = None) -> Tuple:
+    """Returns key identifying GET request by URL with query parameters, proxy it is sent through, headers that
+    change response content and session it is sent with, session sends its own cookies"""
+    headers = {k.lower(): v for k, v in (headers or {}).items()}
+    if isinstance(proxy, dict):
+        proxy = tuple(sorted(proxy.items()))
+
+    return (url, proxy, session) + tuple(headers.get(name.lower()) for name in COALESCE_HEADERS)
+
+
+class _LeaderCancelled(Exception):
+    """Set on shared future when leading coroutine is cancelled, waiting callers elect new leader"""
+
+    pass
+
+
+class _Call:
+    """In-flight call shared by concurrent callers"""
+
+    def __init__(self):
+        self.done = Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Thread-safe and asyncio-aware call coalescing, concurrent calls with the same key share one execution"""
+
+    def __init__(self):
+        self._lock = Lock()
+        self._calls = {}
+        self._futures = {}
+        self._leaders = 0
+        self._hits = 0
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Returns pair of function result and True if result was shared with another in-flight call otherwise
+        False, errors are raised to every waiting caller"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self._leaders += 1
+            else:
+                self._hits += 1
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result, False
+
+    async def do_async(self, key: Hashable, func: Callable[[], Awaitable]) -> Tuple[Any, bool]:
+        """Returns pair of awaited coroutine function result and True if result was shared with another in-flight
+        call otherwise False, calls are coalesced within the running event loop. If leading call is cancelled one
+        of waiting callers runs the call instead"""
+        loop = get_running_loop()
+        future_key = (id(loop), key)
+        future = self._futures.get(future_key)
+        while future is not None:
+            try:
+                result = await shield(future)
+            except _LeaderCancelled:
+                # Leader was cancelled, first waiter to resume leads the call again
+                future = self._futures.get(future_key)
+                continue
+            self._hits += 1
+            return result, True
+        future = self._futures[future_key] = loop.create_future()
+        self._leaders += 1
+        try:
+            result = await func()
+        except CancelledError:
+            future.set_exception(_LeaderCancelled())
+            future.exception()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark exception as retrieved when there are no other waiters
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            del self._futures[future_key]
+
+        return result, False
+
+    @property
+    def hits(self) -> int:
+        """Returns number of calls served by another in-flight call"""
+        return self._hits
+
+    @property
+    def leaders(self) -> int:
+        """Returns number of executed calls"""
+        return self._leaders
+
+    @property
+    def stats(self) -> Dict:
+        """Returns coalescing counters"""
+        return {"leaders": self._leaders, "hits": self._hits, "in_flight": len(self._calls) + len(self._futures)}
@@ -0,0 +1,130 @@
+from bisect import bisect_left
+from json import dump
+from threading import Lock
+from typing import AnyStr, Dict, Iterable, Optional
+
+PHASES = ("dns", "connect", "tls", "ttfb", "transfer", "total")
+TAGS = ("host", "proxy", "status")
+# Histogram bucket upper bounds in seconds, last bucket collects everything above
+BUCKET_BOUNDS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 60,
+)
+
+
+class Histogram:
+    """Latency histogram with fixed bucket bounds"""
+
+    def __init__(self, bounds: Iterable[float] = BUCKET_BOUNDS):
+        self._bounds = tuple(bounds)
+        self._counts = [0] * (len(self._bounds) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._min = None
+        self._max = None
+
+    def add(self, value: float):
+        """Adds measured value to histogram"""
+        self._counts[bisect_left(self._bounds, value)] += 1
+        self._count += 1
+        self._sum += value
+        self._min = value if self._min is None else min(self._min, value)
+        self._max = value if self._max is None else max(self._max, value)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Returns upper bound estimate of given percentile or None if histogram is empty"""
+        if self._count == 0:
+            return None
+        rank = percent / 100 * self._count
+        seen = 0
+        for i, count in enumerate(self._counts):
+            seen += count
+            if seen >= rank and count > 0:
+                return min(self._bounds[i], self._max) if i < len(self._bounds) else self._max
+
+        return self._max
+
+    @property
+    def count(self) -> int:
+        """Returns number of measured values"""
+        return self._count
+
+    @property
+    def mean(self) -> Optional[float]:
+        """Returns mean of measured values or None if histogram is empty"""
+        return self._sum / self._count if self._count else None
+
+    def to_dict(self) -> Dict:
+        """Returns histogram summary and bucket counts"""
+        return {
+            "count": self._count,
+            "sum": self._sum,
+            "min": self._min,
+            "max": self._max,
+            "mean": self.mean,
+            "p50": self.percentile(50),
+            "p90": self.percentile(90),
+            "p99": self.percentile(99),
+            "buckets": {
+                str(bound): count for bound, count in zip(self._bounds + ("inf",), self._counts)
+            },
+        }
+
+
+class TimingRecorder:
+    """Thread-safe collector of per request phase timings, aggregated into histograms overall and per host, proxy
+    and status tags"""
+
+    def __init__(self, bounds: Iterable[float] = BUCKET_BOUNDS):
+        self._lock = Lock()
+        self._bounds = tuple(bounds)
+        self._histograms = {}
+
+    def _histogram(self, tag: AnyStr, value: AnyStr, phase: AnyStr) -> Histogram:
+        """Returns histogram for tag value and phase, expects lock to be held"""
+        key = (tag, value, phase)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = Histogram(self._bounds)
+
+        return histogram
+
+    def record(
+        self,
+        timings: Dict,
+        host: AnyStr,
+        proxy: Optional[AnyStr] = None,
+        status: Optional[int] = None,
+    ):
+        """Adds request phase timings in seconds, tagged by host, proxy and status"""
+        tags = (
+            ("all", "*"),
+            ("host", host),
+            ("proxy", proxy or "direct"),
+            ("status", str(status) if status is not None else "error"),
+        )
+        with self._lock:
+            for phase in PHASES:
+                value = timings.get(phase)
+                if value is None:
+                    continue
+                for tag, tag_value in tags:
+                    self._histogram(tag, tag_value, phase).add(value)
+
+    def snapshot(self) -> Dict:
+        """Returns histograms summaries nested by tag, tag value and phase"""
+        result = {}
+        with self._lock:
+            for (tag, value, phase), histogram in self._histograms.items():
+                result.setdefault(tag, {}).setdefault(value, {})[phase] = histogram.to_dict()
+
+        return result
+
+    def dump(self, file_path: AnyStr):
+        """Writes histograms snapshot to JSON file"""
+        with open(file_path, "w") as f:
+            dump(self.snapshot(), f, indent=2)
+
+    def reset(self):
+        """Removes all recorded timings"""
+        with self._lock:
+            self._histograms.clear()
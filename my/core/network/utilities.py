@@ -1,5 +1,4 @@
 from json import loads
-from random import choice
 from re import compile as re_compile, findall, IGNORECASE
 from typing import AnyStr, Optional, Set, Tuple
 from urllib.parse import parse_qs, urlparse
@@ -10,12 +9,14 @@ try:
     from libs.my.core.defaults import USER_AGENT, HEADERS, TIMEOUT
     from libs.my.core.network.ip_address import IPAddress
     from libs.my.core.network.proxy import Proxy, ProxyType
+    from libs.my.core.network.proxy_checker import check_anonymity
     from libs.my.core.html.utilities import extract_text_from_html
     from libs.my.core.defaults import SCREEN_HEIGHT, SCREEN_WIDTH, USER_AGENT
 except ModuleNotFoundError:
     from core.defaults import USER_AGENT, HEADERS, TIMEOUT
     from core.network.ip_address import IPAddress
     from core.network.proxy import Proxy, ProxyType
+    from core.network.proxy_checker import check_anonymity
     from core.text.utilities import extract_text_from_html
     from core.defaults import SCREEN_HEIGHT, SCREEN_WIDTH, USER_AGENT
 
@@ -41,47 +42,6 @@ def get_real_ip() -> Optional[AnyStr]:
     return ip
 
 
-def check_anonymity(ip, port, real_ip, timeout):
-    """Returns Proxy object if proxy is working otherwise None"""
-    http_proxy_judges = (
-        "http://httpbin.org/ip",
-        "http://api.ipify.org",
-        "http://icanhazip.com/",
-    )
-    https_proxy_judges = (
-        "https://httpbin.org/ip",
-        "https://api.ipify.org",
-        "https://icanhazip.com/",
-    )
-    http_proxy = None
-    https_proxy = None
-    for proxy_judges in [
-        (ProxyType.HTTP, http_proxy_judges),
-        (ProxyType.HTTPS, https_proxy_judges),
-    ]:
-        try:
-            proxy_type, proxy_judges = proxy_judges
-            port = int(port)
-            url = choice(proxy_judges)
-            proxies = {
-                "http": "http://{}:{}/".format(ip, port),
-                "https": "https://{}:{}/".format(ip, port),
-            }
-            # r = requests.get(url, proxies=proxies, headers=HEADERS, timeout=TIMEOUT)
-            r = get(url, proxies=proxies, headers=HEADERS, timeout=timeout)
-            if r.status_code == 200:
-                if str(real_ip) not in r.text:
-                    if proxy_type == ProxyType.HTTP:
-                        http_proxy = Proxy(ip, port)
-                    elif proxy_type == ProxyType.HTTPS:
-                        https_proxy = Proxy(ip, port, ssl=True)
-        except Exception as e:
-            pass
-    proxy = https_proxy if http_proxy is not None and https_proxy is not None else None
-
-    return proxy
-
-
 def _try_get_qs(url: AnyStr, name: AnyStr) -> Tuple[bool, Optional[AnyStr]]:
     """Returns pair of True and query string value for selected key otherwise pair of False and None"""
     ok, result = False, None
@@ -0,0 +1,218 @@
+from asyncio import TimeoutError, sleep
+from copy import copy
+from typing import Any, AnyStr, Callable, Optional
+
+from aiohttp import ClientError, ClientResponse, ClientSession, ClientTimeout, TCPConnector
+from aiohttp.abc import AbstractCookieJar
+from requests.exceptions import RetryError
+
+try:
+    from libs.my.core.defaults import USER_AGENT, TIMEOUT, RETRIES, HEADERS
+    from libs.my.core.network.http_client import (
+        BACKOFF_FACTOR, CACHE_BYPASS_KWARGS, RETRY_METHODS, RETRY_STATUSES, prepared_url
+    )
+    from libs.my.core.network.proxy import Proxy
+    from libs.my.core.network.single_flight import SingleFlight, coalesce_key
+except ModuleNotFoundError:
+    from core.defaults import USER_AGENT, TIMEOUT, RETRIES, HEADERS
+    from core.network.http_client import (
+        BACKOFF_FACTOR, CACHE_BYPASS_KWARGS, RETRY_METHODS, RETRY_STATUSES, prepared_url
+    )
+    from core.network.proxy import Proxy
+    from core.network.single_flight import SingleFlight, coalesce_key
+
+
+BACKOFF_MAX = 120
+CONNECTIONS_LIMIT = 1000
+
+
+class AsyncHttpClient:
+    """Asyncio HTTP client class, counterpart of HttpClient sharing one connection pool between all requests"""
+
+    def __init__(
+        self,
+        logging_callback: Optional[Callable] = None,
+        connections_limit: int = CONNECTIONS_LIMIT,
+    ):
+        self._session = None
+        self._connections_limit = connections_limit
+        self._user_agent = USER_AGENT
+        self._timeout = TIMEOUT
+        self._retries = RETRIES
+        self._headers = dict(HEADERS)
+        self._proxy = None
+        self._referrer_url = None
+        self._logging_callback = logging_callback
+        self._single_flight = None
+
+    async def __aenter__(self):
+        self._init()
+
+        return self
+
+    async def __aexit__(self, type, value, traceback):
+        await self.close()
+
+    def _init(self):
+        if self._session is None or self._session.closed:
+            self._session = ClientSession(
+                connector=TCPConnector(limit=self._connections_limit),
+                auto_decompress=True,
+            )
+
+    async def close(self):
+        """Closes session and its connection pool"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    @property
+    def user_agent(self) -> AnyStr:
+        """Returns user agent string"""
+        return self._headers.get("User-Agent", "")
+
+    @user_agent.setter
+    def user_agent(self, user_agent: AnyStr):
+        """Sets user agent string"""
+        self._headers["User-Agent"] = user_agent
+
+    @property
+    def proxy(self) -> Proxy:
+        """Returns current proxy"""
+        return self._proxy
+
+    @proxy.setter
+    def proxy(self, proxy: Proxy):
+        """Sets current proxy"""
+        self._proxy = proxy
+
+    @property
+    def timeout(self) -> float:
+        """Returns timeout value"""
+        return self._timeout
+
+    @timeout.setter
+    def timeout(self, timeout: float):
+        """Sets timeout"""
+        self._timeout = timeout
+
+    @property
+    def retries(self) -> int:
+        """Return current retries count"""
+        return self._retries
+
+    @retries.setter
+    def retries(self, retries: int):
+        """Sets retries count"""
+        self._retries = retries
+
+    @property
+    def referrer_url(self) -> AnyStr:
+        """Returns current referrer URL"""
+        return self._referrer_url
+
+    @referrer_url.setter
+    def referrer_url(self, referrer_url: AnyStr):
+        """Sets current referrer URL"""
+        self._referrer_url = referrer_url
+
+    @property
+    def single_flight(self) -> Optional[SingleFlight]:
+        """Returns in-flight requests coalescer"""
+        return self._single_flight
+
+    @single_flight.setter
+    def single_flight(self, single_flight: Optional[SingleFlight]):
+        """Sets in-flight requests coalescer, concurrent identical GET requests sent with the same session are sent
+        once, requests of other clients sharing it aren't coalesced as their cookies differ, None disables
+        coalescing"""
+        self._single_flight = single_flight
+
+    @property
+    def cookies(self) -> Optional[AbstractCookieJar]:
+        """Returns cookie jar"""
+        return self._session.cookie_jar if self._session is not None else None
+
+    def _process_kwargs(self, kwargs: Any) -> Any:
+        """Sets request arguments"""
+        self._init()
+        if kwargs is None:
+            kwargs = {}
+        if "headers" not in kwargs:
+            kwargs["headers"] = dict(self._headers)
+        if "proxy" not in kwargs and self._proxy is not None:
+            # aiohttp tunnels HTTPS requests through plain HTTP proxies with CONNECT
+            kwargs["proxy"] = self._proxy.proxies["http"]
+        if "timeout" not in kwargs:
+            kwargs["timeout"] = self.timeout
+        if not isinstance(kwargs["timeout"], ClientTimeout):
+            kwargs["timeout"] = ClientTimeout(total=kwargs["timeout"])
+        if "referrer_url" in kwargs:
+            kwargs["headers"]["Referer"] = kwargs["referrer_url"]
+            del kwargs["referrer_url"]
+
+        return kwargs
+
+    def _backoff_time(self, attempt: int, response: Optional[ClientResponse]) -> float:
+        """Returns seconds to sleep before next attempt, mirrors urllib3 Retry backoff"""
+        if response is not None and response.status in (413, 429, 503):
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                return float(retry_after)
+        if attempt <= 1:
+            return 0
+
+        return min(BACKOFF_MAX, BACKOFF_FACTOR * (2 ** (attempt - 1)))
+
+    async def request(self, method: AnyStr, url: AnyStr, **kwargs: Any) -> ClientResponse:
+        """Performs HTTP request, reads response body and returns response instance, raises RetryError when
+        response status is still retryable after all retries like HttpClient"""
+        kwargs = self._process_kwargs(kwargs)
+        retryable = method.upper() in RETRY_METHODS
+        retries = self.retries if retryable else 0
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                response = await self._session.request(method, url, **kwargs)
+            except (ClientError, TimeoutError):
+                if attempt > retries:
+                    raise
+                await sleep(self._backoff_time(attempt, None))
+                continue
+            if response.status in RETRY_STATUSES and retryable:
+                response.release()
+                if attempt > retries:
+                    raise RetryError(f"Max retries exceeded with url: {url} (too many {response.status} responses)")
+                await sleep(self._backoff_time(attempt, response))
+                continue
+            try:
+                await response.read()
+            finally:
+                response.release()
+            if self._logging_callback is not None:
+                self._logging_callback(response)
+
+            return response
+
+    async def get(self, url: AnyStr, **kwargs: Any) -> ClientResponse:
+        """Performs GET request and returns response instance"""
+        # Requests with body, auth or cookies aren't coalesced
+        if self._single_flight is None or any(kwargs.get(name) for name in CACHE_BYPASS_KWARGS):
+            return await self.request("GET", url, **kwargs)
+        self._init()
+        proxy = kwargs.get("proxy", str(self._proxy) if self._proxy is not None else None)
+        key = coalesce_key(
+            prepared_url(url, kwargs.get("params")), kwargs.get("headers", self._headers), proxy, id(self._session)
+        )
+        response, shared = await self._single_flight.do_async(key, lambda: self.request("GET", url, **kwargs))
+
+        # Every caller gets its own response instance, body bytes are shared
+        return copy(response) if shared else response
+
+    async def try_get(self, url: AnyStr, **kwargs: Any) -> Optional[ClientResponse]:
+        """Tries to perform GET request, returns response instance on success otherwise None"""
+        try:
+            return await self.get(url, **kwargs)
+        except Exception as e:
+            return None
@@ -0,0 +1,303 @@
+from collections import Counter, OrderedDict
+from functools import partial
+from threading import Lock
+from time import perf_counter
+from typing import Any, AnyStr, Callable, Iterator, Optional, Tuple, Union
+
+import httpx
+from requests import PreparedRequest, Response
+from requests.adapters import BaseAdapter
+from requests.cookies import extract_cookies_to_jar
+from requests.exceptions import ConnectionError, ConnectTimeout, ReadTimeout, RetryError
+from requests.packages.urllib3.exceptions import (
+    ConnectTimeoutError,
+    HTTPError,
+    MaxRetryError,
+    ProtocolError,
+    ReadTimeoutError,
+)
+from requests.packages.urllib3.response import HTTPResponse
+from requests.packages.urllib3.util.retry import Retry
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers, select_proxy
+
+try:
+    from libs.my.core.defaults import TIMEOUT
+    from libs.my.core.network.connection import OriginalResponse
+    from libs.my.core.network.http_client import PROXY_POOLS_COUNT
+except ModuleNotFoundError:
+    from core.defaults import TIMEOUT
+    from core.network.connection import OriginalResponse
+    from core.network.http_client import PROXY_POOLS_COUNT
+
+
+MAX_CONNECTIONS = 100
+
+
+class HTTP2RawResponse:
+    """File-like raw response over httpx response, mirrors parts of urllib3 HTTPResponse used by requests and
+    HttpClient. On close callback is called once body is read or response is closed"""
+
+    def __init__(self, response: httpx.Response, on_close: Optional[Callable] = None):
+        self._response = response
+        self._original_response = OriginalResponse(response.headers.multi_items())
+        self._connection = None
+        self._on_close = on_close
+        self.status = response.status_code
+        self.headers = response.headers
+        self.version = response.http_version
+
+    def stream(self, chunk_size: int = 64 * 1024, decode_content: bool = True) -> Iterator[bytes]:
+        """Yields body chunks, decoded by content encoding if decode_content is True"""
+        if decode_content:
+            yield from self._response.iter_bytes(chunk_size)
+        else:
+            yield from self._response.iter_raw(chunk_size)
+        self.close()
+
+    def read(self) -> bytes:
+        """Returns whole decoded body"""
+        try:
+            return self._response.read()
+        finally:
+            self.close()
+
+    def close(self):
+        """Closes response, its stream is released back to connection"""
+        self._response.close()
+        on_close, self._on_close = self._on_close, None
+        if on_close is not None:
+            on_close()
+
+    def release_conn(self):
+        """Releases response stream back to connection"""
+        self.close()
+
+
+class HTTP2Adapter(BaseAdapter):
+    """Requests transport adapter sending requests with httpx over HTTP/2, concurrent requests to a host are
+    multiplexed over one connection. Hosts without HTTP/2 support are served over HTTP/1.1. Keyword arguments
+    match TimeoutHTTPAdapter so adapter can be set as HttpClient adapter class, resolver is not supported by
+    httpx transport and is ignored. Clients evicted over the limit are closed once requests and streamed
+    responses using them are done"""
+
+    def __init__(
+        self,
+        timeout: Union[float, Tuple] = TIMEOUT,
+        max_retries: Union[int, Retry] = 0,
+        instrumented: bool = False,
+        resolver: Optional[Any] = None,
+        max_proxies: int = PROXY_POOLS_COUNT,
+        max_connections: int = MAX_CONNECTIONS,
+        prior_knowledge: bool = False,
+    ):
+        super().__init__()
+        self.timeout = timeout
+        self.max_retries = max_retries if isinstance(max_retries, Retry) else Retry(max_retries, read=False)
+        self.instrumented = instrumented
+        self.max_proxies = max_proxies
+        self.max_connections = max_connections
+        # Plain HTTP requests use HTTP/2 without upgrade, only for servers known to support it
+        self.prior_knowledge = prior_knowledge
+        self._lock = Lock()
+        self._clients = OrderedDict()
+        # Number of requests and unread responses using client
+        self._usages = Counter()
+        # Evicted clients still in use
+        self._retired = set()
+
+    def _client(self, proxy: Optional[AnyStr], verify: Union[bool, AnyStr], cert: Any) -> httpx.Client:
+        """Returns httpx client for proxy and TLS settings to be released when done with it, retires least recently
+        used ones over the limit"""
+        key = (proxy, verify, cert if not isinstance(cert, list) else tuple(cert))
+        with self._lock:
+            client = self._clients.get(key)
+            if client is not None:
+                self._clients.move_to_end(key)
+            else:
+                client = self._clients[key] = httpx.Client(
+                    http1=not self.prior_knowledge,
+                    http2=True,
+                    verify=verify,
+                    cert=cert,
+                    proxy=proxy,
+                    limits=httpx.Limits(max_connections=self.max_connections),
+                    follow_redirects=False,
+                )
+                while len(self._clients) > self.max_proxies + 1:
+                    _, evicted_client = self._clients.popitem(last=False)
+                    self._retire(evicted_client)
+            self._usages[client] += 1
+
+        return client
+
+    def _release_client(self, client: httpx.Client):
+        """Ends use of client, closes it if it was retired meanwhile"""
+        with self._lock:
+            self._usages[client] -= 1
+            if self._usages[client] > 0:
+                return
+            del self._usages[client]
+            if client not in self._retired:
+                return
+            self._retired.discard(client)
+        client.close()
+
+    def _retire(self, client: httpx.Client):
+        """Closes client now or once it's no longer used, expects lock to be held"""
+        if self._usages[client] > 0:
+            self._retired.add(client)
+        else:
+            client.close()
+
+    @staticmethod
+    def _httpx_timeout(timeout: Union[None, float, Tuple]) -> httpx.Timeout:
+        """Returns httpx timeout from requests timeout value or (connect, read) pair"""
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return httpx.Timeout(read, connect=connect)
+
+        return httpx.Timeout(timeout)
+
+    def send(
+        self,
+        request: PreparedRequest,
+        stream: bool = False,
+        timeout: Union[None, float, Tuple] = None,
+        verify: Union[bool, AnyStr] = True,
+        cert: Any = None,
+        proxies: Optional[dict] = None,
+    ) -> Response:
+        """Sends prepared request, retrying connection errors and retryable statuses by max_retries strategy"""
+        client = self._client(select_proxy(request.url, proxies), verify, cert)
+        try:
+            response = self._send(client, request, stream, timeout)
+        except BaseException:
+            self._release_client(client)
+            raise
+        if not stream:
+            self._release_client(client)
+
+        return response
+
+    def _send(
+        self,
+        client: httpx.Client,
+        request: PreparedRequest,
+        stream: bool,
+        timeout: Union[None, float, Tuple],
+    ) -> Response:
+        """Sends prepared request with client, streamed response releases client once it's read or closed"""
+        httpx_request = client.build_request(
+            request.method,
+            request.url,
+            headers=list(request.headers.items()),
+            content=request.body,
+            timeout=self._httpx_timeout(timeout if timeout is not None else self.timeout),
+        )
+        retries = self.max_retries
+        while True:
+            start_time = perf_counter()
+            try:
+                httpx_response = client.send(httpx_request, stream=True)
+            except httpx.TransportError as e:
+                error = self._request_error(e, request)
+                try:
+                    retries = retries.increment(request.method, request.url, error=self._retry_error(e))
+                except HTTPError:
+                    # Retries are exhausted or read error of method which isn't retried
+                    raise error from e
+                retries.sleep()
+                continue
+            received_time = perf_counter()
+            retry_response = HTTPResponse(
+                headers=dict(httpx_response.headers), status=httpx_response.status_code, preload_content=False
+            )
+            has_retry_after = "Retry-After" in httpx_response.headers
+            if not retries.is_retry(request.method, httpx_response.status_code, has_retry_after):
+                break
+            try:
+                retries = retries.increment(request.method, request.url, response=retry_response)
+            except MaxRetryError as e:
+                if retries.raise_on_status:
+                    httpx_response.close()
+                    raise RetryError(e, request=request)
+                break
+            httpx_response.close()
+            retries.sleep(retry_response)
+
+        on_close = partial(self._release_client, client) if stream else None
+        response = self.build_response(request, httpx_response, on_close)
+        if self.instrumented:
+            # Connection phases are not exposed by httpx, time to first byte covers them
+            response.timings = {
+                "dns": 0,
+                "connect": 0,
+                "tls": 0,
+                "ttfb": received_time - start_time,
+                "received_at": received_time,
+            }
+        if not stream:
+            try:
+                response._content = httpx_response.read()
+            except httpx.TransportError as e:
+                raise self._request_error(e, request) from e
+            finally:
+                httpx_response.close()
+            response._content_consumed = True
+
+        return response
+
+    @staticmethod
+    def _retry_error(error: httpx.TransportError) -> HTTPError:
+        """Returns urllib3 error matching httpx transport error so retry strategy counts connect and read errors"""
+        if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout, httpx.ProxyError)):
+            # Request wasn't sent, safe to retry for any method
+            return ConnectTimeoutError(str(error))
+        if isinstance(error, httpx.TimeoutException):
+            return ReadTimeoutError(None, None, str(error))
+
+        return ProtocolError(str(error), error)
+
+    @staticmethod
+    def _request_error(error: httpx.TransportError, request: PreparedRequest) -> Exception:
+        """Returns requests exception matching httpx transport error"""
+        if isinstance(error, httpx.ConnectTimeout):
+            return ConnectTimeout(error, request=request)
+        if isinstance(error, httpx.TimeoutException):
+            return ReadTimeout(error, request=request)
+
+        return ConnectionError(error, request=request)
+
+    def build_response(
+        self, request: PreparedRequest, httpx_response: httpx.Response, on_close: Optional[Callable] = None
+    ) -> Response:
+        """Returns requests response for httpx response with unread body, on close is called once body is read or
+        response is closed"""
+        response = Response()
+        response.status_code = httpx_response.status_code
+        response.headers = CaseInsensitiveDict(httpx_response.headers.items())
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.raw = HTTP2RawResponse(httpx_response, on_close)
+        response.reason = httpx_response.reason_phrase
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.http_version = httpx_response.http_version
+        extract_cookies_to_jar(response.cookies, request, response.raw)
+
+        return response
+
+    def resize_pool(self, pool_size: int):
+        """Allows at least pool_size connections per client, needed only by hosts without HTTP/2 support"""
+        if pool_size <= self.max_connections:
+            return
+        self.max_connections = pool_size
+        self.close()
+
+    def close(self):
+        """Closes all clients and their connections, clients in use are closed once they're done"""
+        with self._lock:
+            for client in self._clients.values():
+                self._retire(client)
+            self._clients.clear()
@@ -0,0 +1,73 @@
+import sys
+import unittest
+from asyncio import TimeoutError, run
+from os.path import abspath, dirname, join
+from socket import socket
+
+from requests.exceptions import RetryError
+
+try:
+    import aiohttp  # noqa: F401
+except ImportError:
+    raise unittest.SkipTest("aiohttp library is not installed")
+
+sys.path.insert(0, join(dirname(dirname(abspath(__file__))), "my"))
+
+from core.network.mock_server import MockServer
+from core.network.recording import Exchange, HttpArchive
+from extra.network.async_http_client import AsyncHttpClient
+
+
+class AsyncHttpClientTest(unittest.TestCase):
+    def setUp(self):
+        self.server = MockServer(HttpArchive(), seed=1)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+
+    def add(self, path: str, status: int = 200) -> str:
+        url = self.server.url + path
+        self.server.archive.add(Exchange("GET", url, status, "", [], path.encode(), 0))
+
+        return url
+
+    @staticmethod
+    def get(url: str, retries: int = 1, timeout: float = 5):
+        async def get():
+            async with AsyncHttpClient() as client:
+                client.retries = retries
+                client.timeout = timeout
+                return await client.get(url)
+
+        return run(get())
+
+    def test_retry_on_connection_error(self):
+        url = self.add("/page")
+        # First draw of seeded random fails the first request, second one passes
+        self.server.error_rate = 0.5
+        response = self.get(url)
+        self.assertEqual(response.status, 200)
+        self.assertEqual(self.server.requests, 1)
+
+    def test_connection_error_retries_exhausted(self):
+        # Bound socket which doesn't listen refuses connections
+        with socket() as closed:
+            closed.bind(("127.0.0.1", 0))
+            with self.assertRaises(aiohttp.ClientError):
+                self.get(f"http://127.0.0.1:{closed.getsockname()[1]}/")
+
+    def test_timeout_retries_exhausted(self):
+        url = self.add("/slow")
+        self.server.latency = 1
+        with self.assertRaises(TimeoutError):
+            self.get(url, timeout=0.2)
+        self.assertEqual(self.server.requests, 2)
+
+    def test_status_retries_exhausted(self):
+        url = self.add("/unavailable", 503)
+        with self.assertRaises(RetryError):
+            self.get(url)
+        self.assertEqual(self.server.requests, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+import sys
+import unittest
+from os.path import abspath, dirname, join
+from socket import create_server, socket
+from threading import Lock, Thread
+
+from h2.config import H2Configuration
+from h2.connection import H2Connection
+from h2.events import ConnectionTerminated, DataReceived, RequestReceived
+from requests import Session
+from requests.exceptions import ConnectionError, RetryError
+from requests.packages.urllib3.util.retry import Retry
+
+sys.path.insert(0, join(dirname(dirname(abspath(__file__))), "my"))
+
+from extra.network.http2_adapter import HTTP2Adapter
+
+
+class H2Server:
+    """Plain text HTTP/2 server answering with request path, /status/<code> paths answer with that status"""
+
+    def __init__(self):
+        self._socket = create_server(("127.0.0.1", 0))
+        self.port = self._socket.getsockname()[1]
+        self.requests = []
+        self._lock = Lock()
+        Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._socket.accept()
+            except OSError:
+                return
+            Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def _handle(self, conn: socket):
+        h2 = H2Connection(H2Configuration(client_side=False, header_encoding="utf-8"))
+        h2.initiate_connection()
+        conn.sendall(h2.data_to_send())
+        with conn:
+            while True:
+                data = conn.recv(65535)
+                if not data:
+                    return
+                for event in h2.receive_data(data):
+                    if isinstance(event, RequestReceived):
+                        self._respond(h2, event.stream_id, dict(event.headers)[":path"])
+                    elif isinstance(event, DataReceived):
+                        h2.acknowledge_received_data(event.flow_controlled_length, event.stream_id)
+                    elif isinstance(event, ConnectionTerminated):
+                        return
+                conn.sendall(h2.data_to_send())
+
+    def _respond(self, h2: H2Connection, stream_id: int, path: str):
+        with self._lock:
+            self.requests.append(path)
+        status = path.split("/")[2] if path.startswith("/status/") else "200"
+        body = path.encode()
+        h2.send_headers(stream_id, [(":status", status), ("content-length", str(len(body)))])
+        h2.send_data(stream_id, body, end_stream=True)
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    def close(self):
+        self._socket.close()
+
+
+class HTTP2AdapterTest(unittest.TestCase):
+    def setUp(self):
+        self.server = H2Server()
+        self.addCleanup(self.server.close)
+
+    def session(self, **kwargs) -> Session:
+        self.adapter = HTTP2Adapter(prior_knowledge=True, **kwargs)
+        session = Session()
+        session.mount("http://", self.adapter)
+        self.addCleanup(session.close)
+
+        return session
+
+    def test_get_over_http2(self):
+        response = self.session().get(self.server.url("/hello"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.http_version, "HTTP/2")
+        self.assertTrue(response._content_consumed)
+        self.assertEqual(response.text, "/hello")
+
+    def test_stream(self):
+        response = self.session().get(self.server.url("/streamed"), stream=True)
+        self.assertEqual(b"".join(response.iter_content(3)), b"/streamed")
+
+    def test_status_retries_exhausted(self):
+        session = self.session(max_retries=Retry(2, status_forcelist=[503], backoff_factor=0))
+        with self.assertRaises(RetryError):
+            session.get(self.server.url("/status/503"))
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_connection_error_retries_exhausted(self):
+        session = self.session(max_retries=Retry(1, backoff_factor=0))
+        # Bound socket which doesn't listen refuses connections
+        with socket() as closed:
+            closed.bind(("127.0.0.1", 0))
+            with self.assertRaises(ConnectionError):
+                session.get(f"http://127.0.0.1:{closed.getsockname()[1]}/")
+
+    def test_evicted_client_closed_after_stream(self):
+        session = self.session(max_proxies=0)
+        streamed = session.get(self.server.url("/first"), stream=True)
+        client = next(iter(self.adapter._clients.values()))
+        # Different TLS settings use another client which evicts the first one
+        session.get(self.server.url("/second"), verify=False)
+        self.assertNotIn(client, self.adapter._clients.values())
+        self.assertFalse(client.is_closed)
+        self.assertEqual(streamed.content, b"/first")
+        self.assertTrue(client.is_closed)
+
+    def test_close_waits_for_streamed_response(self):
+        session = self.session()
+        streamed = session.get(self.server.url("/streamed"), stream=True)
+        client = next(iter(self.adapter._clients.values()))
+        self.adapter.close()
+        self.assertFalse(client.is_closed)
+        streamed.close()
+        self.assertTrue(client.is_closed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import sys
+import unittest
+from os.path import abspath, dirname, join
+from time import monotonic
+
+sys.path.insert(0, join(dirname(dirname(abspath(__file__))), "my"))
+
+from core.network.http_client import HttpClient
+from core.network.mock_server import MockServer
+from core.network.recording import Exchange, HttpArchive
+
+
+class GetManyTest(unittest.TestCase):
+    def setUp(self):
+        self.server = MockServer(HttpArchive(), latency=None)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.client = HttpClient()
+        self.client.retries = 0
+
+    def add(self, path: str, elapsed: float) -> str:
+        url = self.server.url + path
+        self.server.archive.add(Exchange("GET", url, 200, "OK", [], path.encode(), elapsed))
+
+        return url
+
+    def test_deadline_bounds_elapsed_time(self):
+        fast = self.add("/fast", 0)
+        slow = [self.add(f"/slow/{i}", 3) for i in range(4)]
+        start_time = monotonic()
+        results = list(self.client.get_many([fast] + slow, concurrency=5, per_host_limit=5, deadline=0.5))
+        elapsed = monotonic() - start_time
+        self.assertLess(elapsed, 1)
+        self.assertEqual([(url, response.content) for url, response, _ in results], [(fast, b"/fast")])
+
+    def test_all_finish_before_deadline(self):
+        urls = [self.add(f"/page/{i}", 0) for i in range(3)]
+        results = list(self.client.get_many(urls, ordered=True, deadline=5))
+        self.assertEqual([response.content for _, response, _ in results], [b"/page/0", b"/page/1", b"/page/2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+import sys
+import unittest
+from os.path import abspath, dirname, join
+from tempfile import mkdtemp
+from threading import Thread
+from time import monotonic, sleep
+
+sys.path.insert(0, join(dirname(dirname(abspath(__file__))), "my"))
+
+from core.network.proxy import Proxy
+from core.network.proxy_pool import ProxyPool, ProxyPoolDepletedError, ProxyPoolTimeoutError
+from core.network.proxy_pool_server import ProxyPoolClient, ProxyPoolServer
+
+
+def proxies(count: int) -> list:
+    return [Proxy(f"10.0.0.{i}", 8080) for i in range(1, count + 1)]
+
+
+class ProxyPoolServerTest(unittest.TestCase):
+    def setUp(self):
+        self.pool = ProxyPool(proxies(2), max_retries=2)
+        self.server = ProxyPoolServer(self.pool, join(mkdtemp(), "pool.sock"))
+        self.server.start()
+        self.addCleanup(self.server.stop)
+
+    def client(self, **kwargs) -> ProxyPoolClient:
+        client = ProxyPoolClient(self.server.address, **kwargs)
+        self.addCleanup(client.close)
+
+        return client
+
+    def test_get_and_return_round_trip(self):
+        client = self.client()
+        proxy, retries = client.get_proxy(1)
+        self.assertIn(proxy, proxies(2))
+        self.assertEqual(retries, 0)
+        self.assertEqual(client.stats["in_use"], 1)
+        client.return_proxy(proxy, 1)
+        self.assertEqual(client.stats, {"available": 2, "in_use": 0, "dead": 0, "total": 2})
+
+    def test_failures_retire_proxy(self):
+        client = self.client()
+        proxy, _ = client.get_proxy(1)
+        client.return_proxy(proxy, 2)
+        self.assertEqual(client.stats["dead"], 1)
+
+    def test_tcp_server(self):
+        server = ProxyPoolServer(self.pool, ("127.0.0.1", 0))
+        server.start()
+        self.addCleanup(server.stop)
+        client = ProxyPoolClient(server.address)
+        self.addCleanup(client.close)
+        proxy, _ = client.get_proxy(1)
+        client.return_proxy(proxy, 0)
+        self.assertEqual(self.pool.available_count, 2)
+
+    def test_batch_leases_and_close_returns_unused(self):
+        client = self.client(batch_size=2)
+        proxy, _ = client.get_proxy(1)
+        self.assertEqual(self.pool.in_use_count, 2)
+        client.return_proxy(proxy, 0)
+        # Return is buffered until batch is full
+        self.assertEqual(self.pool.in_use_count, 2)
+        client.close()
+        self.assertEqual(self.pool.available_count, 2)
+
+    def test_disconnect_returns_leases(self):
+        client = ProxyPoolClient(self.server.address)
+        client.get_proxy(1)
+        with client._lock:
+            client._disconnect()
+        deadline = monotonic() + 2
+        while self.pool.in_use_count and monotonic() < deadline:
+            sleep(0.01)
+        self.assertEqual(self.pool.in_use_count, 0)
+
+    def test_disconnect_drops_buffered_returns(self):
+        client = self.client(batch_size=10)
+        proxy, _ = client.get_proxy(1)
+        client.return_proxy(proxy, 0)
+        with client._lock:
+            client._disconnect()
+        other = self.client()
+        leased = [other.get_proxy(1)[0] for _ in range(2)]
+        client.flush()
+        # Buffered return of first client must not release other client's checkout
+        self.assertEqual(self.pool.in_use_count, 2)
+        for proxy in leased:
+            other.return_proxy(proxy, 0)
+
+    def test_stale_return_after_disconnect(self):
+        pool = ProxyPool(proxies(1))
+        server = ProxyPoolServer(pool, join(mkdtemp(), "single.sock"))
+        server.start()
+        self.addCleanup(server.stop)
+        first = ProxyPoolClient(server.address)
+        self.addCleanup(first.close)
+        proxy, _ = first.get_proxy(1)
+        with first._lock:
+            first._disconnect()
+        second = ProxyPoolClient(server.address)
+        self.addCleanup(second.close)
+        self.assertEqual(second.get_proxy(2)[0], proxy)
+        # First client's return goes over new connection which never leased proxy
+        with first._lock:
+            result = first._call({"op": "return", "proxies": [[proxy.ip, proxy.port, None, None, False, 0]]})
+        self.assertEqual(result, [False])
+        self.assertEqual(pool.in_use_count, 1)
+        self.assertEqual(pool.available_count, 0)
+        second.return_proxy(proxy, 0)
+        self.assertEqual(pool.available_count, 1)
+
+    def test_return_from_other_thread_while_waiting(self):
+        client = self.client()
+        first, _ = client.get_proxy(1)
+        second, _ = client.get_proxy(1)
+
+        def return_later():
+            sleep(0.2)
+            client.return_proxy(first, 0)
+
+        thread = Thread(target=return_later)
+        thread.start()
+        start_time = monotonic()
+        proxy, _ = client.get_proxy(5)
+        thread.join()
+        self.assertEqual(proxy, first)
+        self.assertLess(monotonic() - start_time, 1)
+        client.return_proxy(proxy, 0)
+        client.return_proxy(second, 0)
+
+    def test_timeout_and_depleted_errors(self):
+        client = self.client()
+        leased = [client.get_proxy(1)[0] for _ in range(2)]
+        with self.assertRaises(ProxyPoolTimeoutError):
+            client.get_proxy(0.1)
+        for proxy in leased:
+            client.return_proxy(proxy, 2)
+        with self.assertRaises(ProxyPoolDepletedError):
+            client.get_proxy(0.1)
+
+    def test_domain_ban(self):
+        client = self.client()
+        proxy, _ = client.get_proxy(1, domain="example.com")
+        client.ban_proxy(proxy, "example.com")
+        client.return_proxy(proxy, 0)
+        self.assertTrue(self.pool.is_banned(proxy, "example.com"))
+        other, _ = client.get_proxy(1, domain="example.com")
+        self.assertNotEqual(other, proxy)
+        client.return_proxy(other, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import gzip
+import sys
+import unittest
+from os.path import abspath, dirname, join
+from unittest.mock import Mock, patch
+
+from requests import Response
+from requests.structures import CaseInsensitiveDict
+
+sys.path.insert(0, join(dirname(dirname(abspath(__file__))), "my"))
+
+from core.network import response_body
+from core.network.response_body import ResponseTooLargeError, StreamDecoder, UnsupportedEncodingError, read_body
+
+# Decompressed size of bomb bodies
+BOMB_SIZE = 64 * 1024 * 1024
+LIMIT = 1024 * 1024
+
+
+class _Raw:
+    """Raw response body streamed in chunks"""
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.closed = False
+
+    def stream(self, chunk_size: int, decode_content: bool = False):
+        for i in range(0, len(self.body), chunk_size):
+            yield self.body[i:i + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+def response(body: bytes, content_encoding: str) -> Response:
+    response = Response()
+    response.headers = CaseInsensitiveDict({"Content-Encoding": content_encoding})
+    response.raw = _Raw(body)
+
+    return response
+
+
+def zstd_compress(data: bytes) -> bytes:
+    if response_body.ZstdDecompressor is not None:
+        try:
+            from compression.zstd import compress
+        except ImportError:
+            from backports.zstd import compress
+
+        return compress(data)
+
+    return response_body.zstandard.ZstdCompressor().compress(data)
+
+
+def bomb(compress) -> bytes:
+    return compress(bytes(BOMB_SIZE))
+
+
+class ReadBodyTest(unittest.TestCase):
+    def assertBombRefused(self, body: bytes, content_encoding: str):
+        bomb_response = response(body, content_encoding)
+        with self.assertRaises(ResponseTooLargeError):
+            read_body(bomb_response, LIMIT)
+        self.assertTrue(bomb_response.raw.closed)
+
+    def test_gzip_bomb(self):
+        self.assertBombRefused(bomb(gzip.compress), "gzip")
+
+    @unittest.skipIf(response_body.brotli is None, "brotli library is not installed")
+    def test_brotli_bomb(self):
+        body = bomb(response_body.brotli.compress)
+        if response_body._brotli_bounded():
+            self.assertBombRefused(body, "br")
+        else:
+            with self.assertRaises(UnsupportedEncodingError):
+                read_body(response(body, "br"), LIMIT)
+
+    @unittest.skipIf(
+        response_body.ZstdDecompressor is None and response_body.zstandard is None, "zstd library is not installed"
+    )
+    def test_zstd_bomb(self):
+        body = bomb(zstd_compress)
+        if response_body.ZstdDecompressor is not None:
+            self.assertBombRefused(body, "zstd")
+        else:
+            with self.assertRaises(UnsupportedEncodingError):
+                read_body(response(body, "zstd"), LIMIT)
+
+    def test_unbounded_decoder_refused_with_limit(self):
+        with patch.object(response_body, "ZstdDecompressor", None), patch.object(response_body, "zstandard", Mock()):
+            with self.assertRaises(UnsupportedEncodingError):
+                StreamDecoder("zstd", bounded=True)
+            self.assertIsNotNone(StreamDecoder("zstd")._decoders[0])
+
+    def test_body_within_limit(self):
+        body = read_body(response(gzip.compress(b"body" * 1000), "gzip"), LIMIT)
+        self.assertEqual(body, b"body" * 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()